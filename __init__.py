@@ -13,6 +13,7 @@ from .lang import LANG
 from .column_customizer import ColumnCustomizer
 from .help_qt import HelpManager
 from .calculator import LevelingCalculator
+from .traverse import TraverseData, LevelingResult
 from .session import SessionManager
 from .import_export_qt import ImportExportManager
 
@@ -27,6 +28,7 @@ __all__ = [
     'ColumnCustomizer',
     'HelpManager',
     'LevelingCalculator',
+    'TraverseData', 'LevelingResult',
     'SessionManager',
     'ImportExportManager'
 ]
@@ -0,0 +1,254 @@
+"""Headless report generation over many field books.
+
+    python -m leveling_app_modular.batch books/ --out reports/ --format pdf xlsx
+
+Every leveling CSV or leveling database (.db) given, or found in a given
+directory, is one job: the book is read, calculated with
+LevelingCalculator, its profile rendered offscreen and the report written
+to --out as <book name>.pdf and/or .xlsx. Jobs run in a
+ProcessPoolExecutor, one book per task, and each reports how long its
+stages took. Books that share a name get the file type, and then the
+folder, added to their report names so no two jobs write the same file.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from .calculator import LevelingCalculator, LevelingCalculatorError
+from .db import has_leveling_data, read_leveling_rows
+from .pdf_report import ReportBuilder, ReportData
+from .render_service import GraphSnapshot, render_graph
+from .utils import export_to_excel
+
+LEVELING_COLUMNS = ["Point", "BS", "IS", "FS"]
+FIELD_BOOK_SUFFIXES = (".csv", ".db")
+FORMATS = ("pdf", "xlsx")
+GRAPH_DPI = 150
+
+
+def find_field_books(paths):
+    """Field book files among paths; directories are searched one level deep, in name order.
+
+    A database found in a directory is a field book only if it has a
+    leveling_data table, so profile databases beside it are left out.
+    """
+    books = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            books.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in FIELD_BOOK_SUFFIXES and p.is_file()
+                                and (p.suffix.lower() != ".db" or has_leveling_data(p))))
+        elif path.suffix.lower() in FIELD_BOOK_SUFFIXES:
+            books.append(path)
+    return books
+
+
+def report_names(books):
+    """Report file name, without extension, of each book: its stem, made unique.
+
+    Books sharing a stem are told apart by file type (site_csv, site_db),
+    then also by folder; ValueError if that still leaves two the same.
+    """
+    books = [Path(book) for book in books]
+    candidates = [
+        lambda p: p.stem,
+        lambda p: f"{p.stem}_{p.suffix.lstrip('.').lower()}",
+        lambda p: f"{p.resolve().parent.name}_{p.stem}_{p.suffix.lstrip('.').lower()}",
+    ]
+    names = [candidates[0](book) for book in books]
+    for name_of in candidates[1:]:
+        clashing = {name for name in names if names.count(name) > 1}
+        names = [name_of(book) if name in clashing else name for book, name in zip(books, names)]
+    clashing = sorted({name for name in names if names.count(name) > 1})
+    if clashing:
+        raise ValueError(f"Field books would overwrite each other's reports: {', '.join(clashing)}")
+    return names
+
+
+def read_field_book(path):
+    """Input table rows [point, bs, is, fs] of a leveling CSV or database.
+
+    CSV columns named like the input table are mapped by name, as the
+    import dialog does; a file without such a header is read as Point, BS,
+    IS, FS in order.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".db":
+        return [["" if value is None else str(value) for value in row] for row in read_leveling_rows(path)]
+    with open(path, newline='') as f:
+        rows = [row for row in csv.reader(f) if row and any(cell.strip() for cell in row)]
+    if not rows:
+        return []
+    header = [cell.strip().lower() for cell in rows[0]]
+    if any(name.lower() in header for name in LEVELING_COLUMNS):
+        sources = [header.index(name.lower()) if name.lower() in header else None for name in LEVELING_COLUMNS]
+        rows = rows[1:]
+    else:
+        sources = range(len(LEVELING_COLUMNS))
+    return [[row[src].strip() if src is not None and src < len(row) else "" for src in sources] for row in rows]
+
+
+def profile_xy(results):
+    """Profile graph points of a LevelingResult: numeric point labels as x, else the row number."""
+    labels = results.labels
+    x = np.arange(len(labels), dtype=np.float64)
+    for i, label in enumerate(labels):
+        if label.replace('.', '').replace('-', '').isdigit():
+            x[i] = float(label)
+    return x, results.adjusted_rl
+
+
+class BatchJob:
+    """One field book and how to report it; plain attributes so it pickles to a worker process."""
+
+    def __init__(self, source, out_dir, method="HI", first_rl=100.0, last_rl=None, formats=("pdf",), precision=3,
+                 professional=False, dpi=GRAPH_DPI, options=None, name=None):
+        self.source = str(source)
+        self.name = name or Path(source).stem
+        self.out_dir = str(out_dir)
+        self.method = method
+        self.first_rl = first_rl
+        self.last_rl = last_rl
+        self.formats = tuple(formats)
+        self.precision = precision
+        self.professional = professional
+        self.dpi = dpi
+        self.options = dict(options or {})
+
+    def __repr__(self):
+        return f"BatchJob({self.source!r}, {self.method}, {'/'.join(self.formats)})"
+
+
+class JobResult:
+    """Outcome of one BatchJob: files written, seconds per stage, and the error if it failed."""
+
+    def __init__(self, source, rows=0, outputs=(), timings=None, error=None):
+        self.source = source
+        self.rows = rows
+        self.outputs = list(outputs)
+        self.timings = dict(timings or {})
+        self.error = error
+
+    def __repr__(self):
+        return f"JobResult({self.source!r}, {'failed' if self.error else 'ok'}, {self.total:.2f}s)"
+
+    @property
+    def total(self):
+        return sum(self.timings.values())
+
+    def summary(self):
+        name = Path(self.source).name
+        if self.error:
+            return f"FAILED {name}: {self.error}"
+        stages = "  ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items())
+        return f"ok     {name}: {self.rows} rows  {stages}  total {self.total:.2f}s"
+
+
+def run_job(job):
+    """Reads, calculates and reports one field book; never raises, failures are returned in the JobResult."""
+    timings = {}
+    outputs = []
+    rows = 0
+    last = time.perf_counter()
+
+    def lap(stage):
+        nonlocal last
+        now = time.perf_counter()
+        timings[stage] = now - last
+        last = now
+
+    try:
+        data = read_field_book(job.source)
+        lap("read")
+        calculator = LevelingCalculator({"precision": job.precision})
+        results, _stats = calculator.calculate_leveling(job.method, job.first_rl, job.last_rl, data)
+        rows = len(results)
+        lap("calculate")
+        target = Path(job.out_dir) / job.name
+        if "pdf" in job.formats:
+            # The worker is its own process, so render directly instead of through the render service threads
+            graph = render_graph(GraphSnapshot(*profile_xy(results)), "png", job.dpi)
+            lap("render")
+            options = dict(job.options)
+            options.setdefault("project_name", Path(job.source).stem)
+            ReportBuilder(ReportData.from_result(results, graph), job.professional, **options).write(f"{target}.pdf")
+            outputs.append(f"{target}.pdf")
+            lap("pdf")
+        if "xlsx" in job.formats:
+            export_to_excel(results, f"{target}.xlsx")
+            outputs.append(f"{target}.xlsx")
+            lap("xlsx")
+    except LevelingCalculatorError as e:
+        # Name the first invalid reading rather than only "Input validation failed"
+        first = e.errors[0] if e.errors else None
+        message = first.get("message") if isinstance(first, dict) else first
+        detail = f"{e}: {message}" if message else str(e)
+        return JobResult(job.source, rows, outputs, timings, detail)
+    except Exception as e:
+        return JobResult(job.source, rows, outputs, timings, f"{type(e).__name__}: {e}")
+    return JobResult(job.source, rows, outputs, timings)
+
+
+def run_batch(jobs, workers=None):
+    """Runs jobs in a process pool and yields their JobResults as they finish.
+
+    workers=1 runs the jobs in this process, in order.
+    """
+    if workers == 1:
+        for job in jobs:
+            yield run_job(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, job) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m leveling_app_modular.batch",
+                                     description="Calculate leveling field books and write a report for each.")
+    parser.add_argument("inputs", nargs="+", help="Leveling CSV or .db files, or directories holding them")
+    parser.add_argument("--out", required=True, help="Directory for the reports")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=["pdf"], dest="formats")
+    parser.add_argument("--method", choices=("HI", "RF"), default="HI")
+    parser.add_argument("--first-rl", type=float, default=100.0, help="RL of the first point (default 100.0)")
+    parser.add_argument("--last-rl", type=float, default=None, help="Known RL of the last point, for the misclosure adjustment")
+    parser.add_argument("--precision", type=int, default=3)
+    parser.add_argument("--professional", action="store_true", help="Professional report layout")
+    parser.add_argument("--surveyor", default="")
+    parser.add_argument("--dpi", type=int, default=GRAPH_DPI, help="Graph resolution in the PDF")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    books = find_field_books(args.inputs)
+    if not books:
+        print("No field books (.csv or .db) found.", file=sys.stderr)
+        return 2
+    try:
+        names = report_names(books)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    os.makedirs(args.out, exist_ok=True)
+    options = {"surveyor": args.surveyor} if args.surveyor else {}
+    jobs = [BatchJob(book, args.out, args.method, args.first_rl, args.last_rl, args.formats, args.precision,
+                     args.professional, args.dpi, options, name) for book, name in zip(books, names)]
+    start = time.perf_counter()
+    failed = 0
+    busy = 0.0
+    for result in run_batch(jobs, args.workers):
+        print(result.summary(), flush=True)
+        failed += result.error is not None
+        busy += result.total
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs) - failed}/{len(jobs)} field books reported in {elapsed:.1f}s ({busy:.1f}s of job time)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,10 @@
 from .utils import is_number, format_num, MAX_SANE_READING
+from .traverse import TraverseData, LevelingResult, adjustment_column, round_column, KIND_NONE, KIND_BS, KIND_IS, KIND_FS, KIND_CP
 import logging
+import numpy as np
+
+ENGINE_VECTOR = "vector"
+ENGINE_SCALAR = "scalar"
 
 class LevelingCalculatorError(Exception):
     """Custom exception for calculator errors."""
@@ -7,172 +12,502 @@ class LevelingCalculatorError(Exception):
         super().__init__(message)
         self.errors = errors if errors is not None else []
 
+class LevelingCalculationCancelled(LevelingCalculatorError):
+    """Raised inside a calculation after cancel() was called."""
+
+# Rows validated or calculated between progress reports and cancellation checks
+PROGRESS_STEP = 2048
+
 class LevelingCalculator:
-    def __init__(self, settings):
+    def __init__(self, settings, engine=None, progress_callback=None):
         logging.debug("LevelingCalculator.__init__ called")
         self.settings = settings
+        # Called with a 0-100 percentage while a calculation runs
+        self.progress_callback = progress_callback
+        self._cancelled = False
+        # "vector" (NumPy) or "scalar" (row-by-row reference implementation)
+        self.engine = engine or settings.get("calc_engine", ENGINE_VECTOR)
+        if self.engine not in (ENGINE_VECTOR, ENGINE_SCALAR):
+            raise LevelingCalculatorError(f"Unknown calculation engine: {self.engine}")
+        # (reorganized data, TraverseData) from the last successful validate_input
+        self._parsed = None
+        # (method, first RL, last RL, TraverseData, LevelingResult) of the last
+        # array calculation, kept for recalculate_row
+        self._state = None
 
     def calculate_leveling(self, method, first_rl, last_rl_user, data):
-        """Main calculation method that routes to specific calculation methods."""
+        """Main calculation method that routes to specific calculation methods.
+
+        data is either a list of table rows or a TraverseData.
+        """
         logging.debug(f"LevelingCalculator.calculate_leveling called: method={method}")
         
+        self._progress(0)
         reorganized_data, validation_errors = self.validate_input(data)
         if validation_errors:
             raise LevelingCalculatorError("Input validation failed", errors=validation_errors)
-        
+        self._progress(90)
+
         if method == "HI":
-            return self.calculate_hi(first_rl, last_rl_user, reorganized_data)
+            result = self.calculate_hi(first_rl, last_rl_user, reorganized_data)
         elif method == "RF":
-            return self.calculate_rise_and_fall(first_rl, last_rl_user, reorganized_data)
+            result = self.calculate_rise_and_fall(first_rl, last_rl_user, reorganized_data)
         else:
             raise LevelingCalculatorError(f"Unknown calculation method: {method}")
+        self._progress(100)
+        return result
+
+    def cancel(self):
+        """Asks a running calculation to stop at its next progress check. Safe to call from another thread."""
+        self._cancelled = True
+
+    def _progress(self, percent):
+        if self._cancelled:
+            raise LevelingCalculationCancelled("Calculation cancelled")
+        if self.progress_callback is not None:
+            self.progress_callback(percent)
 
     def validate_input(self, data):
-        """Validates the input data and returns reorganized data and errors."""
-        logging.debug("LevelingCalculator.validate_input called")
-        data_values, row_map = self._get_data_values(data)
+        """Validates the input data and returns reorganized data and errors.
 
-        if not data_values:
-            return None, [("info", "No data to calculate.")]
+        Validation, reorganization and number parsing are done in a single pass
+        over the rows. The parsed readings are cached as a TraverseData for the
+        calculation stage (see the traverse property).
+        """
+        logging.debug("LevelingCalculator.validate_input called")
+        self._parsed = None
+        if isinstance(data, TraverseData):
+            return self._validate_traverse(data)
+        debug = logging.getLogger().isEnabledFor(logging.DEBUG)
 
         error_msgs = []
+        reorganized = []
+        labels, kinds, source_rows, bs_vals, is_vals, fs_vals, design_vals = [], [], [], [], [], [], []
+        prev = None  # (bs, is, fs) of the previous non-empty row
+        last_row_idx = None
+        station_counter = 1
 
         def add_error(msg, row_idx):
             error_msgs.append({"message": msg, "row": row_idx})
 
-        # Validate first row
-        first_row_error = self._validate_first_row(data_values, row_map)
-        if first_row_error:
-            add_error(first_row_error, row_map[0])
-
-        # Validate each row's data and sequence
-        for i, row in enumerate(data_values):
-            row_idx = row_map[i]
-            row_errors = self._validate_row_data(row, row_idx)
-            for error in row_errors:
-                add_error(error, row_idx)
-            
-            if i > 0:
-                sequence_errors = self._validate_row_sequence(data_values[i-1], row, row_idx)
-                for error in sequence_errors:
-                    add_error(error, row_idx)
+        n_rows = max(len(data), 1)
+        for row_idx, row_data in enumerate(data):
+            if row_idx % PROGRESS_STEP == 0 and row_idx:
+                self._progress(90 * row_idx // n_rows)
+            # Expecting a list of strings
+            cells = [str(val).strip() for val in row_data[:5]]
+            while len(cells) < 5:
+                cells.append("")
+            point, bs, is_, fs, design_rl = cells
+            if not (bs or is_ or fs or design_rl):
+                continue
+            if debug:
+                logging.debug(f"LevelingCalculator.validate_input: row_idx={row_idx}, values={cells}")
 
-        # Validate last row
-        last_row_error = self._validate_last_row(data_values, row_map)
-        if last_row_error:
-            add_error(last_row_error, row_map[-1])
+            # The first entry must be a pure BS
+            if prev is None and (not bs or is_ or fs):
+                add_error(f"Row {row_idx + 1}: The first entry must be a Backsight (BS) only.", row_idx)
+
+            parsed = self._parse_readings(row_idx, bs, is_, fs, design_rl, add_error)
+
+            # Sequence against the previous row
+            if prev is not None:
+                prev_bs, prev_is, prev_fs = prev
+                # A pure BS row cannot be followed by another pure BS row
+                if prev_bs and not prev_is and not prev_fs and bs and not fs:
+                    add_error(f"Row {row_idx + 1}: A BS cannot be followed by another BS unless it's a change point.", row_idx)
+                # A pure FS row must be followed by a BS (as part of a change point)
+                if prev_fs and not prev_bs and not prev_is and not bs:
+                    add_error(f"Row {row_idx + 1}: An FS must be followed by a BS on the next point.", row_idx)
+            prev = (bs, is_, fs)
+            last_row_idx = row_idx
+
+            labels.append(point)
+            source_rows.append(row_idx)
+            # Reorganize: auto-number empty points and mark change points with (cp)
+            if not point:
+                point = str(station_counter)
+            station_counter += 1
+            point_label = f"{point} (cp)" if bs and fs else point
+            reorganized.append((row_idx, [point_label, bs, is_, fs, design_rl]))
+
+            if bs and fs:
+                kinds.append(KIND_CP)
+            elif bs:
+                kinds.append(KIND_BS)
+            elif is_:
+                kinds.append(KIND_IS)
+            elif fs:
+                kinds.append(KIND_FS)
+            else:
+                kinds.append(KIND_NONE)
+            bs_vals.append(parsed[0])
+            is_vals.append(parsed[1])
+            fs_vals.append(parsed[2])
+            design_vals.append(parsed[3])
+
+        if prev is None:
+            return None, [{"message": "No data to calculate.", "row": None}]
+
+        # The last reading must be an FS
+        _last_bs, last_is, last_fs = prev
+        if last_is:
+            add_error(f"Row {last_row_idx + 1}: Last reading cannot be an IS. It must be an FS.", last_row_idx)
+        elif _last_bs and not last_fs:
+            add_error(f"Row {last_row_idx + 1}: Last reading cannot be a BS. It must be an FS.", last_row_idx)
 
         if error_msgs:
             return None, error_msgs
 
-        return self._reorganize_data_for_calculation(data_values, row_map), []
+        self._parsed = (reorganized, TraverseData(labels, bs_vals, is_vals, fs_vals, design_vals, kinds, source_rows))
+        return reorganized, []
 
-    def _get_data_values(self, data):
-        """Extracts non-empty data rows and their original indices."""
-        logging.debug("LevelingCalculator._get_data_values called")
-        data_values = []
-        row_map = []
-        for i, row_data in enumerate(data):
-            # Expecting a list of strings
-            row = [str(val).strip() for val in row_data]
-            while len(row) < 5:
-                row.append("")
-            if any(row[1:]):
-                data_values.append(row)
-                row_map.append(i)
-        return data_values, row_map
-
-    def _validate_first_row(self, data_values, row_map):
-        """Validates the first row of the survey data."""
-        logging.debug("LevelingCalculator._validate_first_row called")
-        # Unpack all 5 values, even if Design RL is not used in this specific validation
-        _point, first_bs, first_is, first_fs, _design_rl = data_values[0] 
-        if not first_bs or first_is or first_fs:
-            return f"Row {row_map[0] + 1}: The first entry must be a Backsight (BS) only."
-        return None
-
-    def _validate_row_data(self, row, row_idx):
-        """Validates the data within a single row."""
-        logging.debug(f"LevelingCalculator._validate_row_data called: row_idx={row_idx}")
-        # Unpack all 5 values
-        point, bs, is_, fs, design_rl = row 
-        errors = []
-        for val, name in [(bs, "BS"), (is_, "IS"), (fs, "FS")]:
+    @staticmethod
+    def _parse_readings(row_idx, bs, is_, fs, design_rl, add_error):
+        """Parses the readings of one row and checks their values and combination.
+
+        Returns (bs, is, fs, design rl) floats, NaN for empty or invalid cells.
+        """
+        nan = float("nan")
+        parsed = []
+        for val, name in ((bs, "BS"), (is_, "IS"), (fs, "FS")):
+            num_val = nan
             if val:
-                if not is_number(val):
-                    errors.append(f"Row {row_idx + 1}: Invalid non-numeric value for {name}.")
-                    continue
-                num_val = float(val)
-                if num_val < 0:
-                    errors.append(f"Row {row_idx + 1}: {name} reading cannot be negative.")
-                if num_val > MAX_SANE_READING:
-                    errors.append(f"Row {row_idx + 1}: Warning - {name} reading ({val}) is unusually high.")
-        
-        if design_rl and not is_number(design_rl):
-            errors.append(f"Row {row_idx + 1}: Invalid non-numeric value for Design RL.")
+                try:
+                    num_val = float(val)
+                except ValueError:
+                    add_error(f"Row {row_idx + 1}: Invalid non-numeric value for {name}.", row_idx)
+                else:
+                    if num_val < 0:
+                        add_error(f"Row {row_idx + 1}: {name} reading cannot be negative.", row_idx)
+                    if num_val > MAX_SANE_READING:
+                        add_error(f"Row {row_idx + 1}: Warning - {name} reading ({val}) is unusually high.", row_idx)
+            parsed.append(num_val)
+        design_val = nan
+        if design_rl:
+            try:
+                design_val = float(design_rl)
+            except ValueError:
+                add_error(f"Row {row_idx + 1}: Invalid non-numeric value for Design RL.", row_idx)
+        parsed.append(design_val)
 
+        # Combinations within the row
         if is_ and (bs or fs):
-            errors.append(f"Row {row_idx + 1}: IS cannot be in the same row as BS or FS.")
-        filled = [bool(bs), bool(is_), bool(fs)]
-        if sum(filled) > 1 and not (bs and fs and not is_):
-            errors.append(f"Row {row_idx + 1}: Invalid combination. Only BS and FS can be on the same line.")
-        return errors
-
-    def _validate_row_sequence(self, prev_row, current_row, row_idx):
-        """Validates the logical sequence between two rows."""
-        logging.debug(f"LevelingCalculator._validate_row_sequence called: prev_row_idx={row_idx-1}, current_row_idx={row_idx}")
-        # Unpack all 5 values for both rows
-        _prev_point, prev_bs, _prev_is, prev_fs, _prev_design_rl = prev_row
-        _point, bs, is_, fs, _design_rl = current_row
-        errors = []
-        # A pure BS row cannot be followed by another pure BS row
-        if prev_bs and not _prev_is and not prev_fs:
-            if bs and not fs:
-                errors.append(f"Row {row_idx + 1}: A BS cannot be followed by another BS unless it's a change point.")
-        # A pure FS row must be followed by a BS (as part of a change point)
-        if prev_fs and not prev_bs and not _prev_is:
-            if not bs:
-                errors.append(f"Row {row_idx + 1}: An FS must be followed by a BS on the next point.")
-        return errors
-
-    def _validate_last_row(self, data_values, row_map):
-        """Validates the last row of the survey data."""
-        logging.debug("LevelingCalculator._validate_last_row called")
-        last_row_idx = row_map[-1]
-        # Unpack all 5 values
-        _point, last_bs, last_is, last_fs, _last_design_rl = data_values[-1]
-        if last_is:
-            return f"Row {last_row_idx + 1}: Last reading cannot be an IS. It must be an FS."
-        if last_bs and not last_fs:
-            return f"Row {last_row_idx + 1}: Last reading cannot be a BS. It must be an FS."
-        return None
-
-    def _reorganize_data_for_calculation(self, data_values, row_map):
-        """Reorganizes data, auto-numbering points and marking change points with (cp)."""
-        logging.debug("LevelingCalculator._reorganize_data_for_calculation called")
-        reorganized = []
-        station_counter = 1
-        for i, row in enumerate(data_values):
-            row_idx = row_map[i]
-            point, bs, is_, fs, design_rl = row
+            add_error(f"Row {row_idx + 1}: IS cannot be in the same row as BS or FS.", row_idx)
+        if (bool(bs) + bool(is_) + bool(fs)) > 1 and not (bs and fs and not is_):
+            add_error(f"Row {row_idx + 1}: Invalid combination. Only BS and FS can be on the same line.", row_idx)
+        return parsed
 
-            # Auto-number point if it's empty
-            if not point.strip():
-                point = str(station_counter)
+    @property
+    def traverse(self):
+        """TraverseData parsed by the last successful validate_input, or None."""
+        return self._parsed[1] if self._parsed is not None else None
 
-            # If this row is a change point, append (cp) to the label
-            if bs and fs:
-                point_label = f"{point} (cp)"
-            else:
-                point_label = point
+    def _validate_traverse(self, traverse):
+        """Validates an already parsed traverse with array checks.
 
-            reorganized.append((row_idx, [point_label, bs, is_, fs, design_rl]))
-            station_counter += 1
-        return reorganized
+        Reports the same messages as validate_input for everything a
+        TraverseData can express; row numbers refer to the source table.
+        """
+        n = len(traverse)
+        if n == 0:
+            return None, [{"message": "No data to calculate.", "row": None}]
+        kind = traverse.kind
+        rows = traverse.source_rows
+        found = []  # (position, order, message)
+
+        if kind[0] != KIND_BS:
+            found.append((0, 0, "The first entry must be a Backsight (BS) only."))
+        for values, name in ((traverse.bs, "BS"), (traverse.is_, "IS"), (traverse.fs, "FS")):
+            with np.errstate(invalid="ignore"):
+                for i in np.flatnonzero(values < 0).tolist():
+                    found.append((i, 1, f"{name} reading cannot be negative."))
+                for i in np.flatnonzero(values > MAX_SANE_READING).tolist():
+                    found.append((i, 1, f"Warning - {name} reading ({format_num(values[i])}) is unusually high."))
+        prev, cur = kind[:-1], kind[1:]
+        for i in np.flatnonzero((prev == KIND_BS) & (cur == KIND_BS)).tolist():
+            found.append((i + 1, 2, "A BS cannot be followed by another BS unless it's a change point."))
+        for i in np.flatnonzero((prev == KIND_FS) & (cur != KIND_BS) & (cur != KIND_CP)).tolist():
+            found.append((i + 1, 2, "An FS must be followed by a BS on the next point."))
+        if kind[-1] == KIND_IS:
+            found.append((n - 1, 3, "Last reading cannot be an IS. It must be an FS."))
+        elif kind[-1] == KIND_BS:
+            found.append((n - 1, 3, "Last reading cannot be a BS. It must be an FS."))
+
+        if found:
+            found.sort(key=lambda entry: entry[:2])
+            return None, [{"message": f"Row {rows[i] + 1}: {msg}", "row": int(rows[i])} for i, _order, msg in found]
+        self._parsed = (traverse, traverse)
+        return traverse, []
 
     def calculate_hi(self, first_rl, last_rl_user, reorganized_data):
         """Calculates using Height of Instrument method."""
         logging.debug("LevelingCalculator.calculate_hi called")
+        if self.engine == ENGINE_SCALAR:
+            return self._calculate_hi_scalar(first_rl, last_rl_user, self._scalar_rows(reorganized_data))
+        return self._calculate_hi_vector(first_rl, last_rl_user, reorganized_data)
+
+    def recalculate_row(self, row_idx, row_data):
+        """Recalculates the last array calculation after table row row_idx changed.
+
+        Only the edited row is parsed; the traverse is re-checked with array
+        validation and the levels are recomputed from the start of the setup
+        holding the edit (from the edited row for Rise & Fall). Earlier levels
+        are reused and the misclosure adjustment is reapplied over the whole
+        run. Returns (results, stats, first_changed) where first_changed is
+        the first result row whose unadjusted levels were recomputed.
+        """
+        logging.debug(f"LevelingCalculator.recalculate_row called: row_idx={row_idx}")
+        if self._state is None:
+            raise LevelingCalculatorError("No previous calculation to update.")
+        method, first_rl, last_rl_user, parsed, old = self._state
+
+        cells = [str(val).strip() for val in row_data[:5]]
+        while len(cells) < 5:
+            cells.append("")
+        point, bs, is_, fs, design_rl = cells
+        errors = []
+        values = self._parse_readings(row_idx, bs, is_, fs, design_rl,
+                                      lambda msg, row: errors.append({"message": msg, "row": row}))
+        if errors:
+            raise LevelingCalculatorError("Input validation failed", errors=errors)
+        edited = parsed.replace_row(row_idx, point, *values)
+        _traverse, errors = self._validate_traverse(edited)
+        if errors:
+            raise LevelingCalculatorError("Input validation failed", errors=errors)
+
+        traverse = edited.readings()
+        bs_arr, is_arr, fs_arr, kind = traverse.bs, traverse.is_, traverse.fs, traverse.kind
+        n = len(traverse)
+        pos = min(int(np.searchsorted(traverse.source_rows, row_idx)), n)
+
+        if method == "HI":
+            # Restart at the last closing reading before the setup holding the edit
+            is_close = (kind == KIND_FS) | (kind == KIND_CP)
+            starts = np.flatnonzero(((kind == KIND_BS) | (kind == KIND_CP))[:min(pos, n - 1) + 1])
+            closes = np.flatnonzero(is_close[:starts[-1]])
+            start = int(closes[-1]) if len(closes) else 0
+            if start == 0:
+                hi, rl = self._hi_levels(bs_arr, is_arr, fs_arr, kind, first_rl)
+            else:
+                earlier = np.flatnonzero(is_close[:start])
+                rl_before = old.rl[earlier[-1]] if len(earlier) else first_rl
+                hi_tail, rl_tail = self._hi_levels(bs_arr[start:], is_arr[start:], fs_arr[start:], kind[start:],
+                                                   rl_before, first_hi=old.hi[start - 1])
+                hi = np.concatenate([old.hi[:start], hi_tail])
+                rl = np.concatenate([old.rl[:start], rl_tail])
+            results, stats = self._hi_result(first_rl, last_rl_user, edited, traverse, hi, rl)
+        else:
+            start = pos
+            if start == 0:
+                change, rl = self._rf_levels(bs_arr, is_arr, fs_arr, kind, first_rl)
+            else:
+                prev = start - 1
+                prev_kind = kind[prev]
+                prev_reading = is_arr[prev] if prev_kind == KIND_IS else (fs_arr[prev] if prev_kind == KIND_FS else bs_arr[prev])
+                change_tail, rl_tail = self._rf_levels(bs_arr[start:], is_arr[start:], fs_arr[start:], kind[start:],
+                                                       old.rl[prev], prev_reading=prev_reading)
+                change = np.concatenate([old.change[:start], change_tail])
+                rl = np.concatenate([old.rl[:start], rl_tail])
+            results, stats = self._rf_result(first_rl, last_rl_user, edited, traverse, change, rl)
+        return results, stats, start
+
+    def readjust(self, last_rl_user):
+        """Reapplies the misclosure adjustment of the last array calculation for a new closing RL.
+
+        The levels are kept; only the linear adjustment, the adjusted RLs and
+        the arithmetic check are recomputed.
+        """
+        if self._state is None:
+            raise LevelingCalculatorError("No previous calculation to update.")
+        method, first_rl, _last_rl, parsed, old = self._state
+        traverse = parsed.readings()
+        if method == "HI":
+            return self._hi_result(first_rl, last_rl_user, parsed, traverse, old.hi, old.rl)
+        return self._rf_result(first_rl, last_rl_user, parsed, traverse, old.change, old.rl)
+
+    def _traverse_for(self, reorganized_data):
+        """Returns the calculation input as a TraverseData.
+
+        Accepts a TraverseData or reorganized rows; the traverse parsed by
+        validate_input is reused when given the same reorganized data.
+        """
+        if isinstance(reorganized_data, TraverseData):
+            return reorganized_data
+        if self._parsed is not None and self._parsed[0] is reorganized_data:
+            return self._parsed[1]
+        labels, cells, source_rows = [], [], []
+        for row_idx, (point, bs_str, is_str, fs_str, design_rl_str) in reorganized_data:
+            if bs_str and fs_str and point.endswith(" (cp)"):
+                point = point[:-len(" (cp)")]
+            labels.append(point)
+            cells.append((bs_str or "nan", is_str or "nan", fs_str or "nan",
+                          design_rl_str if is_number(design_rl_str) else "nan"))
+            source_rows.append(row_idx)
+        values = np.array(cells, dtype=np.float64).reshape(-1, 4)
+        bs, is_, fs, design = values.T
+        kind = TraverseData.kinds_from_presence(~np.isnan(bs), ~np.isnan(is_), ~np.isnan(fs))
+        return TraverseData(labels, bs, is_, fs, design, kind, source_rows)
+
+    def _scalar_rows(self, reorganized_data):
+        """Reorganized rows for the scalar engine, converting a TraverseData back to text."""
+        if not isinstance(reorganized_data, TraverseData):
+            return reorganized_data
+        rows = zip(reorganized_data.source_rows.tolist(), reorganized_data.display_labels(), reorganized_data.to_rows())
+        return [(row_idx, [label] + row[1:]) for row_idx, label, row in rows]
+
+    def _adjust(self, rl, last_rl_user):
+        """Applies the misclosure adjustment to an RL array.
+
+        RL is rounded to the display precision first, as format_num() rounds
+        it in the scalar engine, so the adjustment is based on the values
+        shown in the results table. Returns the obtained last RL, the
+        adjustment per reading and the adjusted RLs.
+        """
+        precision = self.settings["precision"]
+        n = len(rl)
+        rounded_rl = round_column(rl, precision)
+        obtained_last_rl = float(rounded_rl[-1])
+        adjustment_per_reading = 0.0
+        if last_rl_user is not None:
+            misclosure = obtained_last_rl - last_rl_user
+            if n > 1:
+                adjustment_per_reading = -misclosure / (n - 1)
+        adjusted_rl = rounded_rl + adjustment_column(adjustment_per_reading, n)
+        return obtained_last_rl, adjustment_per_reading, adjusted_rl
+
+    @staticmethod
+    def _running_sum(values):
+        """Sum of values added one at a time in order, as the scalar engine adds them."""
+        return float(np.add.accumulate(values)[-1]) if len(values) else 0.0
+
+    @staticmethod
+    def _last_index_before(mask):
+        """Index of the last True entry strictly before each position, -1 where there is none."""
+        marks = np.where(mask, np.arange(len(mask)), -1)
+        prev = np.empty_like(marks)
+        if len(marks):
+            prev[0] = -1
+            prev[1:] = np.maximum.accumulate(marks)[:-1]
+        return prev
+
+    def _calculate_hi_vector(self, first_rl, last_rl_user, reorganized_data):
+        """Height of Instrument method on float arrays."""
+        parsed = self._traverse_for(reorganized_data)
+        traverse = parsed.readings()
+        if len(traverse) == 0:
+            self._state = None
+            return [], {}
+        self._progress(93)
+        hi, rl = self._hi_levels(traverse.bs, traverse.is_, traverse.fs, traverse.kind, first_rl)
+        self._progress(97)
+        return self._hi_result(first_rl, last_rl_user, parsed, traverse, hi, rl)
+
+    def _hi_levels(self, bs, is_, fs, kind, first_rl, first_hi=0.0):
+        """HI and unadjusted RL arrays for a run of readings.
+
+        Every BS (pure or at a change point) opens a setup whose HI is the RL of
+        the last closing reading plus the BS. Setups are linked to the setup
+        they close from. first_hi is the HI in use before the run, so a run
+        can start at any closing reading of a longer traverse.
+
+        The HIs are built with the same float operations, in the same order,
+        as the scalar engine (RL = HI - FS, then HI = RL + BS), so both round
+        alike at every precision: a plain chain of setups is one sequential
+        np.add.accumulate over the interleaved -FS and +BS readings.
+        """
+        n = len(kind)
+        is_cp = kind == KIND_CP
+        is_start = (kind == KIND_BS) | is_cp
+        is_close = (kind == KIND_FS) | is_cp
+        last_start = self._last_index_before(is_start)
+        last_close = self._last_index_before(is_close)
+
+        # Resolve the HI of every setup
+        starts = np.flatnonzero(is_start)
+        closed_by = np.where(is_cp[starts], starts, last_close[starts])
+        has_close = closed_by >= 0
+        closed_by_safe = np.maximum(closed_by, 0)
+        parent_row = np.where(has_close, last_start[closed_by_safe], -1)
+        parent = np.where(parent_row >= 0, np.searchsorted(starts, parent_row), -1)
+        closing_fs = np.where(has_close, fs[closed_by_safe], 0.0)
+        setup_hi = np.zeros(n)
+        m = len(starts)
+        if m and parent[0] == -1 and np.array_equal(parent[1:], np.arange(m - 1)):
+            steps = np.empty(2 * m + 1)
+            steps[0] = first_hi if has_close[0] else first_rl
+            steps[1::2] = -closing_fs
+            steps[2::2] = bs[starts]
+            setup_hi[starts] = np.add.accumulate(steps)[2::2]
+        else:
+            # Setups branching off an earlier one (a BS with no FS since the last BS)
+            for k, (row, p) in enumerate(zip(starts.tolist(), parent.tolist())):
+                if not has_close[k]:
+                    base = first_rl
+                else:
+                    base = (setup_hi[starts[p]] if p >= 0 else first_hi) - closing_fs[k]
+                setup_hi[row] = base + bs[row]
+
+        # HI of the setup a reading is taken from
+        prev_hi = np.where(last_start >= 0, setup_hi[np.maximum(last_start, 0)], first_hi)
+        hi = np.where(is_start, setup_hi, prev_hi)
+
+        rl = np.empty(n)
+        rl[is_close] = prev_hi[is_close] - fs[is_close]
+        sights = kind == KIND_IS
+        rl[sights] = prev_hi[sights] - is_[sights]
+        pure_bs = kind == KIND_BS
+        rl_before = np.where(last_close >= 0, rl[np.maximum(last_close, 0)], first_rl)
+        rl[pure_bs] = rl_before[pure_bs]
+        return hi, rl
+
+    def _hi_result(self, first_rl, last_rl_user, parsed, traverse, hi, rl):
+        """Adjustment, arithmetic check and LevelingResult for HI levels."""
+        bs, fs, kind = traverse.bs, traverse.fs, traverse.kind
+        obtained_last_rl, adjustment_per_reading, adjusted_rl = self._adjust(rl, last_rl_user)
+
+        is_cp = kind == KIND_CP
+        is_start = (kind == KIND_BS) | is_cp
+        is_close = (kind == KIND_FS) | is_cp
+        sum_bs = self._running_sum(bs[is_start])
+        sum_fs = self._running_sum(fs[is_close])
+        cp_count = int(is_cp.sum())
+        bs_count = int(is_start.sum())
+        is_count = int((kind == KIND_IS).sum())
+        fs_count = int(is_close.sum())
+
+        arith_check = sum_bs - sum_fs
+        rl_diff = obtained_last_rl - first_rl
+        arith_failed = abs(arith_check - rl_diff) > 10**(-self.settings["precision"])
+
+        logging.info(f"HI Method Arithmetic Check:")
+        logging.info(f"  Sum BS: {sum_bs}, Sum FS: {sum_fs}")
+        logging.info(f"  Arith Check (Sum BS - Sum FS): {arith_check}")
+        logging.info(f"  Last RL: {obtained_last_rl}, First RL: {first_rl}")
+        logging.info(f"  RL Diff (Last RL - First RL): {rl_diff}")
+        logging.info(f"  Check Failed: {arith_failed}")
+
+        stats = {
+            "cp": cp_count,
+            "bs": bs_count,
+            "is": is_count,
+            "fs": fs_count,
+            "sum_bs": sum_bs,
+            "sum_fs": sum_fs,
+            "arith_check": arith_check,
+            "rl_diff": rl_diff,
+            "arith_failed": arith_failed
+        }
+
+        results = LevelingResult("HI", self.settings["precision"], traverse.labels, parsed.station_numbers(readings_only=True),
+                                 kind, bs, traverse.is_, fs, rl, adjusted_rl, traverse.design_rl, adjustment_per_reading,
+                                 hi=hi, source_rows=traverse.source_rows, stats=stats)
+        self._state = ("HI", first_rl, last_rl_user, parsed, results)
+        return results, stats
+
+    def _calculate_hi_scalar(self, first_rl, last_rl_user, reorganized_data):
+        """Row-by-row Height of Instrument method, kept as the reference implementation."""
+        logging.debug("LevelingCalculator._calculate_hi_scalar called")
         
         results = []
         current_rl = first_rl
@@ -181,7 +516,10 @@ class LevelingCalculator:
         sum_fs = 0
         cp_count = bs_count = is_count = fs_count = 0
         
+        n_rows = max(len(reorganized_data), 1)
         for i, (row_idx, row_data) in enumerate(reorganized_data):
+            if i % PROGRESS_STEP == 0 and i:
+                self._progress(90 + 10 * i // n_rows)
             point, bs_str, is_str, fs_str, design_rl_str = row_data
             design_rl_val = float(design_rl_str) if is_number(design_rl_str) else None
 
@@ -293,6 +631,98 @@ class LevelingCalculator:
     def calculate_rise_and_fall(self, first_rl, last_rl_user, reorganized_data):
         """Calculates using Rise & Fall method."""
         logging.debug("LevelingCalculator.calculate_rise_and_fall called")
+        if self.engine == ENGINE_SCALAR:
+            return self._calculate_rise_and_fall_scalar(first_rl, last_rl_user, self._scalar_rows(reorganized_data))
+        return self._calculate_rise_and_fall_vector(first_rl, last_rl_user, reorganized_data)
+
+    def _calculate_rise_and_fall_vector(self, first_rl, last_rl_user, reorganized_data):
+        """Rise & Fall method on float arrays."""
+        parsed = self._traverse_for(reorganized_data)
+        traverse = parsed.readings()
+        if len(traverse) == 0:
+            self._state = None
+            return [], {}
+        self._progress(93)
+        change, rl = self._rf_levels(traverse.bs, traverse.is_, traverse.fs, traverse.kind, first_rl)
+        self._progress(97)
+        return self._rf_result(first_rl, last_rl_user, parsed, traverse, change, rl)
+
+    @staticmethod
+    def _rf_levels(bs, is_, fs, kind, first_rl, prev_reading=None):
+        """RL differences and unadjusted RL arrays for a run of readings.
+
+        Each row contributes an incoming reading (the FS at a change point) and an
+        outgoing reading (the BS at a change point); rises and falls are the
+        differences between consecutive outgoing and incoming readings. When
+        the run continues a longer traverse, prev_reading is the outgoing reading
+        before it and first_rl the RL of that reading.
+        """
+        n = len(kind)
+        is_cp = kind == KIND_CP
+        value = np.where(kind == KIND_IS, is_, np.where(kind == KIND_FS, fs, bs))
+        incoming = np.where(is_cp, fs, value)
+        outgoing = np.where(is_cp, bs, value)
+
+        change = np.zeros(n)
+        change[1:] = outgoing[:-1] - incoming[1:]
+        steps = change.copy()
+        if n:
+            if prev_reading is None:
+                steps[0] = first_rl
+            else:
+                change[0] = prev_reading - incoming[0]
+                steps[0] = first_rl + change[0]
+        return change, np.add.accumulate(steps)
+
+    def _rf_result(self, first_rl, last_rl_user, parsed, traverse, change, rl):
+        """Adjustment, arithmetic check and LevelingResult for Rise & Fall levels."""
+        kind = traverse.kind
+        obtained_last_rl, adjustment_per_reading, adjusted_rl = self._adjust(rl, last_rl_user)
+
+        rising = change > 0
+        falling = ~rising
+        falling[0] = False
+        sum_rise = self._running_sum(change[rising])
+        sum_fall = self._running_sum(-change[falling])
+        is_cp = kind == KIND_CP
+        pure_bs = kind == KIND_BS
+        cp_count = int(is_cp.sum()) + int(pure_bs[1:].sum())
+        bs_count = int(is_cp.sum() + pure_bs.sum())
+        is_count = int((kind == KIND_IS).sum())
+        fs_count = int(is_cp.sum() + (kind == KIND_FS).sum())
+
+        arith_check = sum_rise - sum_fall
+        rl_diff = obtained_last_rl - first_rl
+        arith_failed = abs(arith_check - rl_diff) > 10**(-self.settings["precision"])
+
+        logging.info(f"Rise and Fall Method Arithmetic Check:")
+        logging.info(f"  Sum Rise: {sum_rise}, Sum Fall: {sum_fall}")
+        logging.info(f"  Arith Check (Sum Rise - Sum Fall): {arith_check}")
+        logging.info(f"  Last RL: {obtained_last_rl}, First RL: {first_rl}")
+        logging.info(f"  RL Diff (Last RL - First RL): {rl_diff}")
+        logging.info(f"  Check Failed: {arith_failed}")
+
+        stats = {
+            "cp": cp_count,
+            "bs": bs_count,
+            "is": is_count,
+            "fs": fs_count,
+            "sum_rise": sum_rise,
+            "sum_fall": sum_fall,
+            "arith_check": arith_check,
+            "rl_diff": rl_diff,
+            "arith_failed": arith_failed
+        }
+
+        results = LevelingResult("RF", self.settings["precision"], traverse.labels, parsed.station_numbers(readings_only=True),
+                                 kind, traverse.bs, traverse.is_, traverse.fs, rl, adjusted_rl, traverse.design_rl,
+                                 adjustment_per_reading, change=change, source_rows=traverse.source_rows, stats=stats)
+        self._state = ("RF", first_rl, last_rl_user, parsed, results)
+        return results, stats
+
+    def _calculate_rise_and_fall_scalar(self, first_rl, last_rl_user, reorganized_data):
+        """Row-by-row Rise & Fall method, kept as the reference implementation."""
+        logging.debug("LevelingCalculator._calculate_rise_and_fall_scalar called")
         
         results = []
         current_rl = first_rl
@@ -300,7 +730,10 @@ class LevelingCalculator:
         sum_rise = sum_fall = 0
         cp_count = bs_count = is_count = fs_count = 0
         
+        n_rows = max(len(reorganized_data), 1)
         for i, (row_idx, row_data) in enumerate(reorganized_data):
+            if i % PROGRESS_STEP == 0 and i:
+                self._progress(90 + 10 * i // n_rows)
             point, bs_str, is_str, fs_str, design_rl_str = row_data
             design_rl_val = float(design_rl_str) if is_number(design_rl_str) else None
 
@@ -0,0 +1,363 @@
+"""Streaming CSV import in fixed-size chunks of table columns.
+
+CsvChunkReader parses a field book lazily and yields it CHUNK_ROWS rows at
+a time, already mapped to the target table columns, so only a few chunks
+are ever held in memory besides the table itself. It counts the bytes read
+for progress reporting and can be cancelled from another thread. With
+max_pending set, the reader waits once that many chunks are yielded but
+not yet release()d by the consumer, which keeps a slow consumer (the GUI
+thread appending to the table) from letting parsed chunks pile up.
+
+read_columns() is for files only needed as numbers, such as comparison
+profiles: it parses byte ranges of the file in worker processes straight
+into typed NumPy columns. Text that is not UTF-8 is read as cp1252, as
+Excel on Windows saves CSV, and failing that as Latin-1. Run as a module
+it benchmarks both readers:
+
+    python -m leveling_app_modular.csv_import export.csv --columns 1 2 --float 1 2
+"""
+import argparse
+import codecs
+import csv
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+CHUNK_ROWS = 5000
+MAX_PENDING_CHUNKS = 4
+WAIT_INTERVAL = 0.1  # Seconds between cancel checks while waiting for the consumer
+FALLBACK_ENCODINGS = ("cp1252", "latin-1")  # Tried in turn for text that is not UTF-8
+
+
+class ImportCancelled(Exception):
+    """Raised by CsvChunkReader when cancel() was called."""
+
+
+def decode_text(data, encoding="utf-8"):
+    """data decoded as encoding or, failing that, as the first of FALLBACK_ENCODINGS that fits."""
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError:
+        pass
+    for fallback in FALLBACK_ENCODINGS[:-1]:
+        try:
+            return data.decode(fallback)
+        except UnicodeDecodeError:
+            pass
+    return data.decode(FALLBACK_ENCODINGS[-1])
+
+
+def column_sources(mapping, column_names):
+    """Source CSV column (or None) for each target column, from an ImportDialog mapping."""
+    return [mapping.get(name) for name in column_names]
+
+
+class CsvChunkReader:
+    """Iterates over a CSV file as chunks of columns: one list of cell strings per target column.
+
+    sources holds the CSV column index feeding each target column, None
+    for a target column left empty. Blank rows and rows too short for the
+    mapping are skipped, as in the interactive import.
+    """
+
+    def __init__(self, file_path, sources, has_header=True, chunk_rows=CHUNK_ROWS, max_pending=None,
+                 encoding="utf-8-sig"):
+        self.file_path = file_path
+        self.sources = list(sources)
+        self.has_header = has_header
+        self.chunk_rows = chunk_rows
+        self.encoding = encoding
+        self.total_bytes = os.path.getsize(file_path)
+        self.bytes_read = 0
+        self.rows_read = 0
+        self._cancelled = threading.Event()
+        self._slots = threading.Semaphore(max_pending) if max_pending else None
+
+    def __repr__(self):
+        return f"CsvChunkReader({self.file_path!r}, {self.bytes_read}/{self.total_bytes} bytes)"
+
+    @property
+    def percent(self):
+        return 100 if not self.total_bytes else min(100, self.bytes_read * 100 // self.total_bytes)
+
+    def cancel(self):
+        """Stops the iteration at the next row chunk; safe to call from any thread."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def release(self):
+        """Marks one yielded chunk as consumed, letting the reader parse ahead again."""
+        if self._slots is not None:
+            self._slots.release()
+
+    def _lines(self, f):
+        decode = codecs.getincrementaldecoder(self.encoding)().decode
+        for line in f:
+            self.bytes_read += len(line)
+            try:
+                yield decode(line)
+            except UnicodeDecodeError:
+                yield decode_text(line, self.encoding)
+
+    def _wait_for_slot(self):
+        if self._slots is None:
+            return
+        while not self._slots.acquire(timeout=WAIT_INTERVAL):
+            if self._cancelled.is_set():
+                raise ImportCancelled()
+
+    def __iter__(self):
+        sources = self.sources
+        width = max((src for src in sources if src is not None), default=0) + 1
+        with open(self.file_path, 'rb') as f:
+            reader = csv.reader(self._lines(f))
+            if self.has_header:
+                next(reader, None)
+            columns = [[] for _ in sources]
+            for row in reader:
+                # Skip empty or malformed rows
+                if len(row) < width or all(cell.strip() == '' for cell in row):
+                    continue
+                for column, src in zip(columns, sources):
+                    column.append(row[src] if src is not None else "")
+                if len(columns[0]) >= self.chunk_rows:
+                    yield self._emit(columns)
+                    columns = [[] for _ in sources]
+            if columns and columns[0]:
+                yield self._emit(columns)
+        if self._cancelled.is_set():
+            raise ImportCancelled()
+
+    def _emit(self, columns):
+        if self._cancelled.is_set():
+            raise ImportCancelled()
+        self._wait_for_slot()
+        self.rows_read += len(columns[0])
+        return columns
+
+
+# Typed column parsing for very large exports. The file is cut into byte
+# ranges at line ends, each range is parsed in a worker process into one
+# NumPy array per target column and the arrays are joined in file order.
+FLOAT = "float"
+TEXT = "text"
+RANGE_BYTES = 32 * 1024 * 1024  # Largest byte range one task reads into memory
+PARALLEL_MIN_BYTES = 2 * RANGE_BYTES  # Smaller files are parsed in-process
+_BOM = codecs.BOM_UTF8
+
+
+def split_ranges(file_path, has_header=True, range_bytes=RANGE_BYTES):
+    """(start, end) byte offsets covering the data rows, each ending at a line end.
+
+    The UTF-8 BOM and, with has_header, the header line are left out.
+    """
+    size = os.path.getsize(file_path)
+    ranges = []
+    with open(file_path, 'rb') as f:
+        start = len(_BOM) if f.read(len(_BOM)) == _BOM else 0
+        f.seek(start)
+        if has_header:
+            f.readline()
+            start = f.tell()
+        while start < size:
+            f.seek(min(start + range_bytes, size))
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def float_column(cells):
+    """float64 array of the cell strings; blank or non-numeric cells become NaN."""
+    try:
+        return np.array([cell or "nan" for cell in cells] if "" in cells else cells, dtype=np.float64)
+    except ValueError:
+        pass
+    column = np.empty(len(cells))
+    for i, cell in enumerate(cells):
+        try:
+            column[i] = float(cell)
+        except ValueError:
+            column[i] = np.nan
+    return column
+
+
+def _typed(cells, kind):
+    return float_column(cells) if kind == FLOAT else np.array(cells, dtype=str)
+
+
+def _uniform_cells(data):
+    """Cell strings of every row and the row width, when a plain split is safe.
+
+    That is when the range has no quotes or lone carriage returns and every
+    line has the same number of commas and some content; None otherwise.
+    """
+    if b'"' in data or data.count(b"\r") != data.count(b"\r\n"):
+        return None
+    if not data.endswith(b"\n"):
+        data += b"\n"
+    buf = np.frombuffer(data, dtype=np.uint8)
+    line_ends = np.flatnonzero(buf == ord("\n"))
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    if not np.logical_or.reduceat((buf > ord(" ")) & (buf != ord(",")), line_starts).all():
+        return None  # A blank line
+    commas = np.flatnonzero(buf == ord(","))
+    per_line = int(np.searchsorted(commas, line_ends[0]))
+    if commas.size != per_line * line_ends.size:
+        return None
+    if per_line:
+        # Sorted and evenly counted: each line holds exactly its own block of commas
+        blocks = commas.reshape(-1, per_line)
+        if (blocks[:, 0] < line_starts).any() or (blocks[:, -1] > line_ends).any():
+            return None
+    text = decode_text(data).replace("\r", "")
+    return text.replace("\n", ",").split(",")[:-1], per_line + 1
+
+
+def parse_range(file_path, start, end, sources, kinds, encoding="utf-8"):
+    """Parses the rows in bytes [start, end) into one array per target column.
+
+    Rows are skipped as by CsvChunkReader and a range that is not valid in
+    encoding is decoded with the FALLBACK_ENCODINGS. Returns None when a
+    quoted cell spans lines (a line with an odd number of quotes), since the
+    range split may then have cut a row in two.
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    width = max((src for src in sources if src is not None), default=0) + 1
+    uniform = _uniform_cells(data) if encoding == "utf-8" and data else None
+    if uniform is not None:
+        # Every row is the same width: a column is every n-th cell
+        flat, row_width = uniform
+        rows = len(flat) // row_width if row_width >= width else 0
+        cells = {src: flat[src::row_width] if rows else [] for src in sources if src is not None}
+    else:
+        lines = decode_text(data, encoding).split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        if b'"' in data and any(line.count('"') % 2 for line in lines):
+            return None  # An odd number of quotes: a cell continues on another line
+        reader = csv.reader(lines)
+        cells = {src: [] for src in sources if src is not None}
+        try:
+            for row in reader:
+                if len(row) < width or not "".join(row).strip():
+                    continue
+                for src, column in cells.items():
+                    column.append(row[src])
+        except csv.Error:
+            return None
+        rows = len(next(iter(cells.values()))) if cells else 0
+    return [_typed(cells[src] if src is not None else [""] * rows, kind) for src, kind in zip(sources, kinds)]
+
+
+def _parse_serial(file_path, sources, kinds, has_header, progress, cancelled):
+    parts = []
+    reader = CsvChunkReader(file_path, sources, has_header)
+    for columns in reader:
+        if cancelled is not None and cancelled.is_set():
+            raise ImportCancelled()
+        parts.append([_typed(column, kind) for column, kind in zip(columns, kinds)])
+        if progress is not None:
+            progress(reader.percent)
+    return parts
+
+
+def read_columns(file_path, sources, kinds, has_header=True, workers=None, range_bytes=RANGE_BYTES,
+                 progress=None, cancelled=None):
+    """Reads a whole CSV into one typed NumPy array per target column.
+
+    sources is as for CsvChunkReader and kinds holds FLOAT or TEXT per
+    target column. Files of PARALLEL_MIN_BYTES or more are parsed by
+    `workers` processes (default: one per CPU). A file with line breaks
+    inside quoted cells cannot be split and is read serially instead.
+    progress, if given, is called with the percent of the file parsed as
+    ranges complete; once the threading.Event cancelled is set, the read
+    stops at the next range and raises ImportCancelled.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_ranges(file_path, has_header, range_bytes)
+    total_bytes = os.path.getsize(file_path)
+    args = (repeat(file_path), [r[0] for r in ranges], [r[1] for r in ranges], repeat(sources), repeat(kinds))
+
+    def collect(results):
+        parts = []
+        for (_start, end), part in zip(ranges, results):
+            if cancelled is not None and cancelled.is_set():
+                raise ImportCancelled()
+            parts.append(part)
+            if progress is not None:
+                progress(end * 100 // total_bytes)
+        return parts
+
+    if workers == 1 or len(ranges) < 2 or total_bytes < PARALLEL_MIN_BYTES:
+        parts = collect(map(parse_range, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            try:
+                parts = collect(pool.map(parse_range, *args))
+            except ImportCancelled:
+                pool.shutdown(cancel_futures=True)  # Only the ranges already being parsed are waited for
+                raise
+    if any(part is None for part in parts):
+        parts = _parse_serial(file_path, sources, kinds, has_header, progress, cancelled)
+    if not parts:
+        return [_typed([], kind) for kind in kinds]
+    return [np.concatenate(columns) for columns in zip(*parts)]
+
+
+def _read_rows_float(file_path, sources, kinds, has_header):
+    # The row-by-row reader read_columns replaces: csv.reader and float() per cell
+    columns = [[] for _ in sources]
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        if has_header:
+            next(reader, None)
+        for row in reader:
+            try:
+                values = [float(row[src]) if kind == FLOAT else row[src] for src, kind in zip(sources, kinds)]
+            except (ValueError, IndexError):
+                continue
+            for column, value in zip(columns, values):
+                column.append(value)
+    return columns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m leveling_app_modular.csv_import",
+                                     description="Benchmark CSV parsing into columns, in MB/s.")
+    parser.add_argument("file", help="CSV file to parse")
+    parser.add_argument("--columns", nargs="+", type=int, required=True, help="CSV column indexes to read")
+    parser.add_argument("--float", nargs="*", type=int, default=[], dest="floats",
+                        help="Those of --columns holding numbers (default: all text)")
+    parser.add_argument("--no-header", action="store_true", help="The file has no header row")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    kinds = [FLOAT if src in args.floats else TEXT for src in args.columns]
+    has_header = not args.no_header
+    megabytes = os.path.getsize(args.file) / 1e6
+    readers = [("csv.reader + float()", lambda: _read_rows_float(args.file, args.columns, kinds, has_header)),
+               ("read_columns, 1 process", lambda: read_columns(args.file, args.columns, kinds, has_header, workers=1)),
+               (f"read_columns, {args.workers or os.cpu_count()} process(es)",
+                lambda: read_columns(args.file, args.columns, kinds, has_header, workers=args.workers))]
+    for name, read in readers:
+        start = time.perf_counter()
+        columns = read()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<28} {len(columns[0]):>10} rows  {elapsed:7.2f}s  {megabytes / elapsed:7.1f} MB/s", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
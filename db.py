@@ -1,116 +1,557 @@
+import argparse
 import sqlite3
 import logging
+import math
+import re
+import sys
+import tempfile
+import threading
+import time
+from operator import itemgetter
 from pathlib import Path
+from .traverse import TraverseData, LevelingResult, RowChanges
 
-class DatabaseManager:
-    def __init__(self):
-        self.db_file = Path("leveling_data.db")
-        self.profile_db_file = Path("profile_data.db")
-        self._initialize_databases()
+# Applied to every pooled connection: WAL lets readers run beside a writer
+# and, with synchronous=NORMAL, a commit is one append to the log instead
+# of two fsyncs of the database file.
+PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),  # KiB
+    ("mmap_size", 256 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),  # ms a writer waits for another thread's transaction
+)
+STATEMENT_CACHE = 64  # Prepared statements kept per connection
 
-    def _initialize_databases(self):
-        """Initializes both SQLite databases and creates tables if they don't exist."""
+SCHEMA_VERSION = 1  # PRAGMA user_version of the database files written here
+LEVELING_COLUMNS = ("point", "bs", "is_val", "fs", "chainage")
+PROFILE_COLUMNS = ("point", "elevation", "distance")
+NUMERIC_COLUMNS = frozenset(("bs", "is_val", "fs", "chainage", "elevation", "distance"))
+SQL_VARIABLES = 500  # Values bound per IN (...) query
+_CHAINAGE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)")  # Leading number of a Point label, as the profile graph reads it
+# Rows are ordered by seq, not by id: a row keeps its id for life and rows
+# inserted between two others get a seq between theirs, so an insert or a
+# delete never renumbers the rows around it. Readings are REAL, with NULL
+# for an empty cell; a cell that is not a number keeps its text. Several
+# jobs can share a file, each with its own ids.
+LEVELING_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS leveling_data (
+        job_id TEXT NOT NULL DEFAULT '',
+        id INTEGER NOT NULL,
+        seq REAL NOT NULL,
+        setup_id INTEGER,
+        chainage REAL,
+        point TEXT,
+        bs REAL,
+        is_val REAL,
+        fs REAL,
+        PRIMARY KEY (job_id, id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS leveling_data_seq ON leveling_data (job_id, seq)",
+    "CREATE INDEX IF NOT EXISTS leveling_data_setup ON leveling_data (job_id, setup_id, seq)",
+    # Covers chainage range queries; books without chainages add nothing to it
+    "CREATE INDEX IF NOT EXISTS leveling_data_chainage ON leveling_data (job_id, chainage, point, bs, is_val, fs)"
+    " WHERE chainage IS NOT NULL",
+)
+PROFILE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS profile_data (
+        job_id TEXT NOT NULL DEFAULT '',
+        id INTEGER NOT NULL,
+        seq REAL NOT NULL,
+        point TEXT,
+        elevation REAL,
+        distance REAL,
+        PRIMARY KEY (job_id, id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS profile_data_seq ON profile_data (job_id, seq)",
+    # A profile's distance is its chainage; covers range queries on it
+    "CREATE INDEX IF NOT EXISTS profile_data_distance ON profile_data (job_id, distance, elevation, point)",
+)
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _select(conn, table, columns, job_id=""):
+    """Rows of table in entry order, from the current schema or an older one.
+
+    Tables from before row sequences are read in id order, and tables from
+    before jobs hold a single job.
+    """
+    names = _columns(conn, table)
+    where, params = (" WHERE job_id = ?", (job_id,)) if "job_id" in names else ("", ())
+    order = "seq" if "seq" in names else "id"
+    return conn.execute(f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY {order}", params).fetchall()
+
+
+def _typed_columns(conn, table, schema):
+    """Version 0 to 1: TEXT readings become REAL and rows gain seq, job_id and, for leveling, setup_id and chainage."""
+    names = _columns(conn, table)
+    old = f"{table}_v0"
+    conn.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    conn.execute(f"DROP INDEX IF EXISTS {table}_seq")
+    for statement in schema:
+        conn.execute(statement)
+    columns = [name for name in names if name not in ("id", "seq")]
+    # REAL affinity stores numeric text as a number; empty cells become NULL
+    values = [f"NULLIF(TRIM({name}), '')" if name in NUMERIC_COLUMNS else name for name in columns]
+    seq = "COALESCE(seq, id)" if "seq" in names else "id"
+    conn.execute(f"INSERT INTO {table} (id, seq, {', '.join(columns)}) SELECT id, {seq}, {', '.join(values)} FROM {old}")
+    conn.execute(f"DROP TABLE {old}")
+    if table == "leveling_data":
+        _number_setups(conn, "")
+        rows = conn.execute("SELECT job_id, id, point FROM leveling_data").fetchall()
+        conn.executemany("UPDATE leveling_data SET chainage = ? WHERE job_id = ? AND id = ?",
+                         ((point_chainage(point), job_id, row_id) for job_id, row_id, point in rows))
+
+
+MIGRATIONS = (_typed_columns,)  # MIGRATIONS[v] upgrades a table from schema version v
+
+
+def _migrate(conn, table, schema):
+    """Creates table, or brings it up to SCHEMA_VERSION; run inside the caller's transaction."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version > SCHEMA_VERSION:
+        raise sqlite3.DatabaseError(f"{table} uses schema version {version}, which is newer than this application supports.")
+    if _columns(conn, table):
+        for step in MIGRATIONS[version:SCHEMA_VERSION]:
+            step(conn, table, schema)
+    for statement in schema:
+        conn.execute(statement)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _number_setups(conn, job_id, first_seq=float("-inf"), last_seq=float("inf")):
+    """Sets setup_id, the id of the BS row that opened a reading's setup, on the rows between two seqs.
+
+    Every BS opens a setup, so changing the rows from first_seq to last_seq
+    can only move the rows up to the next BS after them into another setup;
+    only those are numbered, and only the ones whose setup changes are
+    written. Rows before the first BS have no setup.
+    """
+    before = conn.execute("SELECT setup_id FROM leveling_data WHERE job_id = ? AND seq < ? ORDER BY seq DESC LIMIT 1",
+                          (job_id, first_seq)).fetchone()
+    end = conn.execute("SELECT seq FROM leveling_data WHERE job_id = ? AND seq > ? AND bs IS NOT NULL ORDER BY seq LIMIT 1",
+                       (job_id, last_seq)).fetchone()
+    conn.execute("""
+        UPDATE leveling_data SET setup_id = numbered.setup_id
+        FROM (SELECT id, CASE WHEN setup = 0 THEN ? ELSE FIRST_VALUE(id) OVER (PARTITION BY setup ORDER BY seq) END AS setup_id
+              FROM (SELECT id, seq, SUM(bs IS NOT NULL) OVER (ORDER BY seq) AS setup
+                    FROM leveling_data WHERE job_id = ? AND seq >= ? AND seq < ?)) AS numbered
+        WHERE leveling_data.job_id = ? AND leveling_data.id = numbered.id
+          AND leveling_data.setup_id IS NOT numbered.setup_id
+    """, (before[0] if before else None, job_id, first_seq, end[0] if end else float("inf"), job_id))
+
+
+def _read_file(file_path, table, columns, job_id=""):
+    """Reads a database file the user picked through a short-lived read-only connection.
+
+    Unlike the pool's connections this leaves the file as it was: no WAL
+    switch, no -wal/-shm files and no handle held open afterwards.
+    """
+    conn = sqlite3.connect(f"{Path(file_path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        return _select(conn, table, columns, job_id)
+    finally:
+        conn.close()
+
+
+def read_leveling_rows(file_path, job_id=""):
+    """(point, bs, is_val, fs) rows of a leveling database file, in entry order."""
+    return _read_file(file_path, "leveling_data", LEVELING_COLUMNS[:4], job_id)
+
+
+def has_leveling_data(file_path):
+    """Whether file_path is a database with a leveling_data table, read-only like _read_file()."""
+    try:
+        conn = sqlite3.connect(f"{Path(file_path).resolve().as_uri()}?mode=ro", uri=True)
         try:
-            # Leveling database
-            conn = sqlite3.connect(self.db_file)
-            c = conn.cursor()
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS leveling_data (
-                    id INTEGER PRIMARY KEY,
-                    point TEXT,
-                    bs TEXT,
-                    is_val TEXT,
-                    fs TEXT
-                )
-            """)
-            conn.commit()
+            return bool(_columns(conn, "leveling_data"))
+        finally:
             conn.close()
+    except sqlite3.DatabaseError:
+        return False
+
+
+def point_chainage(point):
+    """Chainage a Point label starts with ("1200 CP" is at 1200), as the profile graph reads it, or None."""
+    match = _CHAINAGE.match(str(point)) if point is not None else None
+    return float(match.group(1)) if match else None
+
+
+def cell_text(value, precision=3):
+    """Table text of a stored cell, the reverse of typed_cell().
+
+    Numbers get at least precision decimals, as readings are entered, but
+    are never rounded: 1.5 reads back as 1.500 and 1.2345 as 1.2345.
+    """
+    if value is None:
+        return ""
+    if type(value) is not float:
+        return str(value)
+    text = f"{value:.{precision}f}"
+    return text if float(text) == value else repr(value)
+
+
+def typed_cell(value):
+    """A numeric cell as SQLite stores it in a REAL column: None when empty, a float when it reads as a number, else its text."""
+    if value is None or type(value) is float:
+        return value
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return value
+    # SQLite keeps these as text
+    return number if math.isfinite(number) and "_" not in text else value
+
+
+def _diff_rows(conn, table, columns, rows, job_id):
+    """RowChanges turning the stored rows of a job into rows, compared position by position.
+
+    Stored rows keep their id and seq, so only the positions whose cells
+    differ are written, plus the rows added or dropped at the end.
+    """
+    stored = conn.execute(f"SELECT id, seq, {', '.join(columns)} FROM {table} WHERE job_id = ? ORDER BY seq",
+                          (job_id,)).fetchall()
+    changed = [(record[0], record[1], *row) for record, row in zip(stored, rows) if record[2:] != row]
+    next_id = max((record[0] for record in stored), default=0) + 1
+    next_seq = stored[-1][1] + 1 if stored else 0.0
+    added = [(next_id + i, next_seq + i, *row) for i, row in enumerate(rows[len(stored):])]
+    return RowChanges(changed + added, [record[0] for record in stored[len(rows):]])
+
+
+def _typed_rows(columns, rows):
+    numeric = [i for i, name in enumerate(columns) if name in NUMERIC_COLUMNS]
+    for row in rows:
+        row = list(row)
+        for i in numeric:
+            row[i] = typed_cell(row[i])
+        yield row
+
+
+def _bound_rows(columns, rows):
+    """Rows to bind, with blank numeric text as NULL; SQLite's REAL affinity converts the rest as typed_cell() does."""
+    numeric = [i for i, name in enumerate(columns) if name in NUMERIC_COLUMNS]
+    for row in rows:
+        row = list(row)
+        for i in numeric:
+            if type(row[i]) is str:
+                row[i] = row[i].strip() or None
+        yield row
+
+
+def _with_chainages(names, rows):
+    """Appends the chainage of each row's point label to rows."""
+    point = names.index("point")
+    for row in rows:
+        row.append(point_chainage(row[point]))
+        yield row
+
+
+def _with_setups(names, rows):
+    """Appends setup_id to rows in seq order, for a job written whole."""
+    bs = names.index("bs")
+    setup_id = None
+    for row in rows:
+        if row[bs] is not None:
+            setup_id = row[0]
+        row.append(setup_id)
+        yield row
+
+
+def _changed_seqs(conn, table, changes, job_id):
+    """The lowest and highest seq among the rows changes writes or deletes, or None."""
+    seqs = [row[1] for row in changes.rows]
+    for start in range(0, len(changes.removed), SQL_VARIABLES):
+        ids = changes.removed[start:start + SQL_VARIABLES]
+        seqs.extend(conn.execute(f"SELECT MIN(seq), MAX(seq) FROM {table} WHERE job_id = ? AND id IN ({', '.join('?' * len(ids))})",
+                                 (job_id, *ids)).fetchone())
+    seqs = [seq for seq in seqs if seq is not None]
+    return (min(seqs), max(seqs)) if seqs else None
+
+
+def _write_changes(conn, table, columns, changes, job_id):
+    """Applies RowChanges to the rows of a job; run inside the caller's transaction."""
+    names = ("id", "seq") + columns[:len(changes.rows[0]) - 2] if changes.rows else ()
+    rows = _bound_rows(names, changes.rows)
+    renumber = None
+    if table == "leveling_data":
+        if "point" in names and "chainage" not in names:
+            rows = _with_chainages(names, rows)
+            names += ("chainage",)
+        if changes.replace and "bs" in names:
+            # The whole job is written: number its setups on the way in
+            rows = _with_setups(names, sorted(rows, key=itemgetter(1)))
+            names += ("setup_id",)
+        elif changes.replace:
+            renumber = (float("-inf"), float("inf"))
+        else:
+            renumber = _changed_seqs(conn, table, changes, job_id)
+    if changes.replace:
+        conn.execute(f"DELETE FROM {table} WHERE job_id = ?", (job_id,))
+    elif changes.removed:
+        conn.executemany(f"DELETE FROM {table} WHERE job_id = ? AND id = ?",
+                         ((job_id, row_id) for row_id in changes.removed))
+    if names:
+        insert = (f"INSERT INTO {table} (job_id, {', '.join(names)}) VALUES ({', '.join('?' * (len(names) + 1))})")
+        if not changes.replace:  # Plain inserts into the emptied job skip the conflict check
+            insert += " ON CONFLICT (job_id, id) DO UPDATE SET " + ", ".join(f"{name} = excluded.{name}" for name in names[1:])
+        conn.executemany(insert, ((job_id, *row) for row in rows))
+    if renumber is not None:
+        _number_setups(conn, job_id, *renumber)
+
+
+class ConnectionPool:
+    """Long-lived SQLite connections, one per database file and thread.
+
+    A thread gets the same connection for a file on every call, so its
+    prepared statements stay cached; threads never share a connection, so
+    worker threads can read and write while the GUI thread does too.
+    """
 
-            # Profile database
-            conn = sqlite3.connect(self.profile_db_file)
-            c = conn.cursor()
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS profile_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    point TEXT,
-                    elevation TEXT,
-                    distance TEXT
-                )
-            """)
-            conn.commit()
+    def __init__(self, pragmas=PRAGMAS):
+        self.pragmas = pragmas
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = []  # Every connection, for close()
+
+    def connection(self, file_path):
+        connections = self._local.__dict__.setdefault("connections", {})
+        key = str(Path(file_path).resolve())
+        conn = connections.get(key)
+        if conn is None:
+            # Used by one thread only; check_same_thread=False just lets close() run from another
+            conn = sqlite3.connect(key, check_same_thread=False, cached_statements=STATEMENT_CACHE)
+            for name, value in self.pragmas:
+                try:
+                    conn.execute(f"PRAGMA {name}={value}")
+                except sqlite3.OperationalError as e:
+                    # E.g. WAL on a read-only file; the database still works without it
+                    logging.warning(f"Could not set PRAGMA {name} on {key}: {e}")
+            connections[key] = conn
+            with self._lock:
+                self._open.append(conn)
+        return conn
+
+    def close(self):
+        """Closes every connection of every thread; later calls open new ones."""
+        with self._lock:
+            connections, self._open = self._open, []
+        for conn in connections:
             conn.close()
+        self._local = threading.local()
+
+
+class DatabaseManager:
+    """Leveling and profile databases of one job; job_id tells jobs sharing the files apart."""
+
+    def __init__(self, db_file="leveling_data.db", profile_db_file="profile_data.db", pool=None, job_id=""):
+        self.db_file = Path(db_file)
+        self.profile_db_file = Path(profile_db_file)
+        self.job_id = job_id
+        self._pool = pool if pool is not None else ConnectionPool()
+        self._initialize_databases()
+
+    def _initialize_databases(self):
+        """Initializes both SQLite databases, creating or migrating their tables to SCHEMA_VERSION."""
+        try:
+            # The connections stay open for the saves and loads that follow
+            for file_path, table, schema in ((self.db_file, "leveling_data", LEVELING_SCHEMA),
+                                             (self.profile_db_file, "profile_data", PROFILE_SCHEMA)):
+                with self._pool.connection(file_path) as conn:
+                    conn.execute("BEGIN IMMEDIATE")  # Migrate all or nothing
+                    _migrate(conn, table, schema)
         except Exception as e:
             logging.error(f"Could not initialize databases: {e}")
             raise
 
+    def close(self):
+        """Closes the pooled connections, checkpointing the WAL into the database files."""
+        self._pool.close()
+
+    def _save(self, file_path, table, columns, data):
+        with self._pool.connection(file_path) as conn:
+            # One transaction, taking the write lock before the diff reads the stored rows
+            conn.execute("BEGIN IMMEDIATE")
+            if not isinstance(data, RowChanges):
+                data = _diff_rows(conn, table, columns, [tuple(row) for row in _typed_rows(columns, data)], self.job_id)
+            _write_changes(conn, table, columns, data, self.job_id)
+        return True
+
     def save_leveling_data(self, data):
-        """Saves the current data from the input table to the SQLite database."""
+        """Saves the current data from the input table to the SQLite database.
+
+        data is the RowChanges of the input table since its last save, or a
+        list of table rows or a TraverseData, which is compared with the
+        stored rows so that only the rows that differ are written. A row's
+        chainage is the number its point label starts with, unless the row
+        carries one as a fifth value.
+        """
         try:
-            conn = sqlite3.connect(self.db_file)
-            c = conn.cursor()
-            c.execute("DELETE FROM leveling_data")  # Clear old data
+            if isinstance(data, RowChanges):
+                return self._save(self.db_file, "leveling_data", LEVELING_COLUMNS, data)
+            if isinstance(data, TraverseData):
+                data = [row[:4] for row in data.to_rows()]
             data_to_save = []
             for row_data in data:
-                # Assuming row_data is a list of strings
-                if any(row_data):  # Save only non-empty rows
-                    data_to_save.append(tuple(row_data))
-            c.executemany("INSERT INTO leveling_data (point, bs, is_val, fs) VALUES (?, ?, ?, ?)", data_to_save)
-            conn.commit()
-            conn.close()
-            return True
+                # Assuming row_data is a list of strings or numbers
+                if any(cell not in (None, "") for cell in row_data):  # Save only non-empty rows
+                    row = (tuple(row_data[:5]) + (None,) * 5)[:5]
+                    if row[4] in (None, ""):
+                        row = row[:4] + (point_chainage(row[0]),)
+                    data_to_save.append(row)
+            return self._save(self.db_file, "leveling_data", LEVELING_COLUMNS, data_to_save)
         except Exception as e:
             logging.error(f"Could not save to database: {e}")
             raise
 
     def load_leveling_data(self, file_path=None):
-        """Loads leveling data from the SQLite database."""
+        """Loads leveling data from the SQLite database, or another file_path, as (point, bs, is_val, fs) rows.
+
+        The readings are floats, or None for empty cells, except in files
+        from before the typed schema, whose cells are read as stored.
+        """
         if not file_path:
             file_path = self.db_file if self.db_file.exists() else None
         if not file_path or not Path(file_path).exists():
             return None
         try:
-            conn = sqlite3.connect(file_path)
-            c = conn.cursor()
-            c.execute("SELECT point, bs, is_val, fs FROM leveling_data ORDER BY id")
-            rows = c.fetchall()
-            conn.close()
-            return rows
+            if Path(file_path).resolve() != self.db_file.resolve():
+                return _read_file(file_path, "leveling_data", LEVELING_COLUMNS[:4], self.job_id)
+            return _select(self._pool.connection(file_path), "leveling_data", LEVELING_COLUMNS[:4], self.job_id)
+        except Exception as e:
+            logging.error(f"Could not load from database: {e}")
+            raise
+
+    def load_leveling_between(self, start, end):
+        """(point, bs, is_val, fs, chainage) rows of the stations from chainage start to end, by chainage."""
+        try:
+            return self._pool.connection(self.db_file).execute(
+                "SELECT point, bs, is_val, fs, chainage FROM leveling_data"
+                " WHERE job_id = ? AND chainage BETWEEN ? AND ? ORDER BY chainage", (self.job_id, start, end)).fetchall()
+        except Exception as e:
+            logging.error(f"Could not load from database: {e}")
+            raise
+
+    def load_setup(self, setup_id):
+        """(point, bs, is_val, fs) rows of the readings taken from one instrument setup, in entry order.
+
+        setup_id is the id of the row whose BS opened the setup.
+        """
+        try:
+            return self._pool.connection(self.db_file).execute(
+                "SELECT point, bs, is_val, fs FROM leveling_data WHERE job_id = ? AND setup_id = ? ORDER BY seq",
+                (self.job_id, setup_id)).fetchall()
         except Exception as e:
             logging.error(f"Could not load from database: {e}")
             raise
 
     def save_profile_data(self, data):
-        """Saves the current profile graph data to the SQLite database."""
+        """Saves the current profile graph data to the SQLite database.
+
+        data is a list of profile dicts or a LevelingResult, whose adjusted RLs
+        are saved as the elevations; only the rows that differ from the stored
+        ones are written.
+        """
         try:
-            conn = sqlite3.connect(self.profile_db_file)
-            c = conn.cursor()
-            c.execute("DELETE FROM profile_data")
-            data_to_save = []
-            for row in data:
-                # Assuming row is a dict with 'point', 'elevation', 'distance'
-                if row.get('point') is not None and row.get('elevation') is not None:
-                    data_to_save.append((row.get('point'), row.get('elevation'), row.get('distance')))
-            c.executemany("INSERT INTO profile_data (point, elevation, distance) VALUES (?, ?, ?)", data_to_save)
-            conn.commit()
-            conn.close()
-            return True
+            if isinstance(data, LevelingResult):
+                data_to_save = [(point, elev, None) for point, elev in zip(data.labels, data.adjusted_rl.tolist())]
+            else:
+                data_to_save = []
+                for row in data:
+                    # Assuming row is a dict with 'point', 'elevation', 'distance'
+                    if row.get('point') is not None and row.get('elevation') is not None:
+                        data_to_save.append((row.get('point'), row.get('elevation'), row.get('distance')))
+            return self._save(self.profile_db_file, "profile_data", PROFILE_COLUMNS, data_to_save)
         except Exception as e:
             logging.error(f"Could not save profile data: {e}")
             raise
 
     def load_profile_data(self, file_path=None):
-        """Loads profile data from the SQLite database."""
+        """Loads profile data from the SQLite database, or another file_path, as (point, elevation, distance) rows."""
         if not file_path:
             file_path = self.profile_db_file if self.profile_db_file.exists() else None
         if not file_path or not Path(file_path).exists():
             return None
         try:
-            conn = sqlite3.connect(file_path)
-            c = conn.cursor()
-            c.execute("SELECT point, elevation, distance FROM profile_data ORDER BY id")
-            rows = c.fetchall()
-            conn.close()
-            return rows
+            if Path(file_path).resolve() != self.profile_db_file.resolve():
+                return _read_file(file_path, "profile_data", PROFILE_COLUMNS, self.job_id)
+            return _select(self._pool.connection(file_path), "profile_data", PROFILE_COLUMNS, self.job_id)
+        except Exception as e:
+            logging.error(f"Could not load profile data: {e}")
+            raise
+
+    def load_profile_between(self, start, end):
+        """(point, elevation, distance) rows of the profile from distance start to end, by distance."""
+        try:
+            return self._pool.connection(self.profile_db_file).execute(
+                "SELECT point, elevation, distance FROM profile_data"
+                " WHERE job_id = ? AND distance BETWEEN ? AND ? ORDER BY distance", (self.job_id, start, end)).fetchall()
         except Exception as e:
             logging.error(f"Could not load profile data: {e}")
             raise
+
+
+def _median_ms(run, repeat):
+    timings = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        run(i)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m leveling_app_modular.db",
+                                     description="Benchmark leveling saves, loads and chainage range queries.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 100000], help="Book sizes to time")
+    parser.add_argument("--repeat", type=int, default=5, help="Save rounds; the median is reported")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(Path(tmp) / "leveling.db", Path(tmp) / "profile.db")
+        for n_rows in args.rows:
+            rows = [(i + 1, float(i), f"P{i}", "1.500" if i % 2 == 0 else "", "", "" if i % 2 == 0 else "1.250", 20.0 * i)
+                    for i in range(n_rows)]
+            cells = [row[2:] for row in rows]
+            low, high = 10.0 * n_rows, 10.0 * n_rows + 600.0  # 30 stations mid-book
+            middle = n_rows // 2
+
+            def edited(i):
+                return ("P", f"{i}.000", "", "", 20.0 * middle)
+
+            def filter_loaded(i):  # Loading the book and picking the stations out of it
+                loaded = _select(manager._pool.connection(manager.db_file), "leveling_data", LEVELING_COLUMNS)
+                return [row for row in loaded if row[4] is not None and low <= row[4] <= high]
+
+            def edit_list(i):
+                cells[middle] = edited(i)
+                manager.save_leveling_data(cells)
+
+            def insert_row(i):  # A row inserted mid-book, as the input table tracks it
+                manager.save_leveling_data(RowChanges([(n_rows + i + 1, middle + (i + 1) / (args.repeat + 1), *edited(i))]))
+
+            steps = (("rewrite all rows", lambda i: manager.save_leveling_data(RowChanges(rows, replace=True))),
+                     ("edit, row list diff", edit_list),
+                     ("edit, one dirty row", lambda i: manager.save_leveling_data(RowChanges([rows[middle][:2] + edited(i)]))),
+                     ("insert, one new row", insert_row),
+                     ("load", lambda i: manager.load_leveling_data()),
+                     ("range, load + filter", filter_loaded),
+                     ("range, chainage query", lambda i: manager.load_leveling_between(low, high)))
+            for name, run in steps:
+                print(f"{n_rows:>8} rows  {name:<20} {_median_ms(run, args.repeat):9.2f} ms", flush=True)
+        manager.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Cut/fill and earthwork volume analysis of a ground profile against a design line."""
+import numpy as np
+
+CUT_FILL_HEADERS = ["Chainage", "Ground", "Design", "Cut", "Fill", "Cumulative Cut", "Cumulative Fill", "Net"]
+VOLUME_HEADERS = ["Chainage", "Cut Area", "Fill Area", "Cut Volume", "Fill Volume", "Mass Ordinate"]
+VOLUME_METHODS = ("Prismoidal", "Average End Area")
+
+
+def cut_fill_segments(x, ground, design):
+    """Cut and fill area of every segment between consecutive stations, in one pass.
+
+    A segment whose ground line crosses the design line is split at the
+    crossing, so each part counts towards cut or fill on its own.
+    Returns (cut, fill, crossings): two arrays of len(x) - 1 areas and the
+    chainages where the ground crosses the design line.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    h = np.asarray(ground, dtype=np.float64) - np.asarray(design, dtype=np.float64)
+    h0, h1 = h[:-1], h[1:]
+    dx = np.diff(x)
+    width = np.abs(dx)
+    same_side = h0 * h1 >= 0
+    # Fraction of the segment before the crossing; h0 - h1 is non-zero wherever the sign changes
+    t = np.divide(h0, h0 - h1, out=np.ones_like(h0), where=~same_side)
+    trapezoid = 0.5 * (h0 + h1) * width
+    before = 0.5 * h0 * t * width
+    after = 0.5 * h1 * (1.0 - t) * width
+    cut = np.where(same_side, np.maximum(trapezoid, 0.0), np.maximum(before, 0.0) + np.maximum(after, 0.0))
+    fill = np.where(same_side, np.maximum(-trapezoid, 0.0), np.maximum(-before, 0.0) + np.maximum(-after, 0.0))
+    crossings = (x[:-1] + t * dx)[~same_side]
+    return cut, fill, crossings
+
+
+class CutFillProfile:
+    """Per-segment and cumulative cut/fill areas along a profile.
+
+    cut/fill hold one area per segment; cumulative_cut/cumulative_fill hold
+    one running total per station, starting at 0, for plotting against x.
+    """
+
+    def __init__(self, x, ground, design):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.ground = np.asarray(ground, dtype=np.float64)
+        self.design = np.asarray(design, dtype=np.float64)
+        if not (len(self.x) == len(self.ground) == len(self.design)) or len(self.x) < 2:
+            raise ValueError("Cut/fill needs at least 2 stations with one ground and one design level each.")
+        self.cut, self.fill, self.crossings = cut_fill_segments(self.x, self.ground, self.design)
+        self.cumulative_cut = np.concatenate(([0.0], np.cumsum(self.cut)))
+        self.cumulative_fill = np.concatenate(([0.0], np.cumsum(self.fill)))
+
+    def __len__(self):
+        return len(self.x)
+
+    def __repr__(self):
+        return f"CutFillProfile({len(self)} stations, cut={self.cut_area:.3f}, fill={self.fill_area:.3f})"
+
+    @property
+    def cut_area(self):
+        return float(self.cumulative_cut[-1])
+
+    @property
+    def fill_area(self):
+        return float(self.cumulative_fill[-1])
+
+    @property
+    def net(self):
+        """Running cut minus fill per station; plotted against x this is the mass curve of the areas."""
+        return self.cumulative_cut - self.cumulative_fill
+
+    def rows(self, precision=3):
+        """Rows under CUT_FILL_HEADERS; the segment areas are listed at the station that ends them."""
+        cut = np.concatenate(([0.0], self.cut))
+        fill = np.concatenate(([0.0], self.fill))
+        columns = (self.x, self.ground, self.design, cut, fill, self.cumulative_cut, self.cumulative_fill, self.net)
+        return [[f"{v:.{precision}f}" for v in row] for row in zip(*(c.tolist() for c in columns))]
+
+
+class SectionTemplate:
+    """Trapezoidal cross-section: formation width and side slopes (horizontal per unit vertical).
+
+    width may be one value or one value per station.
+    """
+
+    def __init__(self, width, cut_slope=1.0, fill_slope=1.5):
+        self.width = width
+        self.cut_slope = float(cut_slope)
+        self.fill_slope = float(fill_slope)
+
+    def __repr__(self):
+        return f"SectionTemplate(width={self.width!r}, cut_slope={self.cut_slope}, fill_slope={self.fill_slope})"
+
+    def widths(self, n):
+        widths = np.broadcast_to(np.asarray(self.width, dtype=np.float64), (n,))
+        if np.any(widths < 0):
+            raise ValueError("Section widths cannot be negative.")
+        return widths
+
+
+def section_area(depth, width, side_slope):
+    """End area of a trapezoidal section of the given depth; zero where depth <= 0."""
+    depth = np.maximum(depth, 0.0)
+    return depth * (width + side_slope * depth)
+
+
+def _segment_volumes(x, h, widths, side_slope, method):
+    """Volume between consecutive stations where h > 0, the segments cut short at h = 0."""
+    h0, h1 = h[:-1], h[1:]
+    crossing = h0 * h1 < 0
+    t = np.divide(h0, h0 - h1, out=np.zeros_like(h0), where=crossing)
+    # Part of each segment with h >= 0, as fractions [a0, a1] of its length
+    a0 = np.where(crossing & (h0 < 0), t, 0.0)
+    a1 = np.where(crossing & (h1 < 0), t, 1.0)
+    dh = h1 - h0
+    w0, dw = widths[:-1], np.diff(widths)
+    start = section_area(h0 + a0 * dh, w0 + a0 * dw, side_slope)
+    end = section_area(h0 + a1 * dh, w0 + a1 * dw, side_slope)
+    length = (a1 - a0) * np.abs(np.diff(x))
+    if method == "Average End Area":
+        return 0.5 * (start + end) * length
+    # Depth and width vary linearly along the part, so the end area is quadratic and Simpson's rule is exact
+    middle = section_area(h0 + 0.5 * (a0 + a1) * dh, w0 + 0.5 * (a0 + a1) * dw, side_slope)
+    return (start + 4.0 * middle + end) * length / 6.0
+
+
+class EarthworkVolumes:
+    """Cut/fill end areas, segment volumes and the mass-haul ordinate along a profile.
+
+    cut_volume/fill_volume hold one volume per segment; mass holds the
+    cumulative ordinate per station (cut times bulking_factor minus fill),
+    starting at 0.
+    """
+
+    def __init__(self, x, ground, design, template, method="Prismoidal", bulking_factor=1.0):
+        if method not in VOLUME_METHODS:
+            raise ValueError(f"Unknown volume method: {method}")
+        self.x = np.asarray(x, dtype=np.float64)
+        ground = np.asarray(ground, dtype=np.float64)
+        design = np.asarray(design, dtype=np.float64)
+        n = len(self.x)
+        if not (n == len(ground) == len(design)) or n < 2:
+            raise ValueError("Earthwork volumes need at least 2 stations with one ground and one design level each.")
+        self.template = template
+        self.method = method
+        self.bulking_factor = float(bulking_factor)
+        widths = template.widths(n)
+        h = ground - design
+        self.cut_area = section_area(h, widths, template.cut_slope)
+        self.fill_area = section_area(-h, widths, template.fill_slope)
+        self.cut_volume = _segment_volumes(self.x, h, widths, template.cut_slope, method)
+        self.fill_volume = _segment_volumes(self.x, -h, widths, template.fill_slope, method)
+        self.mass = np.concatenate(([0.0], np.cumsum(self.cut_volume * self.bulking_factor - self.fill_volume)))
+
+    def __len__(self):
+        return len(self.x)
+
+    def __repr__(self):
+        return (f"EarthworkVolumes({len(self)} stations, {self.method}, "
+                f"cut={self.total_cut:.3f}, fill={self.total_fill:.3f})")
+
+    @property
+    def total_cut(self):
+        return float(self.cut_volume.sum())
+
+    @property
+    def total_fill(self):
+        return float(self.fill_volume.sum())
+
+    def rows(self, precision=3):
+        """Rows under VOLUME_HEADERS; the segment volumes are listed at the station that ends them."""
+        cut = np.concatenate(([0.0], self.cut_volume))
+        fill = np.concatenate(([0.0], self.fill_volume))
+        columns = (self.x, self.cut_area, self.fill_area, cut, fill, self.mass)
+        return [[f"{v:.{precision}f}" for v in row] for row in zip(*(c.tolist() for c in columns))]
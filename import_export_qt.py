@@ -1,18 +1,20 @@
-from PyQt6.QtWidgets import QFileDialog, QMessageBox, QDialog, QProgressBar, QVBoxLayout, QRadioButton, QButtonGroup, QLabel, QPushButton, QWidget, QTableWidgetItem, QLineEdit, QTextEdit, QHBoxLayout, QFileDialog as QtFileDialog, QDialogButtonBox, QCheckBox, QComboBox, QGroupBox, QFormLayout
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QFileDialog, QMessageBox, QDialog, QProgressBar, QVBoxLayout, QRadioButton, QButtonGroup, QLabel, QPushButton, QWidget, QTableWidgetItem, QLineEdit, QTextEdit, QHBoxLayout, QFileDialog as QtFileDialog, QDialogButtonBox, QCheckBox, QComboBox, QGroupBox, QFormLayout, QProgressDialog
+from PyQt6.QtCore import Qt, QThread, QObject, pyqtSignal
 from PyQt6.QtGui import QCloseEvent
 from pathlib import Path
 import csv
 import openpyxl
 from .utils_qt import ImportDialog
 from .lang import LANG
+from .traverse import LevelingResult
+from .render_service import GraphSnapshot, graph_image, render_service
+from .pdf_report import ReportBuilder, ReportCancelled, ReportData
+from .csv_import import CsvChunkReader, ImportCancelled, MAX_PENDING_CHUNKS, column_sources
 import datetime
 import tempfile
-from fpdf import FPDF
 from PyQt6.QtGui import QPixmap
 import qrcode
 from PyQt6.QtGui import QImage
-import PyPDF2
 import subprocess
 import sys
 import logging
@@ -33,18 +35,69 @@ if not logger.handlers:
     logger.addHandler(handler)
 
 
-# --- Fix PyPDF2 import for linter and runtime robustness ---
-try:
-    import PyPDF2  # type: ignore[import]
-except ImportError:
-    PyPDF2 = None
-    print("PyPDF2 is not installed. PDF password and metadata features will be disabled.")
+class ReportWorker(QObject):
+    progress = pyqtSignal(int, str)  # percent, stage
+    result = pyqtSignal(str)  # written file
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, builder, file_path):
+        super().__init__()
+        self.builder = builder
+        self.file_path = file_path
+        builder._progress = self.progress.emit
+
+    def cancel(self):
+        # Called from the GUI thread; the builder stops at its next stage or row chunk
+        self.builder.cancel()
+
+    def run(self):
+        try:
+            self.result.emit(self.builder.write(self.file_path))
+        except ReportCancelled:
+            logger.info("PDF report generation cancelled.")
+        except Exception as e:
+            logger.error(f"Failed to generate PDF report: {e}", exc_info=True)
+            self.error.emit(str(e))
+        finally:
+            self.finished.emit()
+
+class CsvImportWorker(QObject):
+    chunk = pyqtSignal(object)  # One list of cell strings per table column
+    progress = pyqtSignal(int)  # Percent of the file read
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, reader):
+        super().__init__()
+        self.reader = reader
+
+    def cancel(self):
+        # Called from the GUI thread; the reader stops before its next chunk
+        self.reader.cancel()
+
+    def run(self):
+        try:
+            for columns in self.reader:
+                self.chunk.emit(columns)
+                self.progress.emit(self.reader.percent)
+        except ImportCancelled:
+            logger.info(f"CSV import cancelled after {self.reader.rows_read} rows.")
+        except Exception as e:
+            logger.error(f"Failed to import CSV: {e}", exc_info=True)
+            self.error.emit(str(e))
+        finally:
+            self.finished.emit()
 
 class ImportExportManager:
     def __init__(self, master, settings, save_settings_callback):
         self.master = master
         self.settings = settings
         self.save_settings_callback = save_settings_callback
+        self._report_job_id = 0
+        self._report_jobs = {}  # job id -> (QThread, ReportWorker) still running
+        self._import_job_id = 0
+        self._import_jobs = {}  # job id -> (table, QThread, CsvImportWorker) still running
 
     def import_leveling_csv(self, table_widget, column_names, redraw_callback, progress_bar, file_path=None):
         if not file_path:
@@ -57,23 +110,8 @@ class ImportExportManager:
             return
         if dialog.import_result is None:
             return
-        def handler(all_rows, mapping):
-            try:
-                table_widget.blockSignals(True)
-                table_widget.setRowCount(0)
-                for row_idx, row_data in enumerate(all_rows):
-                    table_widget.insertRow(row_idx)
-                    for col_name, col_idx in mapping.items():
-                        if col_idx is not None and col_idx < len(row_data):
-                            target_idx = column_names.index(col_name)
-                            table_widget.setItem(row_idx, target_idx, QTableWidgetItem(row_data[col_idx]))
-                if redraw_callback:
-                    redraw_callback()
-            except Exception as e:
-                QMessageBox.critical(self.master, "Import Error", f"Failed to import CSV data:\n{e}")
-            finally:
-                table_widget.blockSignals(False)
-        self._perform_csv_import(file_path, dialog.import_result["mapping"], dialog.import_result["has_header"], handler, progress_bar)
+        self._perform_csv_import(file_path, dialog.import_result["mapping"], dialog.import_result["has_header"],
+                                 table_widget, column_names, redraw_callback, progress_bar)
 
     def import_profile_csv(self, table_widget, column_names, redraw_callback, progress_bar, file_path=None):
         if not file_path:
@@ -86,23 +124,8 @@ class ImportExportManager:
             return
         if dialog.import_result is None:
             return
-        def handler(all_rows, mapping):
-            try:
-                table_widget.blockSignals(True)
-                table_widget.setRowCount(0)
-                for row_idx, row_data in enumerate(all_rows):
-                    table_widget.insertRow(row_idx)
-                    for col_name, col_idx in mapping.items():
-                        if col_idx is not None and col_idx < len(row_data):
-                            target_idx = column_names.index(col_name)
-                            table_widget.setItem(row_idx, target_idx, QTableWidgetItem(row_data[col_idx]))
-                if redraw_callback:
-                    redraw_callback()
-            except Exception as e:
-                QMessageBox.critical(self.master, "Import Error", f"Failed to import CSV data:\n{e}")
-            finally:
-                table_widget.blockSignals(False)
-        self._perform_csv_import(file_path, dialog.import_result["mapping"], dialog.import_result["has_header"], handler, progress_bar)
+        self._perform_csv_import(file_path, dialog.import_result["mapping"], dialog.import_result["has_header"],
+                                 table_widget, column_names, redraw_callback, progress_bar)
 
     def export_leveling_csv(self, result_table, progress_bar):
         file_path, _ = QFileDialog.getSaveFileName(self.master, "Export Leveling Results", "", "CSV Files (*.csv)")
@@ -114,10 +137,9 @@ class ImportExportManager:
         try:
             with open(file_path, 'w', newline='') as f:
                 writer = csv.writer(f)
-                headers = [result_table.horizontalHeaderItem(i).text() for i in range(result_table.columnCount())]
+                headers, rows = self._table_contents(result_table)
                 writer.writerow(headers)
-                for row in range(result_table.rowCount()):
-                    writer.writerow([result_table.item(row, col).text() if result_table.item(row, col) else '' for col in range(result_table.columnCount())])
+                writer.writerows(rows)
             self._update_recent_files(file_path)
             QMessageBox.information(self.master, LANG["export_success"], LANG["exported_csv"])
         except Exception as e:
@@ -153,10 +175,10 @@ class ImportExportManager:
                 wb = openpyxl.Workbook()
                 ws = wb.active
                 if ws is not None:
-                    headers = [table.horizontalHeaderItem(i).text() for i in range(table.columnCount())]
+                    headers, rows = self._table_contents(table)
                     ws.append(headers)
-                    for row in range(table.rowCount()):
-                        ws.append([table.item(row, col).text() if table.item(row, col) else '' for col in range(table.columnCount())])
+                    for row in rows:
+                        ws.append(row)
                     wb.save(file_path)
                     self._update_recent_files(file_path)
                     QMessageBox.information(self.master, LANG["export_success"], f"{LANG['exported_excel']}\n{file_path}")
@@ -173,7 +195,12 @@ class ImportExportManager:
         if not file_path:
             return
         try:
-            fig.savefig(file_path)
+            if isinstance(fig, GraphSnapshot):
+                fmt = "pdf" if file_path.lower().endswith(".pdf") else "png"
+                with open(file_path, 'wb') as f:
+                    f.write(render_service.render(fig, fmt))
+            else:
+                fig.savefig(file_path)
             QMessageBox.information(self.master, LANG["export_success"], f"{LANG['exported_graph']}\n{file_path}")
         except Exception as e:
             QMessageBox.critical(self.master, LANG["export_error"], f"{LANG['failed_export_graph']}\n{e}")
@@ -207,55 +234,53 @@ class ImportExportManager:
             if not options:
                 QMessageBox.warning(self.master, "Export Cancelled", "No options selected for professional export.")
                 return
+            # One snapshot for the preview and the final file
+            data = self._report_data(result_table, fig)
             if options.get('preview'):
-                import tempfile, os
                 with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp_pdf:
                     tmp_path = tmp_pdf.name
-                self.generate_pdf_report(result_table, fig, professional=True, file_path=tmp_path, **options)
-                # Try to open the PDF with the system viewer
-                preview_opened = False
-                try:
-                    if sys.platform.startswith('win'):
-                        os.startfile(tmp_path)
-                        preview_opened = True
-                    elif sys.platform.startswith('darwin'):
-                        subprocess.run(['open', tmp_path])
-                        preview_opened = True
-                    else:
-                        subprocess.run(['xdg-open', tmp_path])
-                        preview_opened = True
-                except Exception:
-                    QMessageBox.warning(self.master, "Preview Error", "Could not open PDF preview.")
-                if preview_opened:
-                    QMessageBox.information(self.master, "Preview Opened", f"Preview PDF opened at: {tmp_path}")
-                # Ask user to confirm export and pick location
-                reply = QMessageBox.question(self.master, "Export PDF", "Are you satisfied with the preview? Save the final PDF?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-                if reply == QMessageBox.StandardButton.Yes:
-                    file_path, _ = QFileDialog.getSaveFileName(self.master, "Save PDF Report", "", "PDF Documents (*.pdf)")
-                    if file_path:
-                        self.generate_pdf_report(result_table, fig, professional=True, file_path=file_path, **options)
-                        QMessageBox.information(self.master, "PDF Saved", f"PDF report saved at: {file_path}")
-                    else:
-                        QMessageBox.information(self.master, "Export Cancelled", "No file selected. PDF not saved.")
-                # Clean up temp file
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
+                self.generate_pdf_report(data, None, professional=True, file_path=tmp_path,
+                                         on_saved=lambda path: self._review_pdf_preview(path, data, options), **options)
             else:
-                file_path, _ = QFileDialog.getSaveFileName(self.master, "Save PDF Report", "", "PDF Documents (*.pdf)")
-                if file_path:
-                    self.generate_pdf_report(result_table, fig, professional=True, file_path=file_path, **options)
-                    QMessageBox.information(self.master, "PDF Saved", f"PDF report saved at: {file_path}")
-                else:
-                    QMessageBox.information(self.master, "Export Cancelled", "No file selected. PDF not saved.")
+                self._save_pdf_report(data, professional=True, **options)
         else:
-            file_path, _ = QFileDialog.getSaveFileName(self.master, "Save PDF Report", "", "PDF Documents (*.pdf)")
-            if file_path:
-                self.generate_pdf_report(result_table, fig, file_path=file_path)
-                QMessageBox.information(self.master, "PDF Saved", f"PDF report saved at: {file_path}")
+            self._save_pdf_report(self._report_data(result_table, fig))
+
+    def _save_pdf_report(self, data, professional=False, **options):
+        file_path, _ = QFileDialog.getSaveFileName(self.master, "Save PDF Report", "", "PDF Documents (*.pdf)")
+        if file_path:
+            self.generate_pdf_report(data, None, professional=professional, file_path=file_path,
+                                     on_saved=lambda path: QMessageBox.information(self.master, "PDF Saved", f"PDF report saved at: {path}"),
+                                     **options)
+        else:
+            QMessageBox.information(self.master, "Export Cancelled", "No file selected. PDF not saved.")
+
+    def _review_pdf_preview(self, tmp_path, data, options):
+        # Try to open the PDF with the system viewer
+        preview_opened = False
+        try:
+            if sys.platform.startswith('win'):
+                os.startfile(tmp_path)
+                preview_opened = True
+            elif sys.platform.startswith('darwin'):
+                subprocess.run(['open', tmp_path])
+                preview_opened = True
             else:
-                QMessageBox.information(self.master, "Export Cancelled", "No file selected. PDF not saved.")
+                subprocess.run(['xdg-open', tmp_path])
+                preview_opened = True
+        except Exception:
+            QMessageBox.warning(self.master, "Preview Error", "Could not open PDF preview.")
+        if preview_opened:
+            QMessageBox.information(self.master, "Preview Opened", f"Preview PDF opened at: {tmp_path}")
+        # Ask user to confirm export and pick location
+        reply = QMessageBox.question(self.master, "Export PDF", "Are you satisfied with the preview? Save the final PDF?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            self._save_pdf_report(data, professional=True, **options)
+        # Clean up temp file
+        try:
+            os.remove(tmp_path)
+        except Exception:
+            pass
 
     def professional_pdf_export_dialog(self, result_table, fig):
         from PyQt6.QtWidgets import QScrollArea
@@ -408,181 +433,25 @@ class ImportExportManager:
             return None
         return result
 
-    def _add_pdf_cover_page(self, pdf, **kwargs):
-        pdf.cover_page()
-
-    def _add_pdf_toc(self, pdf, font, sections):
-        if sections.get('toc', True):
-            pdf.add_page()
-            toc_page = pdf.page_no()
-            pdf.set_font(font, "B", 16)
-            pdf.cell(0, 15, "Table of Contents", new_x="LMARGIN", new_y="NEXT")
-            pdf.ln(5)
-            return toc_page
-        return None
-
-    def _add_pdf_summary(self, pdf, font, summary, section_pages):
-        pdf.add_page()
-        section_pages['Executive Summary'] = pdf.page_no()
-        if hasattr(pdf, 'bookmark'):
-            pdf.bookmark('Executive Summary', level=0)
-        pdf.set_font(font, "B", 14)
-        pdf.cell(0, 10, "Executive Summary", new_x="LMARGIN", new_y="NEXT")
-        pdf.set_font(font, "", 12)
-        pdf.multi_cell(0, 8, summary or "No summary provided.")
-        pdf.ln(5)
-
-    def _add_pdf_results_table(self, pdf, font, result_table, color_scheme, section_pages):
-        pdf.add_page()
-        section_pages['Calculation Results'] = pdf.page_no()
-        if hasattr(pdf, 'bookmark'):
-            pdf.bookmark('Calculation Results', level=0)
-        pdf.set_font(font, "B", 14)
-        pdf.cell(0, 10, "Calculation Results", new_x="LMARGIN", new_y="NEXT")
-        pdf.ln(2)
-        pdf.set_font(font, "B", 10)
-        col_count = result_table.columnCount()
-        col_widths = [max(20, int(190 / col_count))] * col_count
-        headers = [result_table.horizontalHeaderItem(i).text() if result_table.horizontalHeaderItem(i) else "" for i in range(col_count)]
-        for i, header_text in enumerate(headers):
-            pdf.cell(col_widths[i], 7, header_text, 1, new_x="RIGHT", new_y="TOP", align="C")
-        pdf.ln()
-        pdf.set_font(font, "", 10)
-        for row in range(result_table.rowCount()):
-            if row % 2 == 0:
-                pdf.set_fill_color(245, 245, 245) if color_scheme == "Default" else pdf.set_fill_color(40, 40, 40)
-            else:
-                pdf.set_fill_color(255, 255, 255)
-            for i in range(col_count):
-                item = result_table.item(row, i)
-                value = item.text() if item else ""
-                pdf.cell(col_widths[i], 6, str(value), 1, new_x="RIGHT", new_y="TOP", align="C", fill=True)
-            pdf.ln()
-        pdf.ln(10)
-
-    def _add_pdf_graph(self, pdf, font, fig, section_pages):
-        pdf.add_page()
-        section_pages['Profile Graph'] = pdf.page_no()
-        if hasattr(pdf, 'bookmark'):
-            pdf.bookmark('Profile Graph', level=0)
-        pdf.set_font(font, "B", 14)
-        pdf.cell(0, 10, "Profile Graph", new_x="LMARGIN", new_y="NEXT")
-        pdf.set_font(font, "", 11)
-        pdf.cell(0, 8, "Elevation profile generated from survey data.", new_x="LMARGIN", new_y="NEXT")
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_img:
-            graph_image_path = tmp_img.name
-            fig.savefig(graph_image_path, dpi=300)
-        try:
-            pdf.image(graph_image_path, x=10, y=pdf.get_y(), w=190)
-        finally:
-            if os.path.exists(graph_image_path):
-                try:
-                    os.remove(graph_image_path)
-                except Exception as e:
-                    logger.error(f"Failed to remove temporary graph image: {e}")
-
-    def _add_pdf_calc_details(self, pdf, font, sections, section_pages):
-        if sections.get('calc_details'):
-            pdf.add_page()
-            section_pages['Calculation Details'] = pdf.page_no()
-            if hasattr(pdf, 'bookmark'):
-                pdf.bookmark('Calculation Details', level=0)
-            pdf.set_font(font, "B", 14)
-            pdf.cell(0, 10, "Calculation Details", new_x="LMARGIN", new_y="NEXT")
-            pdf.set_font(font, "", 10)
-            calc_method = self.master.calculation_method.get()
-            pdf.multi_cell(0, 8, f"Calculation method used: {calc_method}")
-            pdf.ln(5)
-            if calc_method == "HI":
-                pdf.set_font(font, 'B', 12)
-                pdf.cell(0, 10, "Height of Instrument (HI) Method Walkthrough", new_x="LMARGIN", new_y="NEXT")
-                pdf.set_font(font, '', 10)
-                pdf.multi_cell(0, 5, "1. The first RL is the starting benchmark.\n"
-                                     "2. The Height of Instrument (HI) is calculated by adding the Backsight (BS) to the known RL.\n"
-                                     "3. The RL of subsequent points is found by subtracting the Foresight (FS) or Intersight (IS) from the HI.\n"
-                                     "4. At a change point, a new HI is calculated from the new BS reading.")
-            elif calc_method == "RF":
-                pdf.set_font(font, 'B', 12)
-                pdf.cell(0, 10, "Rise and Fall (RF) Method Walkthrough", new_x="LMARGIN", new_y="NEXT")
-                pdf.set_font(font, '', 10)
-                pdf.multi_cell(0, 5, "1. The difference between consecutive staff readings determines the Rise or Fall.\n"
-                                     "2. If the previous reading is greater than the current, it's a Rise.\n")
-            pdf.ln(5)
-
-    def _add_pdf_checks(self, pdf, font, sections, section_pages):
-        pdf.add_page()
-        section_pages['Checks'] = pdf.page_no()
-        if hasattr(pdf, 'bookmark'):
-            pdf.bookmark('Checks', level=0)
-        pdf.set_font(font, "B", 14)
-        pdf.cell(0, 10, "Arithmetic Checks", new_x="LMARGIN", new_y="NEXT")
-        pdf.set_font(font, "", 10)
-        stats = self.master.calculator.stats
-        if stats:
-            check_ok = "OK" if not stats['arith_failed'] else "FAIL"
-            pdf.multi_cell(0, 8, "The arithmetic check ensures the integrity of the leveling calculations. It is performed as follows:")
-            pdf.ln(2)
-            if self.master.calculation_method.get() == "HI":
-                pdf.multi_cell(0, 8, f"Sum of Backsights (BS): {stats['sum_bs']:.{self.settings['precision']}f}")
-                pdf.multi_cell(0, 8, f"Sum of Foresights (FS): {stats['sum_fs']:.{self.settings['precision']}f}")
-                pdf.multi_cell(0, 8, f"Sum(BS) - Sum(FS): {stats['arith_check']:.{self.settings['precision']}f}")
-            else:
-                pdf.multi_cell(0, 8, f"Sum of Rises: {stats['sum_rise']:.{self.settings['precision']}f}")
-                pdf.multi_cell(0, 8, f"Sum of Falls: {stats['sum_fall']:.{self.settings['precision']}f}")
-                pdf.multi_cell(0, 8, f"Sum(Rise) - Sum(Fall): {stats['arith_check']:.{self.settings['precision']}f}")
-            pdf.multi_cell(0, 8, f"Last RL - First RL: {stats['rl_diff']:.{self.settings['precision']}f}")
-            pdf.ln(2)
-            pdf.set_font(font, 'B', 12)
-            # Set color based on check result
-            if check_ok == "OK":
-                pdf.set_text_color(0, 150, 0)  # Green
-            else:
-                pdf.set_text_color(255, 0, 0)   # Red
-            pdf.multi_cell(0, 8, f"Check Result: {check_ok}")
-            pdf.set_text_color(0, 0, 0)  # Reset to black
-        else:
-            pdf.multi_cell(0, 8, "No calculation statistics available to perform checks.")
-        pdf.ln(5)
-
-    def _fill_pdf_toc(self, pdf, font, toc_page, section_pages):
-        if toc_page:
-            current_page = pdf.page_no()
-            pdf.page = toc_page
-            pdf.set_y(pdf.get_y() + 10)
-            pdf.set_font(font, "", 12)
-            for section, page in section_pages.items():
-                pdf.cell(0, 8, f"{section} ............................................. {page}", new_x="LMARGIN", new_y="NEXT", link=pdf.add_link())
-            pdf.page = current_page
-
-    def _apply_pdf_security(self, file_path, password, metadata, surveyor, project_name, summary):
-        if not password and not metadata:
-            return
-        if PyPDF2 is None:
-            QMessageBox.warning(self.master, "PDF Features Unavailable", "PyPDF2 is not installed. Password and metadata features are disabled.")
-            return
-        try:
-            reader = PyPDF2.PdfReader(file_path)
-            writer = PyPDF2.PdfWriter()
-            for page in reader.pages:
-                writer.add_page(page)
-            if password:
-                writer.encrypt(password)
-                logger.info("PDF encrypted with a password.")
-            if metadata:
-                writer.add_metadata({
-                    '/Author': surveyor or '',
-                    '/Title': project_name or 'Leveling Survey Report',
-                    '/Subject': summary or '',
-                    '/Keywords': metadata
-                })
-                logger.info("Custom metadata added to PDF.")
-            with open(file_path, 'wb') as out_f:
-                writer.write(out_f)
-        except Exception as e:
-            logger.error(f"Failed to apply PDF security/metadata: {e}")
-            QMessageBox.warning(self.master, "PDF Post-processing Error", f"Failed to apply security/metadata: {e}")
+    def _report_data(self, result_table, fig):
+        """Copies the rows, stats and graph a report needs, so the report can be built off the GUI thread."""
+        if isinstance(result_table, ReportData):
+            return result_table
+        # A GraphSnapshot renders in the worker; a live Figure is encoded here, on the GUI thread
+        graph = fig if fig is None or isinstance(fig, GraphSnapshot) else graph_image(fig).getvalue()
+        if isinstance(result_table, LevelingResult):
+            return ReportData.from_result(result_table, graph)
+        headers, rows = self._table_contents(result_table)
+        return ReportData(headers, list(rows), graph, precision=self.settings.get('precision', 3))
+
+    def generate_pdf_report(self, result_table, fig, professional=False, file_path=None, on_saved=None, **kwargs):
+        """Writes the report in a background thread, with a progress dialog that can cancel it.
 
-    def generate_pdf_report(self, result_table, fig, professional=False, file_path=None, **kwargs):
+        result_table may be a LevelingResult, a ReportData or the results
+        QTableWidget; fig a GraphSnapshot or a Figure. on_saved(file_path) is
+        called on the GUI thread once the file is written, instead of the
+        success message.
+        """
         logger.info("Starting PDF report generation.")
         logger.debug(f"kwargs: {kwargs}")
 
@@ -592,77 +461,152 @@ class ImportExportManager:
                 logger.warning("PDF generation cancelled by user.")
                 return
         try:
-            font = kwargs.get('font', 'Helvetica')
-            if professional:
-                pdf = self._create_professional_pdf(result_table, fig, **kwargs)
-            else:
-                pdf = self._create_simple_pdf(result_table, fig, **kwargs)
-            
-            pdf.output(file_path)
-            self._apply_pdf_security(file_path, kwargs.get('password'), kwargs.get('metadata'), kwargs.get('surveyor'), kwargs.get('project_name'), kwargs.get('summary'))
-            
-            QMessageBox.information(self.master, LANG["export_success"], f"{LANG['pdf_report_success']}\n{file_path}")
-            logger.info(f"Successfully generated PDF report at: {file_path}")
-
+            data = self._report_data(result_table, fig)
         except Exception as e:
             logger.error(f"Failed to generate PDF report: {e}", exc_info=True)
             QMessageBox.critical(self.master, LANG["pdf_generation_error"], f"{LANG['failed_pdf_report']}\n{e}")
+            return
+        self._report_job_id += 1
+        job_id = self._report_job_id
+        thread = QThread(self.master)
+        worker = ReportWorker(ReportBuilder(data, professional, **kwargs), file_path)
+        worker.moveToThread(thread)
+        dialog = QProgressDialog("Generating PDF report...", "Cancel", 0, 100, self.master)
+        dialog.setWindowTitle("PDF Report")
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.canceled.connect(worker.cancel)
+        thread.started.connect(worker.run)
+        worker.progress.connect(lambda percent, stage: (dialog.setValue(percent), dialog.setLabelText(f"{stage}...")))
+        worker.result.connect(lambda path: self._on_report_saved(path, on_saved))
+        worker.error.connect(self._on_report_error)
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(dialog.close)
+        thread.finished.connect(lambda: self._report_jobs.pop(job_id, None))
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        self._report_jobs[job_id] = (thread, worker)
+        thread.start()
+
+    def _on_report_saved(self, file_path, on_saved):
+        logger.info(f"Successfully generated PDF report at: {file_path}")
+        if on_saved:
+            on_saved(file_path)
+        else:
+            QMessageBox.information(self.master, LANG["export_success"], f"{LANG['pdf_report_success']}\n{file_path}")
+
+    def _on_report_error(self, message):
+        QMessageBox.critical(self.master, LANG["pdf_generation_error"], f"{LANG['failed_pdf_report']}\n{message}")
+
+    def stop_reports(self):
+        """Cancels running reports and waits for their threads to exit."""
+        for thread, worker in list(self._report_jobs.values()):
+            worker.cancel()
+            thread.quit()
+            thread.wait()
+
 
-    def _create_professional_pdf(self, result_table, fig, **kwargs):
-        font = kwargs.get('font', 'Helvetica')
-        color_scheme = kwargs.get('color_scheme', 'Default')
-        summary = kwargs.get('summary', '')
-        sections = kwargs.get('sections', {})
-        
-        pdf = PDF(project_name=kwargs.get('project_name'), surveyor=kwargs.get('surveyor'), date=kwargs.get('date'), logo_path=kwargs.get('logo_path'))
-        pdf.set_auto_page_break(auto=True, margin=15)
-        section_pages = {}
-
-        self._add_pdf_cover_page(pdf, **kwargs)
-        toc_page = self._add_pdf_toc(pdf, font, sections)
-        self._add_pdf_summary(pdf, font, summary, section_pages)
-        self._add_pdf_results_table(pdf, font, result_table, color_scheme, section_pages)
-        self._add_pdf_graph(pdf, font, fig, section_pages)
-        self._add_pdf_calc_details(pdf, font, sections, section_pages)
-        self._add_pdf_checks(pdf, font, sections, section_pages)
-        self._fill_pdf_toc(pdf, font, toc_page, section_pages)
-        
-        return pdf
-
-    def _create_simple_pdf(self, result_table, fig, **kwargs):
-        font = kwargs.get('font', 'Helvetica')
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font(font, "B", 16)
-        pdf.cell(0, 10, "Leveling Survey Report", new_x="LMARGIN", new_y="NEXT", align="C")
-        pdf.set_font(font, "", 10)
-        pdf.cell(0, 5, f"Generated on: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", new_x="LMARGIN", new_y="NEXT", align="C")
-        pdf.ln(10)
-        
-        section_pages = {}
-        self._add_pdf_results_table(pdf, font, result_table, "Default", section_pages)
-        self._add_pdf_graph(pdf, font, fig, section_pages)
-        
-        return pdf
-
-
-    def _perform_csv_import(self, file_path, mapping, has_header, data_handler, progress_bar):
-        all_rows = []
+    def _perform_csv_import(self, file_path, mapping, has_header, table_widget, column_names, redraw_callback, progress_bar):
+        """Streams the CSV into table_widget from a worker thread, one bulk append per chunk of rows.
+
+        The table is cleared first and fills as chunks arrive; progress_bar
+        follows the bytes read and the progress dialog can cancel the
+        import, keeping the rows read so far.
+        """
         try:
-            with open(file_path, 'r', newline='') as f:
-                reader = csv.reader(f)
-                if has_header:
-                    next(reader, None)
-                for row in reader:
-                    # Skip empty or malformed rows
-                    if not row or all(cell.strip() == '' for cell in row):
-                        continue
-                    if len(row) < max(mapping.values(), default=0) + 1:
-                        continue
-                    all_rows.append(row)
-            data_handler(all_rows, mapping)
-        except Exception as e:
+            reader = CsvChunkReader(file_path, column_sources(mapping, column_names), has_header,
+                                    max_pending=MAX_PENDING_CHUNKS)
+        except OSError as e:
             QMessageBox.critical(self.master, LANG["import_error"], f"{LANG['failed_import_csv']}\n{e}")
+            return
+        # A newer import into the same table replaces a running one
+        for running_table, _thread, running in self._import_jobs.values():
+            if running_table is table_widget:
+                running.cancel()
+        self._import_job_id += 1
+        job_id = self._import_job_id
+        table_widget.blockSignals(True)
+        try:
+            if hasattr(table_widget, "append_cells"):
+                table_widget.set_rows([])  # One undo step for the whole load
+            else:
+                table_widget.setRowCount(0)
+        finally:
+            table_widget.blockSignals(False)
+
+        thread = QThread(self.master)
+        worker = CsvImportWorker(reader)
+        worker.moveToThread(thread)
+        dialog = QProgressDialog(f"Importing {Path(file_path).name}...", "Cancel", 0, 100, self.master)
+        dialog.setWindowTitle("CSV Import")
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.canceled.connect(worker.cancel)
+        if progress_bar:
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(0)
+            progress_bar.setVisible(True)
+
+        def on_progress(percent):
+            dialog.setValue(percent)
+            if progress_bar:
+                progress_bar.setValue(percent)
+                progress_bar.setVisible(True)
+
+        def on_finished():
+            dialog.close()
+            if progress_bar:
+                progress_bar.setVisible(False)
+            if redraw_callback:
+                redraw_callback()
+
+        thread.started.connect(worker.run)
+        worker.chunk.connect(lambda columns: self._append_csv_chunk(table_widget, columns, reader))
+        worker.progress.connect(on_progress)
+        worker.error.connect(lambda message: QMessageBox.critical(self.master, LANG["import_error"],
+                                                                  f"{LANG['failed_import_csv']}\n{message}"))
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(on_finished)
+        thread.finished.connect(lambda: self._import_jobs.pop(job_id, None))
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        self._import_jobs[job_id] = (table_widget, thread, worker)
+        thread.start()
+
+    def _append_csv_chunk(self, table_widget, columns, reader):
+        table_widget.blockSignals(True)
+        try:
+            if reader.cancelled:
+                return
+            if hasattr(table_widget, "append_cells"):
+                table_widget.append_cells(columns)
+            else:
+                start = table_widget.rowCount()
+                table_widget.setRowCount(start + len(columns[0]))
+                for col, (column, source) in enumerate(zip(columns, reader.sources)):
+                    if source is None:
+                        continue
+                    for offset, text in enumerate(column):
+                        table_widget.setItem(start + offset, col, QTableWidgetItem(text))
+        finally:
+            table_widget.blockSignals(False)
+            reader.release()
+
+    def stop_imports(self):
+        """Cancels running imports and waits for their threads to exit."""
+        for _table, thread, worker in list(self._import_jobs.values()):
+            worker.cancel()
+            thread.quit()
+            thread.wait()
+
+    def _table_contents(self, table):
+        """Headers and row iterator for a QTableWidget or a LevelingResult."""
+        if isinstance(table, LevelingResult):
+            return table.headers, table.rows()
+        headers = [table.horizontalHeaderItem(i).text() if table.horizontalHeaderItem(i) else "" for i in range(table.columnCount())]
+        rows = ([table.item(row, col).text() if table.item(row, col) else '' for col in range(table.columnCount())]
+                for row in range(table.rowCount()))
+        return headers, rows
 
     def _update_recent_files(self, file_path):
         # Implement your logic to update recent files in settings
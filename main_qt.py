@@ -10,8 +10,10 @@ from leveling_app_modular.utils_qt import Tooltip, ImportDialog, show_onboarding
 from leveling_app_modular.import_export_qt import ImportExportManager
 from leveling_app_modular.settings_qt import SettingsDialog
 from leveling_app_modular.help_qt import HelpManager
-from leveling_app_modular.db import DatabaseManager
+from leveling_app_modular.db import DatabaseManager, cell_text
 from leveling_app_modular.calculator import LevelingCalculator
+from leveling_app_modular.project import PROJECT_SUFFIX, ProjectFormatError, detached, is_mapped_from, open_project, save_project
+from leveling_app_modular.traverse import TraverseData
 from .settings import settings, save_settings
 from leveling_app_modular.session import SessionManager
 from leveling_app_modular.dialogs_qt import AboutDialog, AppLogDialog
@@ -68,8 +70,6 @@ class MainWindow(QMainWindow):
         # Add Help tab
         self.help_manager = HelpManager(self)
         self.help_manager.init_help_tab(self.tabs)
-        
-        self.leveling_app.calculate_button.clicked.connect(self.calculate_and_update)
 
         # Ensure menu bar exists
         if not self.menuBar():
@@ -141,6 +141,15 @@ class MainWindow(QMainWindow):
             open_leveling_csv_action.setToolTip("Open a CSV file with leveling data.")
             open_leveling_csv_action.triggered.connect(self.open_leveling_csv)
             file_menu.addAction(open_leveling_csv_action)
+            # Binary projects
+            open_project_action = QAction(QIcon(os.path.join(ICON_DIR, 'open.svg')), "Open Project...", self)
+            open_project_action.setToolTip("Open a leveling project file (.lvlp).")
+            open_project_action.triggered.connect(lambda: self.open_project_file())
+            file_menu.addAction(open_project_action)
+            save_project_action = QAction(QIcon(os.path.join(ICON_DIR, 'save.svg')), "Save Project...", self)
+            save_project_action.setToolTip("Save the field book, RLs and comparison profile as a project file (.lvlp).")
+            save_project_action.triggered.connect(self.save_project_file)
+            file_menu.addAction(save_project_action)
             # Comparison profile
             open_comparison_action = QAction(QIcon(os.path.join(ICON_DIR, 'compare.svg')), "Open Comparison Profile...", self)
             open_comparison_action.setToolTip("Load a CSV to overlay a comparison profile on the graph.")
@@ -359,14 +368,16 @@ class MainWindow(QMainWindow):
 
     def _open_recent_file(self, file_path):
         # Try to open as Leveling CSV, fallback to Profile CSV
-        if file_path.lower().endswith('.csv'):
+        if file_path.lower().endswith(PROJECT_SUFFIX):
+            self.open_project_file(file_path)
+        elif file_path.lower().endswith('.csv'):
             try:
                 column_names = []
                 for i in range(self.leveling_app.table.columnCount()):
                     header_item = self.leveling_app.table.horizontalHeaderItem(i)
                     col_name = header_item.text() if header_item is not None else ""
                     column_names.append(col_name)
-                self.import_export.import_leveling_csv(self.leveling_app.table, column_names, None, None, file_path)
+                self.import_export.import_leveling_csv(self.leveling_app.table, column_names, None, getattr(self.leveling_app, 'progress_bar', None), file_path)
                 self.set_status(f"Opened: {file_path}")
             except Exception:
                 # Try as profile CSV
@@ -389,12 +400,9 @@ class MainWindow(QMainWindow):
                     # Load as Leveling DB
                     rows = self.db_manager.load_leveling_data(file_path)
                     if rows:
-                        self.leveling_app.table.setRowCount(len(rows))
-                        self.leveling_app.table.setColumnCount(4)
-                        self.leveling_app.table.setHorizontalHeaderLabels(["Point", "BS", "IS", "FS"])
-                        for row_idx, row_data in enumerate(rows):
-                            for col_idx, value in enumerate(row_data):
-                                self.leveling_app.table.setItem(row_idx, col_idx, QTableWidgetItem(str(value) if value is not None else ""))
+                        # Readings are stored as numbers; show them as entered, e.g. 1.500
+                        precision = settings.get("precision", 3)
+                        self.leveling_app.table.set_rows([[cell_text(value, precision) for value in row] for row in rows])
                         self.leveling_app.push_undo()
                         self.leveling_app.apply_row_striping()
                         self.set_status(f"Loaded Leveling DB: {file_path}")
@@ -404,12 +412,13 @@ class MainWindow(QMainWindow):
                     # Load as Profile DB
                     rows = self.db_manager.load_profile_data(file_path)
                     if rows:
+                        precision = settings.get("precision", 3)
                         self.graph_app.table.setRowCount(len(rows))
                         self.graph_app.table.setColumnCount(3)
                         self.graph_app.table.setHorizontalHeaderLabels(["Point", "Elevation", "Distance"])
                         for row_idx, row_data in enumerate(rows):
                             for col_idx, value in enumerate(row_data):
-                                self.graph_app.table.setItem(row_idx, col_idx, QTableWidgetItem(str(value) if value is not None else ""))
+                                self.graph_app.table.setItem(row_idx, col_idx, QTableWidgetItem(cell_text(value, precision)))
                         self.graph_app.sync_data_from_table()
                         if hasattr(self.graph_app, '_redraw_graph'):
                             self.graph_app._redraw_graph()
@@ -432,9 +441,52 @@ class MainWindow(QMainWindow):
                 header_item = self.leveling_app.table.horizontalHeaderItem(i)
                 col_name = header_item.text() if header_item is not None else ""
                 column_names.append(col_name)
-            self.import_export.import_leveling_csv(self.leveling_app.table, column_names, None, None, file_path)
+            self.import_export.import_leveling_csv(self.leveling_app.table, column_names, None, getattr(self.leveling_app, 'progress_bar', None), file_path)
             self._add_to_recent_files(file_path)
 
+    def open_project_file(self, file_path=None):
+        if not file_path:
+            file_path, _ = QFileDialog.getOpenFileName(self, "Open Project", "", f"Leveling Projects (*{PROJECT_SUFFIX})")
+        if not file_path:
+            return
+        try:
+            # The file is memory-mapped: the arrays are read as they are used
+            project = open_project(file_path)
+        except (OSError, ProjectFormatError) as e:
+            QMessageBox.critical(self, "Open Project", f"Could not open project:\n{e}")
+            self.set_status(f"Failed to open: {file_path}", error=True)
+            return
+        if project.traverse is not None:
+            self.leveling_app.open_traverse(project.traverse, project.metadata)
+        if project.comparison is not None:
+            self.graph_app.set_comparison_profile(project.comparison)
+        self._add_to_recent_files(file_path)
+        self.set_status(f"Opened project: {file_path}")
+
+    def save_project_file(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Project", "", f"Leveling Projects (*{PROJECT_SUFFIX})")
+        if not file_path:
+            return
+        if not file_path.lower().endswith(PROJECT_SUFFIX):
+            file_path += PROJECT_SUFFIX
+        self.leveling_app.flush_changes(recalculate=False)
+        traverse = TraverseData.from_rows(self.leveling_app.get_table_data())
+        comparison = getattr(self.graph_app, '_comparison_data', None)
+        if comparison is not None:
+            # Let go of our own views of a mapped file before saving over it
+            comparison = self.graph_app._comparison_data = detached(comparison, file_path)
+        calculator = self.leveling_app.calculator
+        if calculator is not None and calculator.traverse is not None:
+            if is_mapped_from(calculator.traverse.bs, file_path):
+                self.leveling_app.invalidate_calculation()
+        try:
+            save_project(file_path, traverse, comparison, self.leveling_app.project_metadata())
+        except OSError as e:
+            QMessageBox.critical(self, "Save Project", f"Could not save project:\n{e}")
+            return
+        self._add_to_recent_files(file_path)
+        self.set_status(f"Project saved: {file_path}")
+
     def open_comparison_profile(self):
         if hasattr(self.graph_app, 'load_comparison_profile'):
             self.graph_app.load_comparison_profile()
@@ -497,6 +549,9 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         self.save_session()
+        self.import_export.stop_reports()
+        self.import_export.stop_imports()
+        self.db_manager.close()
         event.accept()
 
     def dragEnterEvent(self, event: QDragEnterEvent):
@@ -510,7 +565,9 @@ class MainWindow(QMainWindow):
         mime = event.mimeData()
         files = [u.toLocalFile() for u in mime.urls()] if mime is not None and mime.hasUrls() else []
         for file_path in files:
-            if file_path.lower().endswith('.csv'):
+            if file_path.lower().endswith(PROJECT_SUFFIX):
+                self.open_project_file(file_path)
+            elif file_path.lower().endswith('.csv'):
                 from PyQt6.QtWidgets import QMessageBox
                 resp = QMessageBox.question(self, "Import CSV", f"Import '{file_path}' as Leveling CSV? (No = Profile CSV)", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
                 if resp == QMessageBox.StandardButton.Yes:
@@ -541,7 +598,7 @@ class MainWindow(QMainWindow):
                     # TODO: implement loading Profile DB
             else:
                 from PyQt6.QtWidgets import QMessageBox
-                QMessageBox.information(self, "Unsupported File", f"Only CSV and DB files can be imported by drag-and-drop. Ignored: {file_path}")
+                QMessageBox.information(self, "Unsupported File", f"Only CSV, DB and project files can be imported by drag-and-drop. Ignored: {file_path}")
                 self.set_status(f"Ignored: {file_path}")
 
     def show_app_log_window(self):
@@ -597,12 +654,16 @@ class MainWindow(QMainWindow):
     def save_leveling_to_db(self):
         # Save leveling data to database
         if hasattr(self.leveling_app, 'get_table_data'):
-            data = self.leveling_app.get_table_data()
-            self.db_manager.save_leveling_data(data)
+            # Only the rows changed since the last save are written
+            model = self.leveling_app.table.table_model()
+            self.db_manager.save_leveling_data(model.row_changes())
+            model.mark_saved()
             self.set_status("Leveling data saved to database.")
 
     def export_to_pdf(self):
-        self.import_export.export_pdf_with_options(self.leveling_app.results_table, self.graph_app.fig)
+        # The last LevelingResult is an immutable snapshot of the results table
+        results = self.leveling_app.results if self.leveling_app.results is not None else self.leveling_app.results_table
+        self.import_export.export_pdf_with_options(results, self.graph_app.graph_snapshot())
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
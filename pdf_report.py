@@ -0,0 +1,367 @@
+"""Staged PDF report generation, independent of the widgets.
+
+The GUI thread takes a ReportData snapshot (result rows, calculation stats
+and a GraphSnapshot); ReportBuilder lays the report out from it in stages
+that report progress and can be cancelled between steps, so it can run in
+a worker thread. The graph is rendered by the render service while the
+results table is laid out. Metadata and the password are set on the
+document before it is written, so the file is written once and never
+re-read.
+"""
+import datetime
+import io
+import os
+import threading
+
+from fpdf import FPDF
+
+from .render_service import GraphSnapshot, render_service
+
+try:
+    import PyPDF2  # type: ignore[import]
+except ImportError:
+    PyPDF2 = None
+
+ROW_CHUNK = 500  # Results rows laid out between progress reports and cancel checks
+
+# Progress (percent) at the start of each stage; the results table takes the bulk
+STAGES = {
+    "Preparing report": 0,
+    "Results table": 5,
+    "Profile graph": 75,
+    "Calculation details": 85,
+    "Writing file": 90,
+}
+
+
+class ReportCancelled(Exception):
+    """Raised inside ReportBuilder when cancel() was called."""
+
+
+class ReportData:
+    """Plain copy of what a report shows, safe to hand to a worker thread.
+
+    rows is a list of lists of display strings. graph is a GraphSnapshot,
+    encoded PNG bytes, or None for no graph page.
+    """
+
+    def __init__(self, headers, rows, graph=None, method=None, stats=None, precision=3):
+        self.headers = list(headers)
+        self.rows = rows
+        self.graph = graph
+        self.method = method if method is not None else ("HI" if "HI" in self.headers else "RF")
+        self.stats = dict(stats or {})
+        self.precision = precision
+
+    def __repr__(self):
+        return f"ReportData({self.method}, {len(self.rows)} rows)"
+
+    @classmethod
+    def from_result(cls, result, graph=None):
+        """Snapshot of a LevelingResult; its rows are formatted column by column."""
+        return cls(result.headers, list(result.rows()), graph, result.method, result.stats, result.precision)
+
+
+class PDF(FPDF):
+    """FPDF with the cover page, running header and page footer of the professional report."""
+
+    def __init__(self, project_name=None, surveyor=None, date=None, logo_path=None, contact=None):
+        super().__init__()
+        self.project_name = project_name or ""
+        self.surveyor = surveyor or ""
+        self.date = date or datetime.datetime.now().strftime('%Y-%m-%d')
+        self.logo_path = logo_path
+        self.contact = contact or ""
+
+    def header(self):
+        if self.page_no() == 1:
+            return  # Cover page
+        self.set_font("Helvetica", "I", 8)
+        self.cell(0, 8, self.project_name or "Leveling Survey Report", align="L")
+        self.cell(0, 8, self.date, align="R", new_x="LMARGIN", new_y="NEXT")
+        self.ln(2)
+
+    def footer(self):
+        if self.page_no() == 1:
+            return
+        self.set_y(-15)
+        self.set_font("Helvetica", "I", 8)
+        self.cell(0, 10, f"Page {self.page_no()}", align="C")
+
+    def cover_page(self):
+        self.add_page()
+        if self.logo_path and os.path.exists(self.logo_path):
+            self.image(self.logo_path, x=(self.w - 40) / 2, y=30, w=40)
+        self.set_y(100)
+        self.set_font("Helvetica", "B", 24)
+        self.cell(0, 15, "Leveling Survey Report", align="C", new_x="LMARGIN", new_y="NEXT")
+        self.set_font("Helvetica", "", 14)
+        for line in (self.project_name, f"Surveyor: {self.surveyor}" if self.surveyor else "", self.date, self.contact):
+            if line:
+                self.cell(0, 10, line, align="C", new_x="LMARGIN", new_y="NEXT")
+
+
+class ReportBuilder:
+    """Lays out and writes a simple or professional report from a ReportData.
+
+    progress is called with (percent, stage) from the thread running
+    build()/write(). options are the professional export options (font,
+    sections, summary, password, metadata, ...).
+    """
+
+    def __init__(self, data, professional=False, progress=None, **options):
+        self.data = data
+        self.professional = professional
+        self.options = options
+        self._progress = progress
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stops the build at its next check; safe to call from any thread."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _stage(self, name, percent=None):
+        if self._cancelled.is_set():
+            raise ReportCancelled()
+        if self._progress:
+            self._progress(STAGES[name] if percent is None else percent, name)
+
+    def build(self):
+        """Returns the laid out FPDF document."""
+        self._stage("Preparing report")
+        graph = self._start_graph()
+        font = self.options.get('font') or 'Helvetica'
+        if not self.professional:
+            pdf = FPDF()
+            pdf.add_page()
+            pdf.set_font(font, "B", 16)
+            pdf.cell(0, 10, "Leveling Survey Report", new_x="LMARGIN", new_y="NEXT", align="C")
+            pdf.set_font(font, "", 10)
+            pdf.cell(0, 5, f"Generated on: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                     new_x="LMARGIN", new_y="NEXT", align="C")
+            pdf.ln(10)
+            section_pages = {}
+            self._add_results_table(pdf, font, "Default", section_pages)
+            self._add_graph(pdf, font, graph, section_pages)
+            return pdf
+        options = self.options
+        sections = options.get('sections') or {}
+        pdf = PDF(project_name=options.get('project_name'), surveyor=options.get('surveyor'), date=options.get('date'),
+                  logo_path=options.get('logo_path'), contact=options.get('contact'))
+        pdf.set_auto_page_break(auto=True, margin=15)
+        section_pages = {}
+        pdf.cover_page()
+        toc_page = self._add_toc(pdf, font, sections)
+        self._add_summary(pdf, font, options.get('summary', ''), section_pages)
+        self._add_results_table(pdf, font, options.get('color_scheme', 'Default'), section_pages)
+        self._add_graph(pdf, font, graph, section_pages)
+        self._stage("Calculation details")
+        self._add_calc_details(pdf, font, sections, section_pages)
+        self._add_checks(pdf, font, section_pages)
+        self._fill_toc(pdf, font, toc_page, section_pages)
+        return pdf
+
+    def write(self, file_path):
+        """Builds the report and writes it to file_path in one pass."""
+        pdf = self.build()
+        self._stage("Writing file")
+        options = self.options
+        set_document_info(pdf, options.get('metadata'), options.get('surveyor'), options.get('project_name'),
+                          options.get('summary'))
+        document = encrypt_document(pdf, options.get('password'))
+        # Write next to the target and swap it in, so a failed write leaves any earlier file intact
+        partial = f"{file_path}.part"
+        with open(partial, 'wb') as f:
+            f.write(document)
+        os.replace(partial, file_path)
+        if self._progress:
+            self._progress(100, "Done")
+        return file_path
+
+    def _start_graph(self):
+        """Future or file for the graph image; a snapshot renders in the background during the table stage."""
+        graph = self.data.graph
+        if isinstance(graph, GraphSnapshot):
+            return render_service.submit(graph, "png")
+        return graph
+
+    def _add_toc(self, pdf, font, sections):
+        if sections.get('toc', True):
+            pdf.add_page()
+            toc_page = pdf.page_no()
+            pdf.set_font(font, "B", 16)
+            pdf.cell(0, 15, "Table of Contents", new_x="LMARGIN", new_y="NEXT")
+            pdf.ln(5)
+            return toc_page
+        return None
+
+    def _add_summary(self, pdf, font, summary, section_pages):
+        pdf.add_page()
+        section_pages['Executive Summary'] = pdf.page_no()
+        if hasattr(pdf, 'bookmark'):
+            pdf.bookmark('Executive Summary', level=0)
+        pdf.set_font(font, "B", 14)
+        pdf.cell(0, 10, "Executive Summary", new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font(font, "", 12)
+        pdf.multi_cell(0, 8, summary or "No summary provided.")
+        pdf.ln(5)
+
+    def _add_results_table(self, pdf, font, color_scheme, section_pages):
+        self._stage("Results table")
+        pdf.add_page()
+        section_pages['Calculation Results'] = pdf.page_no()
+        if hasattr(pdf, 'bookmark'):
+            pdf.bookmark('Calculation Results', level=0)
+        pdf.set_font(font, "B", 14)
+        pdf.cell(0, 10, "Calculation Results", new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(2)
+        pdf.set_font(font, "B", 10)
+        headers, rows = self.data.headers, self.data.rows
+        col_count = len(headers)
+        col_widths = [max(20, int(190 / col_count))] * col_count
+        for i, header_text in enumerate(headers):
+            pdf.cell(col_widths[i], 7, header_text, 1, new_x="RIGHT", new_y="TOP", align="C")
+        pdf.ln()
+        pdf.set_font(font, "", 10)
+        start, span = STAGES["Results table"], STAGES["Profile graph"] - STAGES["Results table"]
+        for row, values in enumerate(rows):
+            if row % ROW_CHUNK == 0 and row:
+                self._stage("Results table", start + span * row // len(rows))
+            if row % 2 == 0:
+                pdf.set_fill_color(245, 245, 245) if color_scheme == "Default" else pdf.set_fill_color(40, 40, 40)
+            else:
+                pdf.set_fill_color(255, 255, 255)
+            for i, value in enumerate(values):
+                pdf.cell(col_widths[i], 6, str(value), 1, new_x="RIGHT", new_y="TOP", align="C", fill=True)
+            pdf.ln()
+        pdf.ln(10)
+
+    def _add_graph(self, pdf, font, graph, section_pages):
+        self._stage("Profile graph")
+        if graph is None:
+            return
+        pdf.add_page()
+        section_pages['Profile Graph'] = pdf.page_no()
+        if hasattr(pdf, 'bookmark'):
+            pdf.bookmark('Profile Graph', level=0)
+        pdf.set_font(font, "B", 14)
+        pdf.cell(0, 10, "Profile Graph", new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font(font, "", 11)
+        pdf.cell(0, 8, "Elevation profile generated from survey data.", new_x="LMARGIN", new_y="NEXT")
+        image = graph.result() if hasattr(graph, 'result') else graph
+        pdf.image(io.BytesIO(image), x=10, y=pdf.get_y(), w=190)
+
+    def _add_calc_details(self, pdf, font, sections, section_pages):
+        if not sections.get('calc_details'):
+            return
+        pdf.add_page()
+        section_pages['Calculation Details'] = pdf.page_no()
+        if hasattr(pdf, 'bookmark'):
+            pdf.bookmark('Calculation Details', level=0)
+        pdf.set_font(font, "B", 14)
+        pdf.cell(0, 10, "Calculation Details", new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font(font, "", 10)
+        calc_method = self.data.method
+        pdf.multi_cell(0, 8, f"Calculation method used: {calc_method}")
+        pdf.ln(5)
+        if calc_method == "HI":
+            pdf.set_font(font, 'B', 12)
+            pdf.cell(0, 10, "Height of Instrument (HI) Method Walkthrough", new_x="LMARGIN", new_y="NEXT")
+            pdf.set_font(font, '', 10)
+            pdf.multi_cell(0, 5, "1. The first RL is the starting benchmark.\n"
+                                 "2. The Height of Instrument (HI) is calculated by adding the Backsight (BS) to the known RL.\n"
+                                 "3. The RL of subsequent points is found by subtracting the Foresight (FS) or Intersight (IS) from the HI.\n"
+                                 "4. At a change point, a new HI is calculated from the new BS reading.")
+        elif calc_method == "RF":
+            pdf.set_font(font, 'B', 12)
+            pdf.cell(0, 10, "Rise and Fall (RF) Method Walkthrough", new_x="LMARGIN", new_y="NEXT")
+            pdf.set_font(font, '', 10)
+            pdf.multi_cell(0, 5, "1. The difference between consecutive staff readings determines the Rise or Fall.\n"
+                                 "2. If the previous reading is greater than the current, it's a Rise.\n")
+        pdf.ln(5)
+
+    def _add_checks(self, pdf, font, section_pages):
+        pdf.add_page()
+        section_pages['Checks'] = pdf.page_no()
+        if hasattr(pdf, 'bookmark'):
+            pdf.bookmark('Checks', level=0)
+        pdf.set_font(font, "B", 14)
+        pdf.cell(0, 10, "Arithmetic Checks", new_x="LMARGIN", new_y="NEXT")
+        pdf.set_font(font, "", 10)
+        stats = self.data.stats
+        precision = self.data.precision
+        if stats:
+            check_ok = "OK" if not stats['arith_failed'] else "FAIL"
+            pdf.multi_cell(0, 8, "The arithmetic check ensures the integrity of the leveling calculations. It is performed as follows:", new_x="LMARGIN", new_y="NEXT")
+            pdf.ln(2)
+            if self.data.method == "HI":
+                pdf.multi_cell(0, 8, f"Sum of Backsights (BS): {stats['sum_bs']:.{precision}f}", new_x="LMARGIN", new_y="NEXT")
+                pdf.multi_cell(0, 8, f"Sum of Foresights (FS): {stats['sum_fs']:.{precision}f}", new_x="LMARGIN", new_y="NEXT")
+                pdf.multi_cell(0, 8, f"Sum(BS) - Sum(FS): {stats['arith_check']:.{precision}f}", new_x="LMARGIN", new_y="NEXT")
+            else:
+                pdf.multi_cell(0, 8, f"Sum of Rises: {stats['sum_rise']:.{precision}f}", new_x="LMARGIN", new_y="NEXT")
+                pdf.multi_cell(0, 8, f"Sum of Falls: {stats['sum_fall']:.{precision}f}", new_x="LMARGIN", new_y="NEXT")
+                pdf.multi_cell(0, 8, f"Sum(Rise) - Sum(Fall): {stats['arith_check']:.{precision}f}", new_x="LMARGIN", new_y="NEXT")
+            pdf.multi_cell(0, 8, f"Last RL - First RL: {stats['rl_diff']:.{precision}f}", new_x="LMARGIN", new_y="NEXT")
+            pdf.ln(2)
+            pdf.set_font(font, 'B', 12)
+            # Set color based on check result
+            if check_ok == "OK":
+                pdf.set_text_color(0, 150, 0)  # Green
+            else:
+                pdf.set_text_color(255, 0, 0)   # Red
+            pdf.multi_cell(0, 8, f"Check Result: {check_ok}", new_x="LMARGIN", new_y="NEXT")
+            pdf.set_text_color(0, 0, 0)  # Reset to black
+        else:
+            pdf.multi_cell(0, 8, "No calculation statistics available to perform checks.", new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(5)
+
+    def _fill_toc(self, pdf, font, toc_page, section_pages):
+        if toc_page:
+            current_page = pdf.page_no()
+            pdf.page = toc_page
+            pdf.set_y(pdf.get_y() + 10)
+            pdf.set_font(font, "", 12)
+            for section, page in section_pages.items():
+                pdf.cell(0, 8, f"{section} ............................................. {page}", new_x="LMARGIN", new_y="NEXT", link=pdf.add_link())
+            pdf.page = current_page
+
+
+def set_document_info(pdf, metadata=None, surveyor=None, project_name=None, summary=None):
+    """Sets the document properties written with the file; only when metadata keywords were given."""
+    if not metadata:
+        return
+    pdf.set_author(surveyor or '')
+    pdf.set_title(project_name or 'Leveling Survey Report')
+    pdf.set_subject(summary or '')
+    pdf.set_keywords(metadata)
+
+
+def encrypt_document(pdf, password=None):
+    """The encoded document, protected by password when one is given.
+
+    fpdf2 encrypts while encoding. Older fpdf2 releases without
+    set_encryption() go through PyPDF2, in memory.
+    """
+    if password and hasattr(pdf, 'set_encryption'):
+        pdf.set_encryption(owner_password=password, user_password=password)
+    document = bytes(pdf.output())
+    if not password or hasattr(pdf, 'set_encryption'):
+        return document
+    if PyPDF2 is None:
+        raise RuntimeError("Password protection needs fpdf2 2.6 or later, or PyPDF2.")
+    reader = PyPDF2.PdfReader(io.BytesIO(document))
+    writer = PyPDF2.PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    if reader.metadata:
+        writer.add_metadata(dict(reader.metadata))
+    writer.encrypt(password)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
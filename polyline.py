@@ -0,0 +1,115 @@
+"""Design polyline drawn on the profile graph and used as a cut/fill design line."""
+import bisect
+import numpy as np
+
+try:
+    from scipy.interpolate import make_interp_spline
+except ImportError:
+    make_interp_spline = None
+
+MIN_CURVE_SAMPLES = 100
+SAMPLES_PER_VERTEX = 10
+
+
+class DesignPolyline:
+    """Polyline vertices kept sorted by x, with the fitted spline and the sampled curve cached.
+
+    The spline is keyed by the vertex tuple and the sampled curve by the
+    vertex tuple and smoothing factor, so redraws reuse them until a vertex
+    is added or removed.
+    """
+
+    def __init__(self, vertices=()):
+        self._vertices = sorted(vertices)
+        self._key = tuple(self._vertices)
+        self.last_added = None  # The most recently added vertex, for the edit preview
+        self._spline_key = None
+        self._spline = None
+        self._curve_key = None
+        self._curve = None
+
+    def __len__(self):
+        return len(self._vertices)
+
+    def __iter__(self):
+        return iter(self._key)
+
+    def __repr__(self):
+        return f"DesignPolyline({list(self._key)!r})"
+
+    @property
+    def vertices(self):
+        """The vertices as a tuple of (x, y), sorted by x."""
+        return self._key
+
+    def add(self, x, y):
+        bisect.insort(self._vertices, (x, y))
+        self.last_added = (x, y)
+        self._changed()
+
+    def nearest(self, x, y):
+        """Index of the vertex closest to (x, y), or None without vertices."""
+        if not self._vertices:
+            return None
+        verts = np.array(self._vertices)
+        return int(np.argmin(np.hypot(verts[:, 0] - x, verts[:, 1] - y)))
+
+    def remove(self, index):
+        vertex = self._vertices.pop(index)
+        if vertex == self.last_added:
+            self.last_added = None
+        self._changed()
+        return vertex
+
+    def remove_nearest(self, x, y):
+        index = self.nearest(x, y)
+        return None if index is None else self.remove(index)
+
+    def clear(self):
+        self._vertices.clear()
+        self.last_added = None
+        self._changed()
+
+    def _changed(self):
+        self._key = tuple(self._vertices)
+
+    def _xy(self):
+        verts = np.array(self._key, dtype=np.float64).reshape(-1, 2)
+        return verts[:, 0], verts[:, 1]
+
+    def spline(self):
+        """Quadratic interpolating spline through the vertices, or None when one cannot be fitted."""
+        if self._spline_key != self._key:
+            self._spline_key = self._key
+            self._spline = None
+            if make_interp_spline is not None and len(self._key) >= 3:
+                poly_x, poly_y = self._xy()
+                try:
+                    self._spline = make_interp_spline(poly_x, poly_y, k=2)
+                except ValueError:
+                    # Repeated x values
+                    self._spline = None
+        return self._spline
+
+    def levels(self, x, smooth_factor=0.0):
+        """Design level at each x: the linear polyline blended towards the spline by smooth_factor."""
+        poly_x, poly_y = self._xy()
+        y_linear = np.interp(x, poly_x, poly_y)
+        spline = self.spline() if smooth_factor > 0 else None
+        if spline is None:
+            return y_linear
+        return (1 - smooth_factor) * y_linear + smooth_factor * spline(x)
+
+    def curve(self, smooth_factor=0.0):
+        """(x, y, smoothed) to draw; the vertices themselves unless the spline applies."""
+        key = (self._key, smooth_factor)
+        if self._curve_key != key:
+            poly_x, poly_y = self._xy()
+            if smooth_factor > 0 and self.spline() is not None:
+                n_points = max(MIN_CURVE_SAMPLES, len(poly_x) * SAMPLES_PER_VERTEX)
+                xnew = np.linspace(poly_x[0], poly_x[-1], n_points)
+                self._curve = (xnew, self.levels(xnew, smooth_factor), True)
+            else:
+                self._curve = (poly_x, poly_y, False)
+            self._curve_key = key
+        return self._curve
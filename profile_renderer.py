@@ -0,0 +1,279 @@
+"""Retained-mode matplotlib rendering for the profile graph.
+
+The artists of the profile graph are created once and afterwards only
+updated in place (set_data/set_offsets/set_text). Overlays that follow the
+mouse or the table selection are animated artists, blitted over a copy of
+the static background cached after every full draw.
+
+Long profiles are drawn at a level of detail matching the view: the visible
+x-range is reduced to at most four vertices per pixel column (first, last,
+min and max), recomputed whenever the x-limits or the canvas size change.
+Point markers are drawn once the view holds at most one vertex per column.
+"""
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.gridspec import GridSpec
+
+EMPTY_OFFSETS = np.empty((0, 2))
+VERTICES_PER_COLUMN = 4
+
+
+def decimate(x, y, x0, x1, columns):
+    """Reduces sorted x/y to the first, last, min and max vertex of each of columns buckets over [x0, x1].
+
+    One vertex on each side of the range is kept so the line runs to the
+    edges of the view. Returns the input unchanged when it is already small.
+    """
+    n = len(x)
+    lo = max(int(np.searchsorted(x, x0, 'left')) - 1, 0)
+    hi = min(int(np.searchsorted(x, x1, 'right')) + 1, n)
+    if hi - lo <= VERTICES_PER_COLUMN * columns or x1 <= x0:
+        return x[lo:hi], y[lo:hi]
+    xs, ys = x[lo:hi], y[lo:hi]
+    bucket = ((xs - x0) * (columns / (x1 - x0))).astype(np.int64)
+    np.clip(bucket, 0, columns - 1, out=bucket)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    counts = np.diff(np.r_[starts, len(xs)])
+    group = np.repeat(np.arange(len(starts)), counts)
+    keep = [starts, starts + counts - 1]
+    for extreme in (np.minimum, np.maximum):
+        hits = np.flatnonzero(ys == np.repeat(extreme.reduceat(ys, starts), counts))
+        keep.append(hits[np.unique(group[hits], return_index=True)[1]])
+    keep = np.unique(np.concatenate(keep))
+    return xs[keep], ys[keep]
+
+
+class ProfileIndex:
+    """Sorted profile vertices and segment slopes for cursor lookups.
+
+    Built once per data change; locate() is a binary search plus one
+    multiply-add.
+    """
+
+    def __init__(self, x, y):
+        order = np.argsort(x, kind='stable')
+        self.x = np.asarray(x, dtype=np.float64)[order]
+        self.y = np.asarray(y, dtype=np.float64)[order]
+        dx = np.diff(self.x)
+        dy = np.diff(self.y)
+        self.slopes = np.divide(dy, dx, out=np.zeros_like(dy), where=dx != 0)
+
+    def __len__(self):
+        return len(self.x)
+
+    def locate(self, x):
+        """Returns (elevation, grade in percent) on the profile at x, clamped to its ends."""
+        xs = self.x
+        if len(xs) < 2:
+            return (float(self.y[0]), 0.0) if len(xs) else (None, None)
+        i = int(np.searchsorted(xs, x, 'right')) - 1
+        i = min(max(i, 0), len(xs) - 2)
+        slope = float(self.slopes[i])
+        x = min(max(x, xs[0]), xs[-1])
+        return float(self.y[i] + slope * (x - xs[i])), slope * 100
+
+
+class ProfileRenderer:
+    def __init__(self, fig, ax, canvas):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self._background = None
+        self._profile = (np.empty(0), np.empty(0))
+        self.mass_ax = None
+        self._sorted = True
+        self._index = None
+        self._markers_visible = False
+        self._build()
+        canvas.mpl_connect('draw_event', self._on_draw)
+        canvas.mpl_connect('resize_event', self._on_resize)
+
+    def _build(self):
+        ax = self.ax
+        ax.set_xlabel("Point", fontsize=11)
+        ax.set_ylabel("Elevation", fontsize=11)
+        ax.set_title("Profile Graph (Elevation vs. Point)", fontsize=12, fontweight='bold')
+        ax.grid(True, linestyle='--', alpha=0.7)
+        ax.minorticks_on()
+        ax.grid(which='minor', linestyle=':', linewidth=0.5, alpha=0.4)
+        self.profile_line, = ax.plot([], [], linewidth=2)
+        self.markers = ax.scatter(EMPTY_OFFSETS[:, 0], EMPTY_OFFSETS[:, 1], s=60, edgecolor='black', zorder=5)
+        self.comparison_line, = ax.plot([], [], linestyle='--', linewidth=2, label='Comparison Profile', visible=False)
+        self.polyline_line, = ax.plot([], [], color='red', linestyle='-', linewidth=2, visible=False)
+        self.polyline_points = ax.scatter(EMPTY_OFFSETS[:, 0], EMPTY_OFFSETS[:, 1], color='red', s=40, zorder=10)
+        self.sketches = LineCollection([], colors='magenta', linewidths=2, zorder=9)
+        ax.add_collection(self.sketches, autolim=False)
+        # Overlays, redrawn by blitting without touching the rest of the figure
+        self.highlight, = ax.plot([], [], linestyle='none', marker='o', markersize=13.4, markeredgecolor='black',
+                                  zorder=10, animated=True)
+        self.preview_line, = ax.plot([], [], color='magenta', linestyle='--', linewidth=1.5, zorder=9, animated=True)
+        self.sketch_line, = ax.plot([], [], color='magenta', linewidth=2, zorder=9, animated=True)
+        self.overlays = [self.highlight, self.preview_line, self.sketch_line]
+        self._texts = {}  # pool name -> Annotation artists reused across redraws
+        self._transient = []  # Artists dropped on the next redraw (analysis shading)
+        # Zoom/pan from the toolbar, the keyboard or autoscaling all pass through set_xlim
+        ax.callbacks.connect('xlim_changed', lambda ax: self._apply_view())
+        self.fig.tight_layout()
+
+    def reset(self):
+        """Rebuilds every artist, e.g. after the matplotlib style changed."""
+        self.set_mass_haul()
+        self.ax.clear()
+        self._background = None
+        self._profile = (np.empty(0), np.empty(0))
+        self._index = None
+        self._build()
+
+    # Content
+    def set_profile(self, x, y):
+        """Updates the profile line data; returns True when the data changed."""
+        old_x, old_y = self._profile
+        if np.array_equal(old_x, x) and np.array_equal(old_y, y):
+            return False
+        self._profile = (x, y)
+        self._sorted = bool(np.all(x[1:] >= x[:-1]))
+        self._index = None
+        self._apply_view()
+        return True
+
+    @property
+    def profile(self):
+        return self._profile
+
+    @property
+    def index(self):
+        """ProfileIndex of the current profile, built on first use after a data change."""
+        if self._index is None:
+            self._index = ProfileIndex(*self._profile)
+        return self._index
+
+    def set_markers(self, visible, color):
+        self._markers_visible = visible
+        self.markers.set_facecolor(color)
+        self._apply_view()
+
+    def _apply_view(self, full_extent=False):
+        """Puts the level-of-detail vertices for the current view on the profile line and markers."""
+        x, y = self._profile
+        columns = max(int(self.ax.bbox.width), 1)
+        if self._sorted and len(x):
+            x0, x1 = (x[0], x[-1]) if full_extent else sorted(self.ax.get_xlim())
+            x, y = decimate(x, y, x0, x1, columns)
+        # Past one vertex per pixel column the markers merge into a band; leave them out
+        markers = self._markers_visible and 0 < len(x) <= columns
+        self.profile_line.set_data(x, y)
+        self.profile_line.set_marker('o' if markers else 'None')
+        self.markers.set_offsets(np.column_stack([x, y]) if markers else EMPTY_OFFSETS)
+
+    def set_line(self, line, x=None, y=None, **props):
+        """Shows line with the given data, or hides it when x is None."""
+        if x is None:
+            line.set_visible(False)
+            line.set_data([], [])
+            return
+        line.set_data(x, y)
+        line.set(visible=True, **props)
+
+    def set_points(self, collection, x=None, y=None):
+        collection.set_offsets(np.column_stack([x, y]) if x is not None and len(x) else EMPTY_OFFSETS)
+
+    def set_texts(self, name, items, color, **style):
+        """Shows one label per (x, y, text, rotation) item, reusing the artists of earlier calls.
+
+        style is applied when a label artist is first created.
+        """
+        style.setdefault('xytext', (0, 0))
+        pool = self._texts.setdefault(name, [])
+        while len(pool) < len(items):
+            pool.append(self.ax.annotate("", (0, 0), textcoords="offset points", ha='center', **style))
+        for artist, (x, y, text, rotation) in zip(pool, items):
+            artist.xy = (x, y)
+            artist.set_text(text)
+            artist.set_rotation(rotation)
+            artist.set_color(color)
+            artist.set_visible(True)
+        for artist in pool[len(items):]:
+            artist.set_visible(False)
+
+    def set_sketches(self, segments):
+        self.sketches.set_segments(segments)
+
+    def set_mass_haul(self, x=None, y=None, color='saddlebrown'):
+        """Shows the mass-haul ordinate on a second axes under the profile, sharing its x-axis; hides it when x is None."""
+        if x is None:
+            if self.mass_ax is not None:
+                self.fig.delaxes(self.mass_ax)
+                self.mass_ax = None
+                self.ax.set_subplotspec(GridSpec(1, 1, figure=self.fig)[0])
+                self.fig.tight_layout()
+            return
+        if self.mass_ax is None:
+            grid = GridSpec(2, 1, figure=self.fig, height_ratios=[3, 1])
+            self.ax.set_subplotspec(grid[0])
+            self.mass_ax = self.fig.add_subplot(grid[1], sharex=self.ax)
+            self.mass_ax.set_ylabel("Mass Ordinate", fontsize=9)
+            self.mass_ax.grid(True, linestyle='--', alpha=0.7)
+            self.mass_ax.axhline(0.0, color='grey', linewidth=0.8)
+            self._mass_line, = self.mass_ax.plot([], [], linewidth=1.5)
+            self.fig.tight_layout()
+        self._mass_line.set_data(x, y)
+        self._mass_line.set_color(color)
+        # Keep the shared x-range of the profile; only fit the ordinate
+        self.mass_ax.relim()
+        self.mass_ax.autoscale_view(scalex=False)
+
+    def add_transient(self, artist):
+        self._transient.append(artist)
+        return artist
+
+    def clear_transient(self):
+        for artist in self._transient:
+            artist.remove()
+        self._transient = []
+
+    def update_legend(self):
+        legend = self.ax.get_legend()
+        lines = list(self.ax.get_lines())
+        candidates = lines + [artist for artist in self._transient if artist not in lines]
+        labelled = [artist for artist in candidates
+                    if artist.get_visible() and not artist.get_label().startswith('_')]
+        if labelled:
+            # Hidden retained artists keep their labels; leave them out of the legend
+            self.ax.legend(handles=labelled)
+        elif legend is not None:
+            legend.remove()
+
+    def autoscale(self):
+        # Limits come from the whole profile, not from the vertices kept for the old view
+        self._apply_view(full_extent=True)
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+
+    # Drawing
+    def draw(self):
+        """Full redraw of the static artists; the overlays are blitted on top."""
+        self.canvas.draw()
+
+    def update_overlays(self):
+        """Redraws only the overlays over the cached background."""
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_overlays()
+        self.canvas.blit(self.ax.bbox)
+
+    def _on_resize(self, event):
+        self.fig.tight_layout()
+        self._apply_view()
+
+    def _on_draw(self, event):
+        if not getattr(self.canvas, 'supports_blit', False):
+            return
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_overlays()
+
+    def _draw_overlays(self):
+        for artist in self.overlays:
+            if artist.get_visible() and len(artist.get_xdata()):
+                self.ax.draw_artist(artist)
@@ -0,0 +1,174 @@
+"""Binary project files (.lvlp) that open by memory-mapping instead of parsing.
+
+A project holds the leveling field book as a TraverseData, an optional
+comparison profile and a small JSON block of metadata (RLs, method). Every
+array is stored raw at an ALIGN-byte aligned offset and listed in a
+directory after the header, so open_project() maps the file once and hands
+out read-only NumPy views of it; the point labels are a StringTable over
+the mapped bytes. Nothing is parsed or copied until it is read.
+
+Layout, little-endian:
+    header     MAGIC, format version, section count, directory offset
+    directory  per section: name, NumPy dtype string, byte offset, item count
+    sections   raw array data
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+from .traverse import StringTable, TraverseData
+
+PROJECT_SUFFIX = ".lvlp"
+MAGIC = b"LVLPROJ\x00"
+VERSION = 1
+ALIGN = 64
+_HEADER = struct.Struct("<8sIIQ")  # magic, version, section count, directory offset
+_ENTRY = struct.Struct("<32s8sQQ")  # name, dtype, byte offset, item count
+_TRAVERSE_ARRAYS = ("bs", "is_", "fs", "design_rl", "kind", "source_rows")
+
+
+class ProjectFormatError(Exception):
+    """Raised for a file that is not a project or uses a newer format version."""
+
+
+class Project:
+    """Contents of a project file; any part may be None."""
+    __slots__ = ("traverse", "comparison", "metadata")
+
+    def __init__(self, traverse=None, comparison=None, metadata=None):
+        self.traverse = traverse
+        self.comparison = comparison  # (N, 2) float64 distance/elevation pairs
+        self.metadata = metadata if metadata is not None else {}
+
+    def __repr__(self):
+        return f"Project({self.traverse!r}, {0 if self.comparison is None else len(self.comparison)} comparison points)"
+
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _little_endian(values, dtype=None):
+    values = np.asarray(values, dtype=dtype)
+    return np.ascontiguousarray(values.astype(values.dtype.newbyteorder("<"), copy=False)).reshape(-1)
+
+
+def is_mapped_from(values, file_path):
+    """True if the array values is a view of a memory mapping of file_path."""
+    while isinstance(values, np.ndarray):
+        if isinstance(values, np.memmap) and values.filename:
+            return os.path.exists(file_path) and os.path.samefile(values.filename, file_path)
+        values = values.base
+    return False
+
+
+def detached(values, file_path):
+    """values, copied into memory if it is a view of file_path's mapping."""
+    return np.array(values) if is_mapped_from(values, file_path) else values
+
+
+def save_project(file_path, traverse=None, comparison=None, metadata=None):
+    """Writes a project file; the file is replaced only once it is complete.
+
+    Windows refuses to replace a file that is still mapped, so saving over
+    a project whose arrays are in use raises PermissionError there; pass
+    copies (see detached()) or drop the views first. The old file is then
+    left as it was and no .part file remains.
+    """
+    sections = {}
+    if traverse is not None:
+        labels = traverse.labels
+        if not isinstance(labels, StringTable):
+            labels = StringTable.from_strings(labels)
+        sections["labels.offsets"] = _little_endian(labels.offsets)
+        sections["labels.data"] = _little_endian(labels.data)
+        for name in _TRAVERSE_ARRAYS:
+            sections[name] = _little_endian(getattr(traverse, name))
+    if comparison is not None and len(comparison):
+        sections["comparison"] = _little_endian(comparison, np.float64)
+    sections["metadata"] = np.frombuffer(json.dumps(metadata or {}).encode("utf-8"), dtype=np.uint8)
+
+    directory_at = _aligned(_HEADER.size)
+    offset = _aligned(directory_at + _ENTRY.size * len(sections))
+    entries = []
+    for name, values in sections.items():
+        entries.append((name, values, offset))
+        offset = _aligned(offset + values.nbytes)
+    part_path = f"{file_path}.part"
+    try:
+        with open(part_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(entries), directory_at))
+            f.seek(directory_at)
+            for name, values, at in entries:
+                f.write(_ENTRY.pack(name.encode("ascii"), values.dtype.str.encode("ascii"), at, values.size))
+            for _name, values, at in entries:
+                f.seek(at)
+                f.write(values.data)
+        try:
+            os.replace(part_path, file_path)
+        except PermissionError as e:
+            raise PermissionError(e.errno, "The file is in use (a project that is still open cannot be saved over "
+                                           "on Windows); save under another name", str(file_path)) from e
+    except BaseException:
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+        raise
+
+
+def _sections(buf):
+    if buf.size < _HEADER.size:
+        raise ProjectFormatError("File is too short to be a project.")
+    magic, version, count, directory_at = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ProjectFormatError("Not a leveling project file.")
+    if version > VERSION:
+        raise ProjectFormatError(f"Project format version {version} is newer than this application supports.")
+    if directory_at < _HEADER.size or directory_at + count * _ENTRY.size > buf.size:
+        raise ProjectFormatError("Project file is truncated or its section directory is corrupt.")
+    sections = {}
+    for i in range(count):
+        name, dtype, offset, size = _ENTRY.unpack_from(buf, directory_at + i * _ENTRY.size)
+        try:
+            name = name.rstrip(b"\x00").decode("ascii")
+            dtype = np.dtype(dtype.rstrip(b"\x00").decode("ascii"))
+        except (UnicodeDecodeError, TypeError, ValueError):
+            raise ProjectFormatError(f"Section {i} of the project file is corrupt.")
+        if dtype.hasobject or dtype.itemsize == 0 or offset % ALIGN:
+            raise ProjectFormatError(f"Section {name!r} of the project file is corrupt.")
+        if offset + size * dtype.itemsize > buf.size:
+            raise ProjectFormatError("Project file is truncated.")
+        sections[name] = buf[offset:offset + size * dtype.itemsize].view(dtype)
+    return sections
+
+
+def open_project(file_path):
+    """Maps a project file read-only and returns its Project.
+
+    The traverse and comparison arrays are views of the mapping and stay
+    valid as long as they are referenced. On POSIX systems that holds even
+    if the file is saved over; Windows refuses to replace a mapped file
+    (see save_project()).
+    """
+    try:
+        buf = np.memmap(file_path, dtype=np.uint8, mode="r")
+    except ValueError:  # Empty file
+        raise ProjectFormatError("File is too short to be a project.")
+    sections = _sections(buf)
+    traverse = None
+    try:
+        if "labels.offsets" in sections:
+            labels = StringTable(sections["labels.offsets"], sections["labels.data"])
+            traverse = TraverseData(labels, *(sections[name] for name in _TRAVERSE_ARRAYS))
+            offsets = labels.offsets
+            if (not offsets.size or offsets[0] < 0 or offsets[-1] > labels.data.size or np.any(np.diff(offsets) < 0)
+                    or any(getattr(traverse, name).size != len(labels) for name in _TRAVERSE_ARRAYS)):
+                raise ValueError("traverse sections do not match")
+        comparison = sections["comparison"].reshape(-1, 2) if "comparison" in sections else None
+        metadata = json.loads(sections["metadata"].tobytes().decode("utf-8")) if "metadata" in sections else {}
+    except (KeyError, ValueError) as e:  # Missing sections, odd shapes, bad JSON
+        raise ProjectFormatError(f"Project file is corrupt: {e}")
+    return Project(traverse, comparison, metadata)
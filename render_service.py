@@ -0,0 +1,201 @@
+"""Offscreen rendering of the profile graph for exports and reports.
+
+Exports draw a GraphSnapshot (plain arrays and display settings copied from
+the graph) on a private Agg figure in a worker, instead of calling savefig
+on the live on-screen figure from the GUI thread. Rendered files are cached
+by a hash of the snapshot and the output settings, so repeated exports and
+report sections reuse the same raster.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .profile_renderer import decimate
+
+DEFAULT_DPI = 300
+DEFAULT_SIZE = (12, 8)  # Inches, as the on-screen graph
+CACHE_ENTRIES = 32
+LABEL_COUNT = 20
+
+# (figure/axes background, text and grid) per theme; set explicitly since rcParams are shared across threads
+THEMES = {
+    False: ("white", "black"),
+    True: ("black", "white"),
+}
+
+
+class GraphSnapshot:
+    """Everything needed to draw the profile graph, detached from the widgets.
+
+    comparison and polyline are (x, y) pairs or None; cut_fill is the
+    (x, ground, design) of the last cut/fill analysis, drawn shaded.
+    """
+
+    def __init__(self, x, y, line_color="royalblue", marker_color="orange", show_markers=True, label_color=None,
+                 comparison=None, comparison_color="green", polyline=None, cut_fill=None, dark=False,
+                 title="Profile Graph (Elevation vs. Point)"):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.line_color = line_color
+        self.marker_color = marker_color
+        self.show_markers = show_markers
+        self.label_color = label_color
+        self.comparison = _arrays(comparison)
+        self.comparison_color = comparison_color
+        self.polyline = _arrays(polyline)
+        self.cut_fill = _arrays(cut_fill)
+        self.dark = dark
+        self.title = title
+
+    def __repr__(self):
+        return f"GraphSnapshot({len(self.x)} points, key={self.key()[:12]})"
+
+    def key(self):
+        """Content hash of the data and display settings."""
+        digest = hashlib.sha1()
+        for array in (self.x, self.y) + sum((arrays or () for arrays in (self.comparison, self.polyline, self.cut_fill)), ()):
+            digest.update(array.tobytes())
+            digest.update(b"|")
+        digest.update(repr((self.line_color, self.marker_color, self.show_markers, self.label_color,
+                            self.comparison is not None, self.comparison_color, self.polyline is not None,
+                            self.cut_fill is not None, self.dark, self.title)).encode())
+        return digest.hexdigest()
+
+
+def _arrays(columns):
+    if columns is None:
+        return None
+    return tuple(np.asarray(column, dtype=np.float64) for column in columns)
+
+
+def render_graph(snapshot, fmt="png", dpi=DEFAULT_DPI, size=DEFAULT_SIZE):
+    """Draws snapshot on a new Agg figure and returns the encoded file as bytes.
+
+    Uses no pyplot or Qt state, so it is safe in worker threads and processes.
+    """
+    background, foreground = THEMES[bool(snapshot.dark)]
+    fig = Figure(figsize=size, facecolor=background)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111, facecolor=background)
+    x, y = snapshot.x, snapshot.y
+    columns = max(int(ax.bbox.width * dpi / fig.dpi), 1)
+    if len(x) and np.all(x[1:] >= x[:-1]):
+        x, y = decimate(x, y, x[0], x[-1], columns)
+    markers = snapshot.show_markers and len(x) <= columns
+    ax.plot(x, y, color=snapshot.line_color, linewidth=2, marker='o' if markers else None)
+    if markers:
+        ax.scatter(x, y, s=60, color=snapshot.marker_color, edgecolor='black', zorder=5)
+    if snapshot.label_color and len(snapshot.x):
+        skip = max(1, len(snapshot.x) // LABEL_COUNT) if len(snapshot.x) > 30 else 1
+        for lx, ly in zip(snapshot.x[::skip].tolist(), snapshot.y[::skip].tolist()):
+            ax.annotate(f"{ly:.2f}", (lx, ly), textcoords="offset points", xytext=(0, 8), ha='center',
+                        fontsize=8, color=snapshot.label_color)
+    if snapshot.comparison is not None:
+        ax.plot(*snapshot.comparison, color=snapshot.comparison_color, linestyle='--', linewidth=2,
+                label='Comparison Profile')
+    if snapshot.polyline is not None:
+        ax.plot(*snapshot.polyline, color='red', linestyle='-', linewidth=2, label='Design Polyline')
+    if snapshot.cut_fill is not None:
+        design_x, ground, design_y = snapshot.cut_fill
+        ax.plot(design_x, design_y, color='red', linestyle='--', linewidth=1.5, label='Design Level')
+        ax.fill_between(design_x, ground, design_y, where=(ground >= design_y), facecolor='orange', alpha=0.4,
+                        interpolate=True, label='Cut')
+        ax.fill_between(design_x, ground, design_y, where=(ground < design_y), facecolor='cyan', alpha=0.4,
+                        interpolate=True, label='Fill')
+    ax.set_xlabel("Point", fontsize=11, color=foreground)
+    ax.set_ylabel("Elevation", fontsize=11, color=foreground)
+    ax.set_title(snapshot.title, fontsize=12, fontweight='bold', color=foreground)
+    ax.tick_params(colors=foreground, which='both')
+    for spine in ax.spines.values():
+        spine.set_color(foreground)
+    ax.grid(True, linestyle='--', alpha=0.7, color=foreground)
+    ax.minorticks_on()
+    ax.grid(which='minor', linestyle=':', linewidth=0.5, alpha=0.4, color=foreground)
+    if ax.get_legend_handles_labels()[0]:
+        ax.legend()
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, facecolor=background)
+    return buffer.getvalue()
+
+
+class RenderService:
+    """Renders GraphSnapshots in the background and caches the encoded files.
+
+    The cache key is the snapshot's content hash plus the format, dpi and
+    size; equal requests in flight share one render.
+    """
+
+    def __init__(self, executor=None, max_entries=CACHE_ENTRIES):
+        self._executor = executor
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="graph-render")
+        return self._executor
+
+    def submit(self, snapshot, fmt="png", dpi=DEFAULT_DPI, size=DEFAULT_SIZE):
+        """Future for the encoded file; already done when the render is cached."""
+        key = (snapshot.key(), fmt, dpi, tuple(size))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                future = Future()
+                future.set_result(self._cache[key])
+                return future
+            if key in self._pending:
+                return self._pending[key]
+            future = self._get_executor().submit(render_graph, snapshot, fmt, dpi, size)
+            self._pending[key] = future
+        future.add_done_callback(lambda done: self._store(key, done))
+        return future
+
+    def render(self, snapshot, fmt="png", dpi=DEFAULT_DPI, size=DEFAULT_SIZE):
+        """Blocking variant of submit(); returns the encoded file."""
+        return self.submit(snapshot, fmt, dpi, size).result()
+
+    def _store(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._cache[key] = future.result()
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def cached(self, snapshot, fmt="png", dpi=DEFAULT_DPI, size=DEFAULT_SIZE):
+        with self._lock:
+            return (snapshot.key(), fmt, dpi, tuple(size)) in self._cache
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Shared by the graph widget and the report builders
+render_service = RenderService()
+
+
+def graph_image(graph, dpi=DEFAULT_DPI):
+    """PNG of a GraphSnapshot (rendered offscreen, cached) or of a matplotlib Figure, as a file-like object."""
+    if isinstance(graph, GraphSnapshot):
+        return io.BytesIO(render_service.render(graph, "png", dpi))
+    buffer = io.BytesIO()
+    graph.savefig(buffer, format="png", dpi=dpi)
+    buffer.seek(0)
+    return buffer
@@ -23,6 +23,15 @@ settings = {
     "profile_table_columns": [],
     "onboarding_complete": False,
     "follow_system_theme": True,
+    "calc_engine": "vector",
+    "auto_recalculate": False,
+    "undo_limit": 100,
+    "undo_memory_mb": 64,
+    "section_width": "",
+    "cut_side_slope": 1.0,
+    "fill_side_slope": 1.5,
+    "volume_method": "Prismoidal",
+    "show_mass_haul": False,
 }
 
 STATUS_BAR_CLEAR_DELAY = 4000
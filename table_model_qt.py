@@ -0,0 +1,486 @@
+from array import array
+from operator import itemgetter
+import numpy as np
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt6.QtWidgets import QTableView, QTableWidgetItem, QTableWidgetSelectionRange
+
+from PyQt6.QtGui import QColor
+from .traverse import RowChanges
+from .undo import CellEdit, RowsInserted, RowsRemoved, TableReset
+from .utils import is_number
+
+TEXT_ROLES = (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole)
+COLOR_ROLES = (Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole)
+# Smallest gap between the sequence numbers of inserted rows before all rows are renumbered
+SEQ_MIN_STEP = 2.0 ** -20
+# (even row, odd row, text, invalid cell) per theme; QColors are built on first paint
+THEME_COLORS = {
+    "Dark": ("#23272e", "#1a1c1e", "#f8f8f2", "#ffcccc"),
+    "Light": ("#fff", "#f0f0f0", "#222", "#ffcccc"),
+}
+
+
+def invalid_rows(column):
+    """Returns the rows of a column of strings holding text that is not a number."""
+    try:
+        # One pass of float() over the filled cells covers the common all-valid column
+        list(map(float, [text for text in column if text]))
+        return []
+    except ValueError:
+        return [row for row, text in enumerate(column) if text.strip() and not is_number(text)]
+
+
+class LevelingTableModel(QAbstractTableModel):
+    """Field book model keeping one list of cell strings per column.
+
+    Cells are answered on demand from the column lists, so a book costs one
+    string reference per cell and nothing per widget; only the rows the view
+    paints ever reach Qt. Stripe and error colors are likewise resolved at
+    paint time: the model only tracks the set of non-numeric cells in
+    numeric_columns, updated as single cells change, and the filled-cell
+    counters behind the live stats, updated by the rows each change touches.
+
+    When history is set to an UndoHistory, every change is recorded there as
+    a delta.
+
+    For saving, every row carries a stable id and a sequence number, kept in
+    flat arrays beside the columns, and the model tracks the ids of the rows
+    changed or removed since the last save; row_changes() hands them to the
+    database as upserts and deletes. Inserted rows get sequence numbers
+    between their neighbours', so inserting or removing rows leaves every
+    other row untouched.
+    """
+
+    def __init__(self, headers, row_count=0, parent=None, numeric_columns=()):
+        super().__init__(parent)
+        self._headers = list(headers)
+        self._columns = [[""] * row_count for _ in self._headers]
+        self._row_count = row_count
+        self._numeric_columns = frozenset(numeric_columns)
+        self._invalid = set()  # (row, col) of non-numeric text in numeric columns
+        self._filled = [0] * len(self._headers)  # Non-empty cells per column
+        self._filled_rows = 0  # Rows with at least one non-empty cell
+        self._theme = None
+        self._colors = None  # QColors for the theme, built lazily
+        self._cell_colors = {}  # (row, col) -> [background, foreground] overrides
+        self.history = None
+        self._next_row_id = 1
+        self._row_ids = self._new_row_ids(row_count)
+        self._row_seqs = array('d', range(row_count))
+        self._changed_ids = set()  # Rows edited or inserted since the last save
+        self._removed_ids = set()
+        self._replace = True  # The saved copy is unknown or stale as a whole
+
+    def _record(self, command):
+        if self.history is not None:
+            self.history.record(command)
+
+    # Qt model interface
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role in TEXT_ROLES:
+            return self._columns[col][row]
+        if role in COLOR_ROLES:
+            background = role == Qt.ItemDataRole.BackgroundRole
+            if self._cell_colors:
+                override = self._cell_colors.get((row, col))
+                if override is not None and override[0 if background else 1] is not None:
+                    return override[0 if background else 1]
+            colors = self._theme_colors()
+            if colors is None:
+                return None
+            if not background:
+                return colors[2]
+            if (row, col) in self._invalid:
+                return colors[3]
+            return colors[row % 2]
+        return None
+
+    def _theme_colors(self):
+        if self._colors is None and self._theme is not None:
+            names = THEME_COLORS.get(self._theme, THEME_COLORS["Light"])
+            self._colors = tuple(QColor(name) for name in names)
+        return self._colors
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role not in TEXT_ROLES:
+            return False
+        text = "" if value is None else str(value)
+        column = self._columns[index.column()]
+        old = column[index.row()]
+        if old == text:
+            return True
+        if bool(old) != bool(text):
+            row_was_filled = any(cells[index.row()] for cells in self._columns)
+            column[index.row()] = text
+            self._filled[index.column()] += 1 if text else -1
+            self._filled_rows += any(cells[index.row()] for cells in self._columns) - row_was_filled
+        else:
+            column[index.row()] = text
+        self._changed_ids.add(self._row_ids[index.row()])
+        self._record(CellEdit(index.row(), index.column(), old, text))
+        if index.column() in self._numeric_columns:
+            key = (index.row(), index.column())
+            if text.strip() and not is_number(text):
+                self._invalid.add(key)
+            else:
+                self._invalid.discard(key)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole,
+                                             Qt.ItemDataRole.BackgroundRole])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._headers[section] if 0 <= section < len(self._headers) else None
+        return str(section + 1)
+
+    def insertRows(self, row, count, parent=QModelIndex()):
+        if count <= 0 or row < 0 or row > self._row_count:
+            return False
+        self._insert(row, [[""] * count for _ in self._columns])
+        self._record(RowsInserted(row, count))
+        return True
+
+    def insert_cells(self, row, cells):
+        """Inserts rows at row holding cells, given as one list of strings per column."""
+        count = len(cells[0]) if cells else 0
+        if count <= 0 or row < 0 or row > self._row_count:
+            return False
+        self._insert(row, [list(column) for column in cells])
+        self._record(RowsInserted(row, count))
+        return True
+
+    def append_cells(self, cells):
+        """Appends rows holding cells as part of the last recorded change, e.g. a set_rows() load arriving in chunks.
+
+        Nothing new is recorded: undoing the load swaps out the columns with
+        the appended rows in them.
+        """
+        if cells and cells[0]:
+            self._insert(self._row_count, cells)
+
+    def _insert(self, row, cells):
+        count = len(cells[0])
+        self.beginInsertRows(QModelIndex(), row, row + count - 1)
+        for column, inserted in zip(self._columns, cells):
+            column[row:row] = inserted
+        self._row_count += count
+        self._insert_row_keys(row, count)
+        self._count_filled(cells, 1)
+        self._shift_cells(row, count)
+        for col in self._numeric_columns:
+            self._invalid.update((row + offset, col) for offset in invalid_rows(cells[col]))
+        self.endInsertRows()
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if count <= 0 or row < 0 or row + count > self._row_count:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        removed = [column[row:row + count] for column in self._columns]
+        self._record(RowsRemoved(row, removed))
+        self._count_filled(removed, -1)
+        for column in self._columns:
+            del column[row:row + count]
+        self._row_count -= count
+        removed_ids = self._row_ids[row:row + count]
+        self._changed_ids.difference_update(removed_ids)
+        self._removed_ids.update(removed_ids)
+        del self._row_ids[row:row + count]
+        del self._row_seqs[row:row + count]
+        self._invalid = {key for key in self._invalid if not row <= key[0] < row + count}
+        self._cell_colors = {key: colors for key, colors in self._cell_colors.items()
+                             if not row <= key[0] < row + count}
+        self._shift_cells(row + count, -count)
+        self.endRemoveRows()
+        return True
+
+    def _new_row_ids(self, count):
+        ids = array('q', range(self._next_row_id, self._next_row_id + count))
+        self._next_row_id += count
+        return ids
+
+    def _insert_row_keys(self, row, count):
+        """Gives count rows inserted at row new ids and sequence numbers between their neighbours'."""
+        seqs = self._row_seqs
+        ids = self._new_row_ids(count)
+        self._row_ids[row:row] = ids
+        self._changed_ids.update(ids)
+        low = seqs[row - 1] if row > 0 else (seqs[0] if seqs else 0.0) - count - 1
+        high = seqs[row] if row < len(seqs) else low + count + 1
+        step = (high - low) / (count + 1)
+        seqs[row:row] = array('d', (low + step * i for i in range(1, count + 1)))
+        if step < SEQ_MIN_STEP:  # Halved too often at one spot; space the whole book out again
+            self._renumber_rows()
+
+    def _renumber_rows(self):
+        """Numbers the rows 0, 1, 2...; the next save rewrites the table."""
+        self._row_seqs = array('d', range(self._row_count))
+        self._changed_ids = set()
+        self._removed_ids = set()
+        self._replace = True
+
+    def row_changes(self):
+        """RowChanges of the non-empty rows changed and the rows removed or emptied since mark_saved().
+
+        After a load, reset or renumbering, every non-empty row is returned
+        with replace set.
+        """
+        if self._replace:
+            rows = np.arange(self._row_count)
+        else:
+            ids = np.frombuffer(self._row_ids, dtype=np.int64) if self._row_count else np.zeros(0, np.int64)
+            rows = np.flatnonzero(np.isin(ids, np.fromiter(self._changed_ids, np.int64, len(self._changed_ids))))
+        changes = RowChanges(removed=self._removed_ids, replace=self._replace)
+        for row in rows.tolist():
+            cells = tuple(column[row] for column in self._columns)
+            if any(cells):
+                changes.rows.append((self._row_ids[row], self._row_seqs[row], *cells))
+            elif not self._replace:
+                changes.removed.append(self._row_ids[row])
+        return changes
+
+    def mark_saved(self):
+        """Records that the changes last returned by row_changes() were saved."""
+        self._changed_ids = set()
+        self._removed_ids = set()
+        self._replace = False
+
+    def _count_filled(self, cells, sign):
+        """Adds (sign 1) or subtracts (sign -1) the filled cells and rows of a block of rows."""
+        for col, column in enumerate(cells):
+            self._filled[col] += sign * (len(column) - column.count(""))
+        self._filled_rows += sign * sum(map(any, zip(*cells)))
+
+    def _shift_cells(self, start, delta):
+        """Moves the per-cell state of rows at or below start by delta rows."""
+        if self._invalid:
+            self._invalid = {((r + delta if r >= start else r), c) for r, c in self._invalid}
+        if self._cell_colors:
+            self._cell_colors = {((r + delta if r >= start else r), c): colors
+                                 for (r, c), colors in self._cell_colors.items()}
+
+    # Bulk access
+    def headers(self):
+        return list(self._headers)
+
+    def set_headers(self, headers):
+        if len(headers) != len(self._headers):
+            raise ValueError("The leveling table has a fixed number of columns.")
+        self._headers = list(headers)
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, len(self._headers) - 1)
+
+    def set_rows(self, rows):
+        """Replaces the whole book; rows may be ragged and hold None or non-string values."""
+        ncols = len(self._headers)
+        if set(map(len, rows)) - {ncols}:
+            rows = [row if len(row) == ncols else list(row[:ncols]) + [""] * (ncols - len(row)) for row in rows]
+        columns = [list(map(itemgetter(col), rows)) for col in range(ncols)]
+        for col, column in enumerate(columns):
+            try:
+                "".join(column)  # Fails fast unless every cell is already a string
+            except TypeError:
+                columns[col] = ["" if value is None else str(value) for value in column]
+        self._record(TableReset(self._columns, len(rows)))
+        self._reset(columns)
+
+    def _reset(self, columns):
+        self.beginResetModel()
+        self._columns = columns
+        self._row_count = len(columns[0]) if columns else 0
+        self._filled = [0] * len(self._headers)
+        self._filled_rows = 0
+        self._count_filled(columns, 1)
+        self._invalid = {(row, col) for col in self._numeric_columns for row in invalid_rows(columns[col])}
+        self._cell_colors = {}
+        self._row_ids = self._new_row_ids(self._row_count)
+        self._renumber_rows()
+        self.endResetModel()
+
+    def swap_columns(self, columns):
+        """Installs columns as the book without copying and returns the previous column lists."""
+        previous = self._columns
+        self._record(TableReset(previous, len(columns[0]) if columns else 0))
+        self._reset(columns)
+        return previous
+
+    def filled_counts(self):
+        """Returns (non-empty cells per column, rows with any non-empty cell)."""
+        return list(self._filled), self._filled_rows
+
+    def rows(self):
+        """Returns the book as a list of [point, bs, is, fs] string lists."""
+        return [list(row) for row in zip(*self._columns)]
+
+    def row(self, row):
+        return [column[row] for column in self._columns]
+
+    def column(self, col):
+        """Returns the live list of strings in col; treat it as read-only."""
+        return self._columns[col]
+
+    def text(self, row, col):
+        return self._columns[col][row]
+
+    def set_text(self, row, col, text):
+        return self.setData(self.index(row, col), text)
+
+    def set_row_count(self, count):
+        count = max(0, count)
+        if count > self._row_count:
+            self.insertRows(self._row_count, count - self._row_count)
+        elif count < self._row_count:
+            self.removeRows(count, self._row_count - count)
+
+    def clear_text(self):
+        self._record(TableReset(self._columns, self._row_count))
+        self._reset([[""] * self._row_count for _ in self._headers])
+
+    # Styling
+    def invalid_cells(self):
+        """Sorted (row, col) of the non-numeric cells in the numeric columns."""
+        return sorted(self._invalid)
+
+    def set_theme(self, theme):
+        """Selects the stripe colors; the cells repaint with them on the next paint."""
+        if theme != self._theme:
+            self._theme = theme
+            self._colors = None
+            self._repaint()
+
+    def set_cell_color(self, row, col, background=None, foreground=None):
+        colors = self._cell_colors.setdefault((row, col), [None, None])
+        if background is not None:
+            colors[0] = background
+        if foreground is not None:
+            colors[1] = foreground
+        index = self.index(row, col)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole])
+
+    def clear_cell_colors(self):
+        if self._cell_colors:
+            self._cell_colors = {}
+            self._repaint()
+
+    def _repaint(self):
+        if self._row_count:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._row_count - 1, len(self._headers) - 1),
+                                  [Qt.ItemDataRole.BackgroundRole, Qt.ItemDataRole.ForegroundRole])
+
+
+class TableCell:
+    """Lightweight stand-in for a QTableWidgetItem addressing one model cell."""
+    __slots__ = ("_model", "_row", "_col")
+
+    def __init__(self, model, row, col):
+        self._model = model
+        self._row = row
+        self._col = col
+
+    def row(self):
+        return self._row
+
+    def column(self):
+        return self._col
+
+    def text(self):
+        return self._model.text(self._row, self._col)
+
+    def setText(self, text):
+        self._model.set_text(self._row, self._col, text)
+
+    def setBackground(self, color):
+        self._model.set_cell_color(self._row, self._col, background=color)
+
+    def setForeground(self, color):
+        self._model.set_cell_color(self._row, self._col, foreground=color)
+
+
+class LevelingTableView(QTableView):
+    """QTableView over a LevelingTableModel with the QTableWidget calls the app relies on."""
+    itemChanged = pyqtSignal(object)
+    itemDoubleClicked = pyqtSignal(object)
+
+    def __init__(self, rows, headers, parent=None, numeric_columns=()):
+        super().__init__(parent)
+        self._model = LevelingTableModel(headers, rows, self, numeric_columns)
+        self.setModel(self._model)
+        self._model.dataChanged.connect(self._on_data_changed)
+        self.doubleClicked.connect(lambda index: self.itemDoubleClicked.emit(self.item(index.row(), index.column())))
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        if roles and not any(role in roles for role in TEXT_ROLES):
+            return
+        if top_left.row() == bottom_right.row() and top_left.column() == bottom_right.column():
+            self.itemChanged.emit(self.item(top_left.row(), top_left.column()))
+
+    def table_model(self):
+        return self._model
+
+    # QTableWidget compatibility
+    def rowCount(self):
+        return self._model.rowCount()
+
+    def columnCount(self):
+        return self._model.columnCount()
+
+    def setRowCount(self, count):
+        self._model.set_row_count(count)
+
+    def insertRow(self, row):
+        self._model.insertRows(row, 1)
+
+    def removeRow(self, row):
+        self._model.removeRows(row, 1)
+
+    def item(self, row, col):
+        if 0 <= row < self.rowCount() and 0 <= col < self.columnCount():
+            return TableCell(self._model, row, col)
+        return None
+
+    def setItem(self, row, col, item):
+        self._model.set_text(row, col, item.text() if hasattr(item, "text") else item)
+
+    def horizontalHeaderItem(self, col):
+        header = self._model.headerData(col, Qt.Orientation.Horizontal)
+        return QTableWidgetItem(header) if header is not None else None
+
+    def setHorizontalHeaderLabels(self, labels):
+        self._model.set_headers(labels)
+
+    def currentRow(self):
+        return self.currentIndex().row()
+
+    def selectedRanges(self):
+        ranges = []
+        for selection in self.selectionModel().selection():
+            ranges.append(QTableWidgetSelectionRange(selection.top(), selection.left(),
+                                                     selection.bottom(), selection.right()))
+        return ranges
+
+    def clear(self):
+        self._model.clear_text()
+
+    # Bulk access
+    def set_rows(self, rows):
+        self._model.set_rows(rows)
+
+    def append_cells(self, cells):
+        self._model.append_cells(cells)
+
+    def rows(self):
+        return self._model.rows()
@@ -0,0 +1,75 @@
+import sqlite3
+from pathlib import Path
+import pytest
+from leveling_app_modular.batch import BatchJob, find_field_books, main, read_field_book, report_names, run_batch, run_job
+
+BOOK = "Point,FS,IS,BS\nA,,,1.500\nB,,1.000,\nC,2.000,,0.500\nD,1.200,,\n"
+
+
+def test_reads_csv_by_header_and_databases(tmp_path):
+    (tmp_path / "named.csv").write_text(BOOK)
+    (tmp_path / "plain.csv").write_text("A,1.5,,\n\nB,,,1.2\n")
+    (tmp_path / "notes.txt").write_text("")
+    (tmp_path / "broken.db").write_text("not a database")
+    conn = sqlite3.connect(tmp_path / "profile_data.db")
+    conn.execute("CREATE TABLE profile_data (id INTEGER PRIMARY KEY, point TEXT, elevation REAL, distance REAL)")
+    conn.close()
+    conn = sqlite3.connect(tmp_path / "site.db")
+    conn.execute("CREATE TABLE leveling_data (id INTEGER PRIMARY KEY, point TEXT, bs TEXT, is_val TEXT, fs TEXT)")
+    conn.executemany("INSERT INTO leveling_data (point, bs, is_val, fs) VALUES (?, ?, ?, ?)",
+                     [("A", "1.5", None, None), ("B", None, None, "1.2")])
+    conn.commit()
+    conn.close()
+    books = find_field_books([tmp_path])
+    assert [p.name for p in books] == ["named.csv", "plain.csv", "site.db"]
+    assert read_field_book(books[0])[2] == ["C", "0.500", "", "2.000"]
+    assert read_field_book(books[1]) == [["A", "1.5", "", ""], ["B", "", "", "1.2"]]
+    assert read_field_book(books[2]) == [["A", "1.5", "", ""], ["B", "", "", "1.2"]]
+
+
+def test_job_writes_reports_and_times_stages(tmp_path):
+    (tmp_path / "book.csv").write_text(BOOK)
+    result = run_job(BatchJob(tmp_path / "book.csv", tmp_path, formats=("pdf", "xlsx"), dpi=40))
+    assert result.error is None and result.rows == 4
+    assert list(result.timings) == ["read", "calculate", "render", "pdf", "xlsx"]
+    assert all(Path(output).stat().st_size > 0 for output in result.outputs)
+    (tmp_path / "bad.csv").write_text("A,x,,\n")
+    failed = run_job(BatchJob(tmp_path / "bad.csv", tmp_path, formats=("xlsx",)))
+    assert "Row 1" in failed.error and failed.outputs == []
+
+
+def test_batch_in_process_pool(tmp_path, capsys):
+    for name in ("one", "two"):
+        (tmp_path / f"{name}.csv").write_text(BOOK)
+    jobs = [BatchJob(tmp_path / f"{name}.csv", tmp_path, method="RF", formats=("xlsx",)) for name in ("one", "two")]
+    assert sorted(Path(r.outputs[0]).name for r in run_batch(jobs, workers=2)) == ["one.xlsx", "two.xlsx"]
+    (tmp_path / "bad.csv").write_text("A,x,,\n")
+    assert main([str(tmp_path), "--out", str(tmp_path / "out"), "--format", "xlsx", "--workers", "1"]) == 1
+    assert "2/3 field books reported" in capsys.readouterr().out
+
+
+def test_empty_books_fail_without_stopping_the_batch(tmp_path, capsys):
+    (tmp_path / "book.csv").write_text(BOOK)
+    (tmp_path / "empty.csv").write_text("Point,BS,IS,FS\n")
+    conn = sqlite3.connect(tmp_path / "leveling_data.db")
+    conn.execute("CREATE TABLE leveling_data (id INTEGER PRIMARY KEY, point TEXT, bs TEXT, is_val TEXT, fs TEXT)")
+    conn.close()
+    failed = run_job(BatchJob(tmp_path / "leveling_data.db", tmp_path, formats=("xlsx",)))
+    assert failed.error == "Input validation failed: No data to calculate." and failed.outputs == []
+    assert main([str(tmp_path), "--out", str(tmp_path / "out"), "--format", "xlsx", "--workers", "1"]) == 1
+    out = capsys.readouterr().out
+    assert "FAILED empty.csv" in out and "FAILED leveling_data.db" in out
+    assert "1/3 field books reported" in out
+
+
+def test_report_names_are_unique(tmp_path):
+    books = [tmp_path / "a" / "site.csv", tmp_path / "a" / "site.db", tmp_path / "b" / "site.db", tmp_path / "c.csv"]
+    assert report_names(books) == ["site_csv", "a_site_db", "b_site_db", "c"]
+    with pytest.raises(ValueError):
+        report_names([tmp_path / "a" / "x" / "book.csv", tmp_path / "b" / "x" / "book.csv"])
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "book.csv").write_text(BOOK)
+    out = tmp_path / "out"
+    assert main([str(tmp_path / "a"), str(tmp_path / "b"), "--out", str(out), "--format", "xlsx", "--workers", "2"]) == 0
+    assert sorted(p.name for p in out.iterdir()) == ["a_book_csv.xlsx", "b_book_csv.xlsx"]
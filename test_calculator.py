@@ -0,0 +1,200 @@
+import random
+import pytest
+from leveling_app_modular.calculator import LevelingCalculator, LevelingCalculatorError, LevelingCalculationCancelled
+from leveling_app_modular.traverse import TraverseData
+
+SETTINGS = {"precision": 3}
+
+
+def random_traverse(rng, n_readings, decimals=3):
+    """Builds a valid field book: BS first, FS last, IS/CP/FS in between."""
+    def reading():
+        return f"{rng.uniform(0.0, 4.5):.{decimals}f}"
+
+    rows = [["", reading(), "", ""]]
+    last = "BS"
+    for _ in range(n_readings):
+        if last == "FS":
+            rows.append(["", reading(), "", ""])
+            last = "BS"
+        else:
+            r = rng.random()
+            if r < 0.5:
+                rows.append(["", "", reading(), ""])
+                last = "IS"
+            elif r < 0.8:
+                rows.append(["", reading(), "", reading()])
+                last = "BS"
+            elif r < 0.9 and last == "IS":
+                rows.append(["", reading(), "", ""])
+                last = "BS"
+            else:
+                rows.append(["", "", "", reading()])
+                last = "FS"
+        if rng.random() < 0.25:
+            rows[-1].append(f"{rng.uniform(95.0, 105.0):.{decimals}f}")
+    if last != "FS":
+        rows.append(["", "", "", reading()])
+    return rows
+
+
+def assert_results_agree(expected, actual, precision):
+    tolerance = 10 ** (-precision) * 1.01
+    assert len(expected) == len(actual)
+    for exp_row, act_row in zip(expected, actual):
+        assert set(exp_row) == set(act_row)
+        for key, exp_val in exp_row.items():
+            act_val = act_row[key]
+            if key == "Point":
+                assert exp_val == act_val
+            elif exp_val == "" or act_val == "":
+                assert exp_val == act_val, (key, exp_row, act_row)
+            else:
+                assert abs(float(exp_val) - float(act_val)) <= tolerance, (key, exp_row, act_row)
+
+
+@pytest.mark.parametrize("method", ["HI", "RF"])
+@pytest.mark.parametrize("precision", range(5))
+@pytest.mark.parametrize("decimals", [3, 5])
+@pytest.mark.parametrize("seed", range(25))
+def test_vector_engine_matches_scalar(method, precision, decimals, seed):
+    """Both engines show the same results, and the same arithmetic check, at every precision."""
+    rng = random.Random(seed)
+    data = random_traverse(rng, rng.randint(1, 60), decimals)
+    last_rl = rng.choice([None, round(100.0 + rng.uniform(-2.0, 2.0), decimals)])
+    settings = {"precision": precision}
+    exp_results, exp_stats = LevelingCalculator(settings, engine="scalar").calculate_leveling(method, 100.0, last_rl, data)
+    act_results, act_stats = LevelingCalculator(settings, engine="vector").calculate_leveling(method, 100.0, last_rl, data)
+    assert act_results.to_dicts() == exp_results
+    assert act_stats == exp_stats
+
+
+
+def test_hi_change_point():
+    data = [["A", "1.500", "", ""], ["B", "", "1.000", ""], ["C", "0.500", "", "2.000"], ["D", "", "", "1.200"]]
+    results, stats = LevelingCalculator(SETTINGS).calculate_leveling("HI", 100.0, None, data)
+    assert [r["RL"] for r in results] == ["100.000", "100.500", "99.500", "98.800"]
+    assert results[2]["Point"] == "C (cp)"
+    assert results[2]["HI"] == "100.000"
+    assert stats["cp"] == 1 and not stats["arith_failed"]
+
+
+def test_rf_misclosure_adjustment():
+    data = [["", "2.000", "", ""], ["", "", "", "1.000"]]
+    results, stats = LevelingCalculator(SETTINGS).calculate_leveling("RF", 50.0, 50.9, data)
+    assert results[1]["Rise"] == "1.000"
+    assert results[1]["Adjusted RL"] == "50.900"
+    assert stats["sum_rise"] == pytest.approx(1.0)
+
+
+def test_unknown_engine():
+    with pytest.raises(LevelingCalculatorError):
+        LevelingCalculator(SETTINGS, engine="gpu")
+
+
+@pytest.mark.parametrize("data", [[], [["", "", "", ""], ["A", "", "", ""]]])
+def test_empty_input_reports_one_error_dict(data):
+    calculator = LevelingCalculator(SETTINGS)
+    assert calculator.validate_input(data) == (None, [{"message": "No data to calculate.", "row": None}])
+    assert calculator.validate_input(TraverseData.from_rows(data))[1] == [{"message": "No data to calculate.", "row": None}]
+
+
+def test_validation_errors():
+    data = [["", "", "1.0", ""], ["", "abc", "", ""], ["", "-1", "", "2"], [], ["", "", "0.5", ""]]
+    reorganized, errors = LevelingCalculator(SETTINGS).validate_input(data)
+    assert reorganized is None
+    assert [e["message"] for e in errors] == [
+        "Row 1: The first entry must be a Backsight (BS) only.",
+        "Row 2: Invalid non-numeric value for BS.",
+        "Row 3: BS reading cannot be negative.",
+        "Row 5: Last reading cannot be an IS. It must be an FS.",
+    ]
+
+
+def test_validate_input_caches_parsed_readings():
+    calculator = LevelingCalculator(SETTINGS)
+    data = [["", "1.5", "", ""], ["", "", "", "1.2", "99.0"]]
+    reorganized, errors = calculator.validate_input(data)
+    assert not errors
+    traverse = calculator.traverse
+    assert calculator._traverse_for(reorganized) is traverse
+    assert traverse.display_labels() == ["1", "2"]
+    assert traverse.bs[0] == 1.5 and traverse.fs[1] == 1.2 and traverse.design_rl[1] == 99.0
+
+
+def edit_row(rng, row):
+    """Changes the readings of a row, keeping the field book valid; IS rows may be cleared."""
+    if row[2] and rng.random() < 0.3:
+        return [row[0], "", "", ""]
+    return [row[0]] + [f"{rng.uniform(0.0, 4.5):.3f}" if cell else "" for cell in row[1:4]] + row[4:]
+
+
+@pytest.mark.parametrize("method", ["HI", "RF"])
+@pytest.mark.parametrize("seed", range(10))
+def test_recalculate_row_matches_full_calculation(method, seed):
+    rng = random.Random(seed)
+    data = random_traverse(rng, rng.randint(5, 60))
+    last_rl = rng.choice([None, 100.0 + rng.uniform(-2.0, 2.0)])
+    calculator = LevelingCalculator(SETTINGS)
+    calculator.calculate_leveling(method, 100.0, last_rl, data)
+    for _ in range(5):
+        row_idx = rng.randrange(len(data))
+        data[row_idx] = edit_row(rng, data[row_idx])
+        results, stats, first_changed = calculator.recalculate_row(row_idx, data[row_idx])
+        expected, exp_stats = LevelingCalculator(SETTINGS).calculate_leveling(method, 100.0, last_rl, data)
+        assert_results_agree(expected, results, SETTINGS["precision"])
+        for key, exp_val in exp_stats.items():
+            assert stats[key] == pytest.approx(exp_val, abs=1e-9)
+        assert 0 <= first_changed < len(results)
+
+
+def test_recalculate_row_rejects_invalid_edit():
+    data = [["", "1.5", "", ""], ["", "", "1.0", ""], ["", "", "", "1.2"]]
+    calculator = LevelingCalculator(SETTINGS)
+    calculator.calculate_leveling("HI", 100.0, None, data)
+    with pytest.raises(LevelingCalculatorError) as excinfo:
+        calculator.recalculate_row(2, ["", "", "0.5", ""])
+    assert excinfo.value.errors[0]["message"] == "Row 3: Last reading cannot be an IS. It must be an FS."
+    # A rejected edit leaves the previous calculation in place
+    results, _stats, _first = calculator.recalculate_row(1, ["", "", "0.8", ""])
+    assert results[1]["RL"] == "100.700"
+
+
+def test_readjust_applies_linear_correction():
+    data = [["", "2.000", "", ""], ["", "", "1.000", ""], ["", "", "", "1.000"]]
+    calculator = LevelingCalculator(SETTINGS)
+    calculator.calculate_leveling("RF", 50.0, None, data)
+    results, stats = calculator.readjust(50.9)
+    assert [r["Adjustment"] for r in results] == ["0.000", "-0.050", "-0.100"]
+    assert results[-1]["Adjusted RL"] == "50.900"
+
+
+def test_progress_and_cancellation():
+    data = random_traverse(random.Random(7), 10000)
+    seen = []
+    calculator = LevelingCalculator(SETTINGS, progress_callback=seen.append)
+    calculator.calculate_leveling("HI", 100.0, None, data)
+    assert seen[0] == 0 and seen[-1] == 100 and seen == sorted(seen)
+    assert len(seen) > 3
+
+    def cancel_midway(percent):
+        if percent > 0:
+            calculator.cancel()
+    calculator = LevelingCalculator(SETTINGS, progress_callback=cancel_midway)
+    with pytest.raises(LevelingCalculationCancelled):
+        calculator.calculate_leveling("HI", 100.0, None, data)
+
+
+@pytest.mark.parametrize("engine", ["vector", "scalar"])
+def test_calculation_stage_reports_progress_and_cancels(engine):
+    data = random_traverse(random.Random(7), 10000)
+    seen = []
+
+    def cancel_after_validation(percent):
+        seen.append(percent)
+        if percent > 90:
+            calculator.cancel()
+    calculator = LevelingCalculator(SETTINGS, engine=engine, progress_callback=cancel_after_validation)
+    with pytest.raises(LevelingCalculationCancelled):
+        calculator.calculate_leveling("RF", 100.0, None, data)
+    assert 90 < seen[-1] < 100
@@ -0,0 +1,96 @@
+import threading
+import numpy as np
+import pytest
+from leveling_app_modular import csv_import
+from leveling_app_modular.csv_import import CsvChunkReader, ImportCancelled, column_sources, read_columns, split_ranges
+
+BOOK = 'Point,FS,BS\nA,,1.5\n\n"B\nnote",2.0,\nshort\nC,1.2,0.5\n'
+
+
+def test_chunks_mapped_columns_and_counts_bytes(tmp_path):
+    path = tmp_path / "book.csv"
+    path.write_bytes(b"\xef\xbb\xbf" + BOOK.encode())
+    sources = column_sources({"Point": 0, "BS": 2, "IS": None, "FS": 1}, ["Point", "BS", "IS", "FS"])
+    reader = CsvChunkReader(path, sources, has_header=True, chunk_rows=2)
+    chunks = list(reader)
+    assert chunks == [[["A", "B\nnote"], ["1.5", ""], ["", ""], ["", "2.0"]], [["C"], ["0.5"], [""], ["1.2"]]]
+    assert reader.rows_read == 3
+    assert reader.bytes_read == reader.total_bytes and reader.percent == 100
+
+
+def test_bounded_pending_chunks_and_cancel(tmp_path):
+    path = tmp_path / "long.csv"
+    path.write_text("".join(f"P{i},{i}\n" for i in range(100)))
+    reader = CsvChunkReader(path, [0, 1], has_header=False, chunk_rows=10, max_pending=2)
+    received = []
+
+    def consume():
+        with pytest.raises(ImportCancelled):
+            for columns in reader:
+                received.append(columns[0][0])
+
+    worker = threading.Thread(target=consume)
+    worker.start()
+    worker.join(0.5)
+    assert received == ["P0", "P10"]  # Blocked until a chunk is released
+    reader.release()
+    worker.join(0.5)
+    assert received == ["P0", "P10", "P20"]
+    reader.cancel()
+    worker.join(2)
+    assert not worker.is_alive()
+
+
+def test_read_columns_in_parallel_ranges(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_import, "PARALLEL_MIN_BYTES", 0)
+    path = tmp_path / "profile.csv"
+    path.write_bytes(b"\xef\xbb\xbfPoint,Elevation,Distance\r\n"
+                     + b"".join(f"P{i},{100 + i / 4},{'' if i % 7 else i * 5}\r\n".encode() for i in range(40)))
+    kinds = [csv_import.TEXT, csv_import.FLOAT, csv_import.FLOAT, csv_import.FLOAT]
+    points, levels, distances, empty = read_columns(path, [0, 1, 2, None], kinds, workers=2, range_bytes=64)
+    assert len(split_ranges(path, range_bytes=64)) > 5
+    assert points.tolist() == [f"P{i}" for i in range(40)]
+    assert levels[-1] == 109.75 and np.isnan(distances[1]) and distances[7] == 35 and np.isnan(empty).all()
+
+
+def test_read_columns_skips_rows_like_the_table_import(tmp_path):
+    path = tmp_path / "book.csv"
+    path.write_text(BOOK)
+    kinds = [csv_import.TEXT, csv_import.FLOAT]
+    points, bs = read_columns(path, [0, 2], kinds, range_bytes=8)  # Quoted line break: read serially
+    assert points.tolist() == ["A", "B\nnote", "C"] and bs[0] == 0.5 * 3 and np.isnan(bs[1])
+    path.write_text("A,1\n\n , \nshort\nB,x\n")
+    points, values = read_columns(path, [0, 1], kinds, has_header=False, range_bytes=4)
+    assert points.tolist() == ["A", "B"] and values[0] == 1 and np.isnan(values[1])
+
+
+def test_text_that_is_not_utf8_falls_back_to_cp1252(tmp_path):
+    path = tmp_path / "excel.csv"
+    path.write_bytes("Point,Elevation\nMüller – 1,100.5\n\"Café\",99\n".encode("cp1252"))
+    kinds = [csv_import.TEXT, csv_import.FLOAT]
+    points, levels = read_columns(path, [0, 1], kinds)
+    assert points.tolist() == ["Müller – 1", "Café"] and levels.tolist() == [100.5, 99.0]
+    path.write_bytes(b"A\x81,1\nB,2\n")  # 0x81 is unassigned in cp1252
+    assert read_columns(path, [0, 1], kinds, has_header=False)[0].tolist() == ["A\x81", "B"]
+    path.write_bytes(b"\xef\xbb\xbfPoint\n\xc3\xa9\ncaf\xe9\n")  # A UTF-8 line, then a cp1252 one
+    assert list(CsvChunkReader(path, [0])) == [[["é", "café"]]]
+
+
+def test_read_columns_reports_progress_and_cancels(tmp_path):
+    path = tmp_path / "profile.csv"
+    path.write_text("".join(f"{i},{100 + i}\n" for i in range(200)))
+    kinds = [csv_import.FLOAT, csv_import.FLOAT]
+    seen = []
+    read_columns(path, [0, 1], kinds, has_header=False, range_bytes=256, progress=seen.append)
+    assert len(seen) > 3 and seen == sorted(seen) and seen[-1] == 100
+    cancelled = threading.Event()
+
+    def cancel_halfway(percent):
+        seen.append(percent)
+        if percent >= 50:
+            cancelled.set()
+    seen.clear()
+    with pytest.raises(ImportCancelled):
+        read_columns(path, [0, 1], kinds, has_header=False, range_bytes=256, progress=cancel_halfway,
+                     cancelled=cancelled)
+    assert 50 <= seen[-1] < 100
@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+import pytest
+from leveling_app_modular.db import ConnectionPool, DatabaseManager, cell_text, read_leveling_rows
+from leveling_app_modular.traverse import RowChanges
+
+ROWS = [["A", "1.5", "", ""], ["", "", "", ""], ["B", "", "", "1.2"]]
+
+
+def test_pool_keeps_one_connection_per_file_and_thread(tmp_path):
+    pool = ConnectionPool()
+    conn = pool.connection(tmp_path / "a.db")
+    assert pool.connection(str(tmp_path / "a.db")) is conn
+    assert pool.connection(tmp_path / "b.db") is not conn
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(pool.connection, tmp_path / "a.db").result() is not conn
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert conn.execute("PRAGMA synchronous").fetchone() == (1,)  # NORMAL
+    pool.close()
+    assert pool.connection(tmp_path / "a.db") is not conn
+
+
+def test_manager_saves_from_worker_threads(tmp_path):
+    db = DatabaseManager(tmp_path / "leveling.db", tmp_path / "profile.db")
+    with ThreadPoolExecutor(2) as executor:
+        assert executor.submit(db.save_leveling_data, ROWS).result()
+        assert db.load_leveling_data() == [("A", 1.5, None, None), ("B", None, None, 1.2)]
+        futures = [executor.submit(db.save_profile_data, [{"point": "A", "elevation": str(i)}]) for i in range(4)]
+        assert all(f.result() for f in futures)
+    assert len(db.load_profile_data()) == 1
+    db.close()
+    assert DatabaseManager(tmp_path / "leveling.db", tmp_path / "profile.db").load_leveling_data()[1][0] == "B"
+
+
+def test_rows_keep_ids_and_old_tables_gain_a_sequence(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.db")  # A database from before row sequences
+    conn.execute("CREATE TABLE leveling_data (id INTEGER PRIMARY KEY, point TEXT, bs TEXT, is_val TEXT, fs TEXT)")
+    conn.executemany("INSERT INTO leveling_data (point, bs, is_val, fs) VALUES (?, ?, ?, ?)", [("A", "1", "", ""), ("B", "", "", "2")])
+    conn.commit()
+    conn.close()
+    assert read_leveling_rows(tmp_path / "old.db")[1][0] == "B"
+    db = DatabaseManager(tmp_path / "old.db", tmp_path / "profile.db")
+    assert db.load_leveling_data() == [("A", 1.0, None, None), ("B", None, None, 2.0)]
+
+    conn = db._pool.connection(tmp_path / "old.db")
+    written = conn.total_changes
+    db.save_leveling_data([["A", "1", "", ""], ["B", "", "", "2.5"], ["C", "", "", ""]])
+    assert conn.total_changes - written == 3  # B updated, C added and given its setup
+    db.save_leveling_data(RowChanges([(9, 0.5, "M", "", "", "")], removed=[1]))  # A (seq 1) out, M before B (seq 2)
+    assert conn.execute("SELECT id, point FROM leveling_data ORDER BY seq").fetchall() == [(9, "M"), (2, "B"), (3, "C")]
+    assert db.load_leveling_data() == [("M", None, None, None), ("B", None, None, 2.5), ("C", None, None, None)]
+
+
+def test_typed_rows_answer_range_and_setup_queries_per_job(tmp_path):
+    site = DatabaseManager(tmp_path / "leveling.db", tmp_path / "profile.db", job_id="site")
+    other = DatabaseManager(tmp_path / "leveling.db", tmp_path / "profile.db", job_id="other")
+    site.save_leveling_data([["BM", "1.5", "", "", 0], ["A", "", " 0.8", "", 1200], ["CP", "1.1", "", "0.9", 1500],
+                             ["B", "", "", "x", 1800], ["C", "", "", "1.3", "2100"]])
+    other.save_leveling_data([["Z", "2.0", "", "", 1300]])
+    assert site.load_leveling_between(1200, 1800) == [("A", None, 0.8, None, 1200.0), ("CP", 1.1, None, 0.9, 1500.0),
+                                                      ("B", None, None, "x", 1800.0)]
+    assert [row[0] for row in other.load_leveling_between(0, 5000)] == ["Z"]
+    assert [row[0] for row in site.load_setup(3)] == ["CP", "B", "C"]  # Opened by CP, row 3
+    conn = site._pool.connection(site.db_file)
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT point, bs, is_val, fs, chainage FROM leveling_data"
+                        " WHERE job_id = 'site' AND chainage BETWEEN 1200 AND 1800 ORDER BY chainage").fetchall()
+    assert "COVERING INDEX leveling_data_chainage" in plan[0][3]
+
+    site.save_profile_data([{"point": "A", "elevation": "101.25", "distance": "1250"}, {"point": "B", "elevation": 99.5, "distance": 1900}])
+    assert site.load_profile_between(1200, 1800) == [("A", 101.25, 1250.0)]
+    assert other.load_profile_data() == []
+
+    conn.execute("PRAGMA user_version = 99")
+    with pytest.raises(sqlite3.DatabaseError):
+        DatabaseManager(tmp_path / "leveling.db", tmp_path / "profile.db")
+
+
+def test_chainages_come_from_point_labels_and_cells_read_back_as_entered(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.db")
+    conn.execute("CREATE TABLE leveling_data (id INTEGER PRIMARY KEY, point TEXT, bs TEXT, is_val TEXT, fs TEXT)")
+    conn.execute("INSERT INTO leveling_data (point, bs, is_val, fs) VALUES ('250 BM', '1.5', '', '')")
+    conn.commit()
+    conn.close()
+    db = DatabaseManager(tmp_path / "old.db", tmp_path / "profile.db")
+    assert db.load_leveling_between(0, 1000) == [("250 BM", 1.5, None, None, 250.0)]  # Filled in by the migration
+
+    db.save_leveling_data([["1200 CP", "1.5", "", ""], ["A", "", "0.8", ""], ["1800", "", "", "1.2"]])
+    assert [row[::4] for row in db.load_leveling_between(0, 5000)] == [("1200 CP", 1200.0), ("1800", 1800.0)]
+    db.save_leveling_data(RowChanges([(2, 1.0, "1500.5", "", "0.8", "")]))  # A renamed to a chainage
+    assert [row[4] for row in db.load_leveling_between(0, 5000)] == [1200.0, 1500.5, 1800.0]
+    db.save_leveling_data(RowChanges([(1, 0.0, "BM", "1.5", "", ""), (3, 2.0, "C", "", "", "1.2")], replace=True))
+    assert db.load_leveling_between(-5000, 5000) == []
+
+    assert [cell_text(value) for value in (1.5, 1.2345, -0.1, 100.0, None, "x")] == ["1.500", "1.2345", "-0.100", "100.000", "", "x"]
+    assert cell_text(1.5, 1) == "1.5" and cell_text(0.1 + 0.2, 3) == repr(0.1 + 0.2)
+
+
+def test_files_opened_by_path_are_left_untouched(tmp_path):
+    path = tmp_path / "picked.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE leveling_data (id INTEGER PRIMARY KEY, point TEXT, bs TEXT, is_val TEXT, fs TEXT)")
+    conn.execute("INSERT INTO leveling_data (point, bs, is_val, fs) VALUES ('A', '1.5', '', '')")
+    conn.commit()
+    conn.close()
+    db = DatabaseManager(tmp_path / "leveling.db", tmp_path / "profile.db")
+    assert db.load_leveling_data(path) == [("A", "1.5", "", "")]
+    path.chmod(0o444)
+    assert db.load_leveling_data(path) == [("A", "1.5", "", "")]
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("picked")) == ["picked.db"]
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+    conn.close()
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from leveling_app_modular.earthwork import CutFillProfile, EarthworkVolumes, SectionTemplate, cut_fill_segments
+
+
+def loop_cut_fill(x, ground, design):
+    """Segment-by-segment reference the vectorized kernel replaced."""
+    cut, fill = [], []
+    for i in range(1, len(x)):
+        x0, x1 = x[i - 1], x[i]
+        h0, h1 = ground[i - 1] - design[i - 1], ground[i] - design[i]
+        width = abs(x1 - x0)
+        if h0 * h1 >= 0:
+            area = 0.5 * (h0 + h1) * width
+            cut.append(max(area, 0.0))
+            fill.append(max(-area, 0.0))
+        else:
+            x_cross = x0 - h0 * (x1 - x0) / (h1 - h0)
+            parts = (0.5 * h0 * (x_cross - x0), 0.5 * h1 * (x1 - x_cross))
+            cut.append(sum(a for a in parts if a > 0))
+            fill.append(sum(-a for a in parts if a < 0))
+    return np.array(cut), np.array(fill)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_kernel_matches_segment_loop(seed):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(0.5, 20.0, 300))
+    ground = 100 + np.cumsum(rng.normal(0, 0.5, 300))
+    design = np.linspace(ground[0], ground[-1], 300)
+    design[::7] = ground[::7]  # Stations exactly on the design line
+    cut, fill, crossings = cut_fill_segments(x, ground, design)
+    exp_cut, exp_fill = loop_cut_fill(x, ground, design)
+    np.testing.assert_allclose(cut, exp_cut, atol=1e-9)
+    np.testing.assert_allclose(fill, exp_fill, atol=1e-9)
+    assert np.all((crossings >= x[0]) & (crossings <= x[-1]))
+
+
+def test_profile_cumulative_arrays():
+    profile = CutFillProfile([0, 10, 20], [1.0, -1.0, -1.0], [0.0, 0.0, 0.0])
+    assert profile.crossings.tolist() == [5.0]
+    assert profile.cut.tolist() == [2.5, 0.0]
+    assert profile.fill.tolist() == [2.5, 10.0]
+    assert profile.cumulative_fill.tolist() == [0.0, 2.5, 12.5]
+    assert profile.net.tolist() == [0.0, 0.0, -10.0]
+    assert profile.rows(1)[1] == ["10.0", "-1.0", "0.0", "2.5", "2.5", "2.5", "2.5", "0.0"]
+    with pytest.raises(ValueError):
+        CutFillProfile([0.0], [1.0], [1.0])
+
+
+def test_volumes_of_constant_section():
+    volumes = EarthworkVolumes([0, 20, 40], [101, 101, 99], [100, 100, 100], SectionTemplate(10, 1.0, 2.0))
+    assert volumes.cut_area.tolist() == [11.0, 11.0, 0.0]
+    assert volumes.fill_area.tolist() == [0.0, 0.0, 12.0]
+    assert volumes.cut_volume[0] == pytest.approx(220.0)
+    assert volumes.mass[1] == pytest.approx(220.0)
+
+
+@pytest.mark.parametrize("method, expected", [("Prismoidal", 10 / 3), ("Average End Area", 5.0)])
+def test_volumes_split_at_crossing(method, expected):
+    # Zero-width section, area = depth ** 2; depth falls linearly from 1 to 0 over 10 units
+    volumes = EarthworkVolumes([0, 20], [1.0, -1.0], [0.0, 0.0], SectionTemplate(0.0, 1.0, 1.0), method)
+    assert volumes.cut_volume[0] == pytest.approx(expected)
+    assert volumes.fill_volume[0] == pytest.approx(expected)
+    assert volumes.mass[-1] == pytest.approx(0.0)
+
+
+def test_prismoidal_matches_fine_integration():
+    rng = np.random.default_rng(11)
+    x = np.cumsum(rng.uniform(5, 25, 40))
+    ground = 100 + np.cumsum(rng.normal(0, 0.8, 40))
+    design = np.linspace(ground[0], ground[-1], 40)
+    widths = rng.uniform(6, 12, 40)
+    volumes = EarthworkVolumes(x, ground, design, SectionTemplate(widths, 1.0, 1.5), bulking_factor=1.2)
+    fine_x = np.linspace(x[0], x[-1], 400001)
+    h = np.interp(fine_x, x, ground - design)
+    w = np.interp(fine_x, x, widths)
+    cut = np.maximum(h, 0) * (w + 1.0 * np.maximum(h, 0))
+    assert volumes.total_cut == pytest.approx(np.sum(0.5 * (cut[1:] + cut[:-1]) * np.diff(fine_x)), rel=1e-6)
+    assert volumes.mass[-1] == pytest.approx(volumes.total_cut * 1.2 - volumes.total_fill)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+PyPDF2 = pytest.importorskip("PyPDF2")
+from leveling_app_modular.calculator import LevelingCalculator
+from leveling_app_modular.pdf_report import ReportBuilder, ReportCancelled, ReportData
+from leveling_app_modular.render_service import GraphSnapshot
+
+DATA = [["A", "1.500", "", ""], ["B", "", "1.000", ""], ["C", "0.500", "", "2.000"], ["D", "", "", "1.200"]]
+
+
+def report_data(graph=True):
+    results, _stats = LevelingCalculator({"precision": 3}).calculate_leveling("HI", 100.0, None, DATA)
+    snapshot = GraphSnapshot(np.arange(4.0), results.adjusted_rl) if graph else None
+    return ReportData.from_result(results, snapshot)
+
+
+def test_professional_report_written_once_with_metadata_and_password(tmp_path):
+    stages = []
+    target = tmp_path / "report.pdf"
+    builder = ReportBuilder(report_data(), professional=True, progress=lambda percent, stage: stages.append(percent),
+                            project_name="Road 7", surveyor="R. Level", metadata="leveling, road",
+                            password="secret", sections={"toc": True, "calc_details": True})
+    assert builder.write(str(target)) == str(target)
+    assert stages == sorted(stages) and stages[-1] == 100
+    assert [p.name for p in tmp_path.iterdir()] == ["report.pdf"]
+    reader = PyPDF2.PdfReader(str(target))
+    assert reader.is_encrypted
+    reader.decrypt("secret")
+    assert len(reader.pages) >= 5
+    assert reader.metadata.title == "Road 7" and reader.metadata.author == "R. Level"
+
+
+def test_simple_report_from_table_rows(tmp_path):
+    data = ReportData(["Point", "RL"], [["A", "100.000"], ["B", "99.500"]], graph=None)
+    assert data.method == "RF" and data.stats == {}
+    target = tmp_path / "simple.pdf"
+    ReportBuilder(data).write(str(target))
+    reader = PyPDF2.PdfReader(str(target))
+    assert not reader.is_encrypted
+    assert "99.500" in reader.pages[-1].extract_text()
+
+
+def test_cancel_leaves_no_file(tmp_path):
+    builder = ReportBuilder(report_data(graph=False))
+    builder._progress = lambda percent, stage: builder.cancel() if stage == "Results table" else None
+    with pytest.raises(ReportCancelled):
+        builder.write(str(tmp_path / "cancelled.pdf"))
+    assert list(tmp_path.iterdir()) == []
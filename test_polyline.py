@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from leveling_app_modular.polyline import DesignPolyline
+
+
+def test_vertices_stay_sorted():
+    polyline = DesignPolyline()
+    for x, y in [(20.0, 1.0), (0.0, 3.0), (10.0, 2.0)]:
+        polyline.add(x, y)
+    assert polyline.vertices == ((0.0, 3.0), (10.0, 2.0), (20.0, 1.0))
+    assert polyline.last_added == (10.0, 2.0)
+    assert polyline.remove_nearest(9.0, 2.5) == (10.0, 2.0)
+    assert polyline.last_added is None
+    assert list(polyline) == [(0.0, 3.0), (20.0, 1.0)]
+
+
+def test_spline_and_curve_cached_until_vertices_change():
+    polyline = DesignPolyline([(0.0, 0.0), (10.0, 5.0), (20.0, 0.0)])
+    spline = polyline.spline()
+    curve = polyline.curve(0.5)
+    assert polyline.spline() is spline
+    assert polyline.curve(0.5) is curve
+    assert polyline.curve(0.25) is not curve
+    x, y, smoothed = curve
+    assert smoothed and len(x) == 100
+    assert y[0] == pytest.approx(0.0) and y[-1] == pytest.approx(0.0)
+    polyline.add(30.0, 1.0)
+    assert polyline.spline() is not spline
+    np.testing.assert_allclose(polyline.levels(np.array([5.0, 25.0])), [2.5, 0.5])
+
+
+def test_linear_when_spline_cannot_be_fitted():
+    polyline = DesignPolyline([(0.0, 0.0), (10.0, 1.0), (10.0, 2.0)])
+    assert polyline.spline() is None
+    x, y, smoothed = polyline.curve(1.0)
+    assert not smoothed and x.tolist() == [0.0, 10.0, 10.0]
@@ -0,0 +1,93 @@
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+import pytest
+from leveling_app_modular.profile_renderer import ProfileIndex, ProfileRenderer, decimate
+
+
+def make_renderer():
+    fig = Figure()
+    ax = fig.add_subplot(111)
+    return ProfileRenderer(fig, ax, FigureCanvasAgg(fig))
+
+
+def test_artists_are_reused_across_updates():
+    renderer = make_renderer()
+    x = np.arange(5.0)
+    assert renderer.set_profile(x, x * 2)
+    assert not renderer.set_profile(x.copy(), x * 2)
+    lines = list(renderer.ax.lines)
+    renderer.set_texts("values", [(0, 0, "a", 0), (1, 2, "b", 0)], "red")
+    pool = list(renderer.ax.texts)
+    renderer.set_texts("values", [(3, 6, "c", 0)], "blue")
+    renderer.set_profile(x, x * 3)
+    renderer.draw()
+    assert list(renderer.ax.lines) == lines
+    assert list(renderer.ax.texts) == pool
+    assert [t.get_text() for t in pool if t.get_visible()] == ["c"]
+
+
+def test_transient_artists_are_removed():
+    renderer = make_renderer()
+    renderer.add_transient(renderer.ax.axhline(1.0, label="Design Level"))
+    renderer.update_legend()
+    assert [t.get_text() for t in renderer.ax.get_legend().get_texts()] == ["Design Level"]
+    renderer.clear_transient()
+    renderer.update_legend()
+    assert renderer.ax.get_legend() is None
+    assert len(renderer.ax.lines) == 6
+
+
+def test_decimate_keeps_extremes_per_column():
+    rng = np.random.default_rng(3)
+    x = np.arange(100000.0)
+    y = rng.normal(size=x.size)
+    dx, dy = decimate(x, y, 1000.0, 51000.0, 100)
+    assert len(dx) <= 4 * 100 + 2
+    assert dx[0] == 999.0 and dx[-1] == 51001.0
+    assert np.all(np.diff(dx) > 0)
+    visible = y[999:51002]
+    assert dy.max() == visible.max() and dy.min() == visible.min()
+    short_x, short_y = decimate(x[:50], y[:50], 0.0, 49.0, 100)
+    assert np.array_equal(short_x, x[:50])
+
+
+def test_profile_line_follows_the_view():
+    renderer = make_renderer()
+    x = np.arange(200000.0)
+    renderer.set_profile(x, np.sin(x / 100))
+    renderer.set_markers(True, "blue")
+    renderer.autoscale()
+    assert len(renderer.profile_line.get_xdata()) < 4000
+    assert len(renderer.markers.get_offsets()) == 0
+    renderer.ax.set_xlim(10.0, 60.0)
+    assert renderer.profile_line.get_xdata()[0] == 9.0
+    assert len(renderer.markers.get_offsets()) == 53
+
+
+def test_profile_index_matches_interpolation():
+    rng = np.random.default_rng(5)
+    x = rng.uniform(0, 100, 500)
+    y = rng.normal(100, 2, 500)
+    index = ProfileIndex(x, y)
+    order = np.argsort(x)
+    for q in rng.uniform(-10, 110, 50):
+        elevation, _grade = index.locate(q)
+        assert elevation == pytest.approx(np.interp(q, x[order], y[order]))
+    flat = ProfileIndex(np.array([0.0, 10.0, 10.0, 20.0]), np.array([1.0, 2.0, 3.0, 3.0]))
+    assert flat.locate(5.0) == (1.5, 10.0)
+    assert flat.locate(15.0) == (3.0, 0.0)
+    assert ProfileIndex(np.empty(0), np.empty(0)).locate(1.0) == (None, None)
+
+
+def test_index_rebuilt_on_data_change():
+    renderer = make_renderer()
+    x = np.arange(3.0)
+    renderer.set_profile(x, x)
+    index = renderer.index
+    renderer.set_profile(x.copy(), x.copy())
+    assert renderer.index is index
+    renderer.set_profile(x, x * 2)
+    assert renderer.index.locate(1.5) == (3.0, 200.0)
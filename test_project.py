@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pytest
+from leveling_app_modular.calculator import LevelingCalculator
+from leveling_app_modular.project import ALIGN, _ENTRY, _HEADER, _TRAVERSE_ARRAYS, ProjectFormatError, detached, is_mapped_from, open_project, save_project
+from leveling_app_modular.traverse import StringTable, TraverseData
+
+ROWS = [["BM1", "1.5", "", "", "100.2"], ["", "", "", ""], ["Ä", "", "1.0", ""], ["C", "0.5", "", "2.0"], ["", "", "", "1.2"]]
+
+
+def test_round_trip_maps_arrays_without_copying(tmp_path):
+    path = tmp_path / "site.lvlp"
+    comparison = np.array([[0.0, 100.0], [10.0, 100.5]])
+    save_project(path, TraverseData.from_rows(ROWS), comparison, {"method": "RF", "first_rl": "100"})
+    project = open_project(path)
+    traverse = project.traverse
+    assert isinstance(traverse.labels, StringTable) and list(traverse.labels) == ["BM1", "Ä", "C", ""]
+    assert traverse.labels[1] == "Ä" and traverse.labels[-1] == "" and traverse.labels[1:3] == ["Ä", "C"]
+    assert traverse.source_rows.tolist() == [0, 2, 3, 4] and traverse.design_rl[0] == 100.2
+    assert isinstance(traverse.bs.base, np.memmap) and not traverse.bs.flags.writeable
+    assert np.array_equal(project.comparison, comparison) and project.metadata["method"] == "RF"
+    assert traverse.to_columns()[:4] == [["BM1", "", "Ä", "C", ""], ["1.5", "", "", "0.5", ""],
+                                         ["", "", "1.0", "", ""], ["", "", "", "2.0", "1.2"]]
+
+    mapped, _ = LevelingCalculator({"precision": 3}).calculate_leveling("RF", 100.0, None, traverse)
+    parsed, _ = LevelingCalculator({"precision": 3}).calculate_leveling("RF", 100.0, None, ROWS)
+    assert mapped.to_dicts() == parsed.to_dicts()
+
+    save_project(path, traverse)  # Saving over the mapped file leaves the open views intact
+    assert traverse.labels[1] == "Ä" and open_project(path).comparison is None
+
+
+def test_rejects_other_files(tmp_path):
+    for name, content in (("empty.lvlp", b""), ("book.lvlp", b"Point,BS,IS,FS\n" * 10)):
+        (tmp_path / name).write_bytes(content)
+        with pytest.raises(ProjectFormatError):
+            open_project(tmp_path / name)
+
+
+def test_failed_save_keeps_the_old_file_and_removes_the_part_file(tmp_path, monkeypatch):
+    path = tmp_path / "site.lvlp"
+    comparison = np.array([[0.0, 100.0], [10.0, 100.5]])
+    save_project(path, comparison=comparison)
+    mapped = open_project(path).comparison
+    assert is_mapped_from(mapped, path) and not is_mapped_from(detached(mapped, path), path)
+    assert detached(comparison, path) is comparison
+
+    def locked(src, dst):  # What Windows does while the file is still mapped
+        raise PermissionError(13, "Access is denied", str(dst))
+    monkeypatch.setattr(os, "replace", locked)
+    with pytest.raises(PermissionError, match="in use"):
+        save_project(path, TraverseData.from_rows(ROWS))
+    assert [p.name for p in tmp_path.iterdir()] == ["site.lvlp"]
+    assert open_project(path).traverse is None and np.array_equal(mapped, comparison)
+
+
+def test_rejects_corrupted_projects(tmp_path):
+    path = tmp_path / "site.lvlp"
+    save_project(path, TraverseData.from_rows(ROWS), np.array([[0.0, 100.0]]), {"method": "RF"})
+    good = path.read_bytes()
+    directory_at = _HEADER.unpack_from(good)[3]
+
+    def entry_field(i, field):  # Byte offset of a field of directory entry i
+        return directory_at + i * _ENTRY.size + (0, 32, 40, 48)[field]
+
+    corruptions = [
+        (16, (10 ** 9).to_bytes(8, "little")),  # Directory beyond the end of the file
+        (12, (10 ** 6).to_bytes(4, "little")),  # Section count
+        (entry_field(0, 0), b"\xff" * 32),  # Name is not ASCII
+        (entry_field(0, 1), b"<f17\x00\x00\x00\x00"),  # Unknown dtype
+        (entry_field(0, 1), b"|O\x00\x00\x00\x00\x00\x00"),  # Object dtype
+        (entry_field(0, 2), (ALIGN + 1).to_bytes(8, "little")),  # Misaligned offset
+        (entry_field(2, 3), (1).to_bytes(8, "little")),  # bs shorter than the labels
+        (entry_field(0, 3), (0).to_bytes(8, "little")),  # Empty label offsets
+        (entry_field(len(_TRAVERSE_ARRAYS) + 2, 3), (3).to_bytes(8, "little")),  # Odd comparison length
+        (len(good) - 2, b"\xff\xff"),  # Metadata is not JSON
+    ]
+    for at, patch in corruptions:
+        (tmp_path / "bad.lvlp").write_bytes(good[:at] + patch + good[at + len(patch):])
+        with pytest.raises(ProjectFormatError):
+            open_project(tmp_path / "bad.lvlp")
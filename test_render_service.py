@@ -0,0 +1,41 @@
+import threading
+import numpy as np
+from leveling_app_modular import render_service as rs
+from leveling_app_modular.render_service import GraphSnapshot, RenderService
+
+PNG_MAGIC = b"\x89PNG"
+
+
+def snapshot(**kwargs):
+    x = np.arange(50.0)
+    return GraphSnapshot(x, 100 + np.sin(x / 5), **kwargs)
+
+
+def test_key_follows_content_and_settings():
+    assert snapshot().key() == snapshot().key()
+    assert snapshot().key() != snapshot(line_color="red").key()
+    assert snapshot().key() != snapshot(cut_fill=(np.arange(50.0), np.zeros(50), np.ones(50))).key()
+
+
+def test_renders_offscreen_and_caches(monkeypatch):
+    calls = []
+    render = rs.render_graph
+    monkeypatch.setattr(rs, "render_graph", lambda *args: calls.append(threading.current_thread().name) or render(*args))
+    service = RenderService()
+    try:
+        first = service.render(snapshot(label_color="darkred"), "png", 40, (4, 3))
+        again = service.submit(snapshot(label_color="darkred"), "png", 40, (4, 3))
+        assert again.done() and again.result() == first
+        assert first.startswith(PNG_MAGIC)
+        assert len(calls) == 1 and calls[0] != threading.current_thread().name
+        service.render(snapshot(label_color="darkred"), "png", 60, (4, 3))
+        assert len(calls) == 2
+    finally:
+        service.shutdown()
+
+
+def test_dark_snapshot_with_overlays():
+    x = np.arange(10.0)
+    data = rs.render_graph(GraphSnapshot(x, x, comparison=(x, x + 1), polyline=(x, x - 1),
+                                         cut_fill=(x, x, np.full(10, 4.5)), dark=True), "png", 30, (4, 3))
+    assert data.startswith(PNG_MAGIC)
@@ -0,0 +1,126 @@
+import os
+import pytest
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QApplication
+from leveling_app_modular.db import DatabaseManager, typed_cell
+from leveling_app_modular.table_model_qt import LevelingTableModel, LevelingTableView
+
+HEADERS = ["Point", "BS", "IS", "FS"]
+
+
+@pytest.fixture(scope="session")
+def app(request):
+    """Session-wide Qt Application."""
+    q_app = QApplication.instance()
+    if q_app is None:
+        q_app = QApplication([])
+    return q_app
+
+
+def test_model_stores_columns(app):
+    model = LevelingTableModel(HEADERS)
+    model.set_rows([("A", "1.5", None, ""), ["B"], ["C", "", "", 2.25, "extra"]])
+    assert model.rowCount() == 3
+    assert model.column(3) == ["", "", "2.25"]
+    assert model.rows() == [["A", "1.5", "", ""], ["B", "", "", ""], ["C", "", "", "2.25"]]
+    assert model.data(model.index(0, 1)) == "1.5"
+    assert model.headerData(2, Qt.Orientation.Horizontal) == "IS"
+
+
+def test_row_edits(app):
+    model = LevelingTableModel(HEADERS, 2)
+    model.set_text(1, 1, "1.0")
+    model.insertRows(0, 1)
+    model.set_cell_color(2, 1, background=QColor("#ffcccc"))
+    assert model.rows() == [["", "", "", ""], ["", "", "", ""], ["", "1.0", "", ""]]
+    model.removeRows(0, 1)
+    assert model.data(model.index(1, 1), Qt.ItemDataRole.BackgroundRole) == QColor("#ffcccc")
+    model.set_row_count(4)
+    model.insert_cells(1, [["P"], ["2"], [""], [""]])
+    assert model.rows() == [["", "", "", ""], ["P", "2", "", ""], ["", "1.0", "", ""], ["", "", "", ""], ["", "", "", ""]]
+
+
+def test_view_emits_item_changed_like_table_widget(app):
+    view = LevelingTableView(3, HEADERS)
+    changed = []
+    view.itemChanged.connect(lambda item: changed.append((item.row(), item.column(), item.text())))
+    view.item(1, 2).setText("0.75")
+    view.item(1, 2).setText("0.75")  # Unchanged text is not reported again
+    view.blockSignals(True)
+    view.item(0, 0).setText("A")
+    view.blockSignals(False)
+    view.set_rows([["P", "1", "", ""]])
+    assert changed == [(1, 2, "0.75")]
+    assert view.rowCount() == 1 and view.item(0, 0).text() == "P"
+    assert view.horizontalHeaderItem(1).text() == "BS"
+    assert view.item(1, 0) is None
+
+
+def test_invalid_cells_follow_edits(app):
+    model = LevelingTableModel(HEADERS, parent=None, numeric_columns=(1, 2, 3))
+    model.set_rows([["A", "1.5", "", ""], ["x", "abc", "", " "], ["B", "", "", "1e"]])
+    assert model.invalid_cells() == [(1, 1), (2, 3)]
+    model.set_text(1, 1, "2.0")
+    model.set_text(0, 0, "not checked")
+    model.insertRows(0, 2)
+    assert model.invalid_cells() == [(4, 3)]
+    model.removeRows(4, 1)
+    assert model.invalid_cells() == []
+
+
+def test_colors_resolved_per_theme(app):
+    background = Qt.ItemDataRole.BackgroundRole
+    model = LevelingTableModel(HEADERS, 2, numeric_columns=(1,))
+    assert model.data(model.index(0, 1), background) is None
+    model.set_theme("Dark")
+    model.set_text(1, 1, "?")
+    assert model.data(model.index(0, 1), background) == QColor("#23272e")
+    assert model.data(model.index(1, 0), background) == QColor("#1a1c1e")
+    assert model.data(model.index(1, 1), background) == QColor("#ffcccc")
+    model.set_theme("Light")
+    assert model.data(model.index(0, 0), Qt.ItemDataRole.ForegroundRole) == QColor("#222")
+
+
+def test_filled_counts_follow_changes(app):
+    model = LevelingTableModel(HEADERS)
+    model.set_rows([["A", "1.5", "", ""], ["", "", "", ""], ["B", "", "0.5", "1.0"]])
+    assert model.filled_counts() == ([2, 1, 1, 1], 2)
+    model.set_text(1, 2, "0.7")
+    model.set_text(0, 1, "1.6")
+    model.set_text(2, 0, "")
+    assert model.filled_counts() == ([1, 1, 2, 1], 3)
+    model.insert_cells(0, [["C", ""], ["", ""], ["", ""], ["2", ""]])
+    model.removeRows(3, 2)
+    assert model.filled_counts() == ([2, 1, 0, 1], 2)
+    assert model.filled_counts()[0] == [len(model.column(c)) - model.column(c).count("") for c in range(4)]
+
+
+def test_row_changes_save_only_edited_rows(app, tmp_path):
+    db = DatabaseManager(tmp_path / "leveling.db", tmp_path / "profile.db")
+    model = LevelingTableModel(HEADERS)
+    model.set_rows([["A", "1.5", "", ""], ["B", "", "", "1.0"], ["C", "", "", "2.0"], ["D", "0.5", "", ""]])
+    changes = model.row_changes()
+    assert changes.replace and len(changes.rows) == 4
+    db.save_leveling_data(changes)
+    model.mark_saved()
+
+    model.set_text(0, 1, "1.6")
+    model.insert_cells(2, [["X"], [""], ["0.3"], [""]])
+    model.insertRows(0, 1)  # Stays empty, so it is never saved
+    model.removeRows(4, 1)  # C
+    model.set_text(4, 0, "")  # D emptied
+    model.set_text(4, 1, "")
+    changes = model.row_changes()
+    assert not changes.replace and [row[2] for row in changes.rows] == ["A", "X"] and len(changes.removed) == 3
+    db.save_leveling_data(changes)
+    model.mark_saved()
+    assert db.load_leveling_data() == [(row[0], *map(typed_cell, row[1:])) for row in model.rows() if any(row)]
+    assert model.row_changes().rows == []
+
+    for _ in range(30):  # The sequence gap runs out and the book is renumbered
+        model.insert_cells(2, [["Y"], [""], [""], [""]])
+    assert model.row_changes().replace
+    db.save_leveling_data(model.row_changes())
+    assert db.load_leveling_data() == [(row[0], *map(typed_cell, row[1:])) for row in model.rows() if any(row)]
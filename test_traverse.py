@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from leveling_app_modular.calculator import LevelingCalculator
+from leveling_app_modular.db import DatabaseManager, typed_cell
+from leveling_app_modular.traverse import TraverseData, LevelingResult, KIND_NONE, KIND_BS, KIND_IS, KIND_CP, KIND_FS
+
+SETTINGS = {"precision": 3}
+ROWS = [["A", "1.500", "", ""], ["", "", "", "", "99.0"], ["B", "", "1.000", ""],
+        ["C", "0.500", "", "2.000"], [], ["D", "", "", "1.200", "98.5"]]
+
+
+def test_from_rows_round_trip():
+    traverse = TraverseData.from_rows(ROWS)
+    assert len(traverse) == 5
+    assert traverse.kind.tolist() == [KIND_BS, KIND_NONE, KIND_IS, KIND_CP, KIND_FS]
+    assert traverse.source_rows.tolist() == [0, 1, 2, 3, 5]
+    assert traverse.display_labels(readings_only=True) == ["A", "B", "C (cp)", "D"]
+    again = TraverseData.from_rows(traverse.to_rows())
+    np.testing.assert_array_equal(again.fs, traverse.fs)
+    np.testing.assert_array_equal(again.design_rl, traverse.design_rl)
+
+
+def test_traverse_and_rows_give_same_results():
+    calculator = LevelingCalculator(SETTINGS)
+    from_rows, stats = calculator.calculate_leveling("HI", 100.0, None, ROWS)
+    from_traverse, traverse_stats = calculator.calculate_leveling("HI", 100.0, None, TraverseData.from_rows(ROWS))
+    assert isinstance(from_traverse, LevelingResult)
+    assert from_rows.to_dicts() == from_traverse.to_dicts()
+    assert stats == traverse_stats
+    assert from_traverse[-1]["Fill"] == "0.300"
+    assert from_traverse.source_rows.tolist() == [0, 2, 3, 5]
+
+
+def test_traverse_validation_reports_source_rows():
+    rows = [["", "1.0", "", ""], [], ["", "2.0", "", ""], ["", "", "7.5", ""]]
+    reorganized, errors = LevelingCalculator(SETTINGS).validate_input(TraverseData.from_rows(rows))
+    assert reorganized is None
+    assert [e["message"] for e in errors] == [
+        "Row 3: A BS cannot be followed by another BS unless it's a change point.",
+        "Row 4: Warning - IS reading (7.500) is unusually high.",
+        "Row 4: Last reading cannot be an IS. It must be an FS.",
+    ]
+
+
+def test_result_columns_match_rows():
+    results, _stats = LevelingCalculator(SETTINGS).calculate_leveling("RF", 100.0, 100.1, ROWS)
+    for key in results.headers:
+        assert results.column(key) == [row.get(key, "") for row in results]
+    assert list(results.rows(["Point", "RL"]))[2] == ["C (cp)", "99.500"]
+
+
+def test_database_accepts_traverse_and_result(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = DatabaseManager()
+    traverse = TraverseData.from_rows(ROWS)
+    db.save_leveling_data(traverse)
+    assert db.load_leveling_data() == [(row[0], *map(typed_cell, row[1:4])) for row in traverse.to_rows() if any(row[:4])]
+    results, _stats = LevelingCalculator(SETTINGS).calculate_leveling("HI", 100.0, None, traverse)
+    db.save_profile_data(results)
+    loaded = db.load_profile_data()
+    assert [row[0] for row in loaded] == results.labels
+    assert float(loaded[-1][1]) == pytest.approx(98.8)
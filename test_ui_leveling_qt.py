@@ -0,0 +1,62 @@
+import os
+import time
+import pytest
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtWidgets import QApplication
+from leveling_app_modular.settings import settings
+from leveling_app_modular.ui_leveling_qt import LevelingApp
+
+ROWS = [["BM", "1.0", "", ""], ["A", "", "1.5", ""], ["B", "", "", "2.0"]]
+
+
+@pytest.fixture(scope="session")
+def app(request):
+    """Session-wide Qt Application."""
+    q_app = QApplication.instance()
+    if q_app is None:
+        q_app = QApplication([])
+    return q_app
+
+
+@pytest.fixture
+def leveling(app, monkeypatch):
+    monkeypatch.setitem(settings, "auto_recalculate", False)
+    monkeypatch.setitem(settings, "precision", 3)
+    widget = LevelingApp()
+    widget.first_rl_entry.setText("100")
+    widget.table.set_rows(ROWS)
+    yield widget
+    widget.stop_calculations()
+
+
+def wait_for_calculations(app, widget):
+    deadline = time.monotonic() + 10
+    while widget._calc_jobs and time.monotonic() < deadline:
+        app.processEvents()
+    app.processEvents()
+
+
+def test_edits_made_with_auto_off_survive_turning_auto_on(app, leveling):
+    leveling.calculate_and_update()
+    wait_for_calculations(app, leveling)
+    assert leveling.calculator is not None
+
+    leveling.table.item(1, 2).setText("1.2")
+    leveling.flush_changes()
+    assert leveling.calculator is None
+    leveling.set_auto_recalculate(True)
+    leveling.table.item(2, 3).setText("2.5")
+    leveling.flush_changes()
+    # No incremental update on top of the run from before the first edit
+    assert leveling.calculator is None
+
+    leveling.calculate_and_update()
+    wait_for_calculations(app, leveling)
+    assert leveling.results.adjusted_rl.tolist() == pytest.approx([100.0, 99.8, 98.5])
+
+
+def test_job_finishing_after_an_edit_keeps_no_calculator(app, leveling):
+    leveling.calculate_and_update()
+    leveling.table.item(1, 2).setText("1.2")  # Before the result reaches the GUI thread
+    wait_for_calculations(app, leveling)
+    assert leveling.results is not None and leveling.calculator is None
@@ -0,0 +1,99 @@
+import os
+import pytest
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PyQt6.QtWidgets import QApplication
+from leveling_app_modular.table_model_qt import LevelingTableModel
+from leveling_app_modular.undo import UndoHistory, CellEdit
+
+HEADERS = ["Point", "BS", "IS", "FS"]
+
+
+@pytest.fixture(scope="session")
+def app(request):
+    """Session-wide Qt Application."""
+    q_app = QApplication.instance()
+    if q_app is None:
+        q_app = QApplication([])
+    return q_app
+
+
+@pytest.fixture
+def model(app):
+    model = LevelingTableModel(HEADERS, 3, numeric_columns=(1, 2, 3))
+    model.history = UndoHistory()
+    return model
+
+
+def test_undo_redo_cell_and_row_deltas(model):
+    history = model.history
+    model.set_text(0, 1, "1.5")
+    history.checkpoint()
+    model.insertRows(1, 2)
+    model.set_text(1, 3, "x")
+    history.checkpoint()
+    model.removeRows(0, 1)
+    history.checkpoint()
+    after = model.rows()
+    assert [len(step.commands) for step in history.undo_stack] == [1, 2, 1]
+
+    assert history.undo(model)
+    assert model.rows()[0] == ["", "1.5", "", ""]
+    assert history.undo(model)
+    assert model.rows() == [["", "1.5", "", ""], ["", "", "", ""], ["", "", "", ""]]
+    assert model.invalid_cells() == []
+    assert history.redo(model) and history.redo(model)
+    assert model.rows() == after
+    assert model.invalid_cells() == [(0, 3)]
+    assert not history.redo(model)
+
+
+def test_undo_commits_pending_changes_and_redo_is_cleared(model):
+    history = model.history
+    model.set_text(2, 2, "0.5")
+    history.checkpoint()
+    model.set_text(2, 2, "0.6")  # Not checkpointed yet
+    assert history.undo(model)
+    assert model.text(2, 2) == "0.5"
+    model.set_text(0, 0, "A")
+    history.checkpoint()
+    assert not history.can_redo()
+
+
+def test_reset_swaps_columns(model):
+    history = model.history
+    model.set_rows([["A", "1.0", "", ""]] * 1000)
+    history.checkpoint()
+    history.undo(model)
+    assert model.rowCount() == 3
+    history.redo(model)
+    assert model.rowCount() == 1000 and model.text(999, 1) == "1.0"
+
+
+def test_chunked_load_is_one_step(model):
+    history = model.history
+    model.set_text(0, 0, "old")
+    history.checkpoint()
+    model.set_rows([])
+    model.append_cells([["A", "B"], ["1.0", ""], ["", "x"], ["", "0.5"]])
+    model.append_cells([["C"], [""], [""], ["1.2"]])
+    assert model.invalid_cells() == [(1, 2)]
+    history.checkpoint()
+    history.undo(model)
+    assert model.rowCount() == 3 and model.text(0, 0) == "old"
+    history.redo(model)
+    assert model.column(0) == ["A", "B", "C"] and model.filled_counts() == ([3, 1, 1, 2], 3)
+
+
+def test_depth_cap_and_memory_budget(model):
+    history = model.history
+    history.max_steps = 3
+    for i in range(5):
+        model.set_text(0, 0, str(i))
+        history.checkpoint()
+    assert len(history.undo_stack) == 3
+    history.max_bytes = history.undo_stack[-1].cost * 2
+    model.set_text(0, 0, "9")
+    history.checkpoint()
+    assert len(history.undo_stack) == 2
+    assert history.bytes_used == sum(step.cost for step in history.undo_stack)
+    assert CellEdit(0, 0, "", "abc").cost() > 3
@@ -0,0 +1,463 @@
+import numpy as np
+
+# Row kind codes shared by the calculator, the graph and the database layer
+KIND_NONE = 0
+KIND_BS = 1
+KIND_IS = 2
+KIND_FS = 3
+KIND_CP = 4
+
+HI_HEADERS = ["Point", "BS", "IS", "FS", "HI", "RL", "Adjustment", "Adjusted RL", "Design RL", "Cut", "Fill", "Elevation"]
+RF_HEADERS = ["Point", "BS", "IS", "FS", "Rise", "Fall", "RL", "Adjustment", "Adjusted RL", "Design RL", "Cut", "Fill", "Elevation"]
+
+# Result column name -> LevelingResult attribute
+_RESULT_ARRAYS = {
+    "BS": "bs",
+    "IS": "is_",
+    "FS": "fs",
+    "HI": "hi",
+    "Rise": "rise",
+    "Fall": "fall",
+    "RL": "rl",
+    "Adjustment": "adjustment",
+    "Adjusted RL": "adjusted_rl",
+    "Design RL": "design_rl",
+    "Cut": "cut",
+    "Fill": "fill",
+}
+
+
+def format_column(values, precision):
+    """Formats a float array to display strings, NaN becoming an empty string."""
+    if not len(values):
+        return []
+    if not np.isnan(values).any():
+        # One C-level format call for the whole column
+        return ((f"%.{precision}f\n" * len(values)) % tuple(values.tolist())).split("\n")[:-1]
+    return [f"{v:.{precision}f}" if v == v else "" for v in values.tolist()]
+
+
+def round_column(values, precision):
+    """Rounds a float array to precision decimals as the formatted text shows them.
+
+    np.round scales by a power of ten first, which can tip a value lying
+    within float noise of a tie the other way than str formatting; those
+    few values are rounded through the text instead.
+    """
+    rounded = np.round(values, precision)
+    scaled = np.abs(values) * 10.0 ** precision
+    with np.errstate(invalid="ignore"):
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie).tolist():
+        rounded[i] = float(f"{values[i]:.{precision}f}")
+    return rounded
+
+
+def adjustment_column(step, n):
+    """Cumulative misclosure adjustment: 0 at the first row, one step more per row."""
+    steps = np.full(n, step)
+    if n:
+        steps[0] = 0.0
+    return np.add.accumulate(steps)
+
+
+def cut_fill(adjusted_rl, design_rl, precision):
+    """Cut and fill against the Design RL rounded to the display precision, NaN where neither applies."""
+    diff = adjusted_rl - round_column(design_rl, precision)
+    with np.errstate(invalid="ignore"):
+        fill = np.where(diff > 0, diff, np.nan)
+        cut = np.where(diff < 0, -diff, np.nan)
+    return cut, fill
+
+
+def _text_column(values):
+    """Round-trippable text for a float array, NaN becoming an empty string."""
+    empty = np.isnan(values)
+    if empty.all():
+        return [""] * len(values)
+    text = list(map(repr, values.tolist()))
+    for i in np.flatnonzero(empty).tolist():
+        text[i] = ""
+    return text
+
+
+def _float_column(cells):
+    """Parses text cells to float64, empty or non-numeric cells becoming NaN."""
+    out = np.full(len(cells), np.nan)
+    for i, cell in enumerate(cells):
+        if cell:
+            try:
+                out[i] = float(cell)
+            except ValueError:
+                pass
+    return out
+
+
+class StringTable:
+    """Read-only sequence of strings kept in one UTF-8 buffer.
+
+    String i is data[offsets[i]:offsets[i + 1]]. Both arrays may be views of
+    a memory-mapped file; a string is only decoded when it is read.
+    """
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets, data):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.uint8)
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [text.encode("utf-8") for text in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(raw) for raw in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("string table index out of range")
+        return self.data[self.offsets[index]:self.offsets[index + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __repr__(self):
+        return f"StringTable({len(self)} strings)"
+
+    def tolist(self):
+        """All strings, decoded in one pass over the buffer."""
+        raw = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        if raw.isascii():
+            # Byte offsets are character offsets: slice the decoded text
+            text = raw.decode("ascii")
+            return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+        return [raw[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+
+class TraverseData:
+    """Column-oriented field book.
+
+    Holds one entry per non-empty input row: the point label as entered, the
+    BS/IS/FS/Design RL readings as float64 arrays (NaN where empty), the row
+    kind code and the index of the row in the source table. Labels are a
+    list, or a StringTable for a traverse mapped from a project file.
+    """
+    __slots__ = ("labels", "bs", "is_", "fs", "design_rl", "kind", "source_rows")
+
+    def __init__(self, labels, bs, is_, fs, design_rl, kind, source_rows=None):
+        self.labels = labels if isinstance(labels, StringTable) else list(labels)
+        self.bs = np.asarray(bs, dtype=np.float64)
+        self.is_ = np.asarray(is_, dtype=np.float64)
+        self.fs = np.asarray(fs, dtype=np.float64)
+        self.design_rl = np.asarray(design_rl, dtype=np.float64)
+        self.kind = np.asarray(kind, dtype=np.int8)
+        if source_rows is None:
+            source_rows = np.arange(len(self.labels))
+        self.source_rows = np.asarray(source_rows, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __repr__(self):
+        return f"TraverseData({len(self)} rows)"
+
+    @staticmethod
+    def kinds_from_presence(has_bs, has_is, has_fs):
+        """Kind code array from boolean presence masks of the three readings."""
+        return np.select(
+            [has_bs & has_fs, has_bs, has_is, has_fs],
+            [KIND_CP, KIND_BS, KIND_IS, KIND_FS],
+            KIND_NONE,
+        ).astype(np.int8)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds a traverse from table rows ([point, bs, is, fs, design rl] strings).
+
+        Empty rows are skipped and non-numeric cells are read as empty; use
+        LevelingCalculator.validate_input for a checked conversion.
+        """
+        labels, cols, source_rows = [], ([], [], [], []), []
+        for row_idx, row_data in enumerate(rows):
+            cells = [str(val).strip() for val in row_data[:5]]
+            while len(cells) < 5:
+                cells.append("")
+            if not any(cells[1:]):
+                continue
+            labels.append(cells[0])
+            for col, cell in zip(cols, cells[1:]):
+                col.append(cell)
+            source_rows.append(row_idx)
+        bs, is_, fs, design_rl = (_float_column(col) for col in cols)
+        kind = cls.kinds_from_presence(~np.isnan(bs), ~np.isnan(is_), ~np.isnan(fs))
+        return cls(labels, bs, is_, fs, design_rl, kind, source_rows)
+
+    def to_rows(self):
+        """Table rows ([point, bs, is, fs, design rl] strings) for the traverse."""
+        return [list(row) for row in zip(self.labels, _text_column(self.bs), _text_column(self.is_),
+                                         _text_column(self.fs), _text_column(self.design_rl))]
+
+    def to_columns(self, n_rows=None):
+        """Table columns ([point], [bs], [is], [fs], [design rl] strings) with each entry at its source row.
+
+        The rows in between, which were empty in the source table, are
+        empty strings; n_rows defaults to one past the last source row.
+        """
+        texts = [list(self.labels), _text_column(self.bs), _text_column(self.is_),
+                 _text_column(self.fs), _text_column(self.design_rl)]
+        if n_rows is None:
+            n_rows = int(self.source_rows[-1]) + 1 if len(self) else 0
+        if n_rows == len(self) and np.array_equal(self.source_rows, np.arange(n_rows)):
+            return texts
+        columns = []
+        for values in texts:
+            column = np.full(n_rows, "", dtype=object)
+            column[self.source_rows] = values
+            columns.append(column.tolist())
+        return columns
+
+    def display_labels(self, readings_only=False):
+        """Point labels as shown in results: empty points numbered, change points marked (cp).
+
+        Numbering counts every row of the traverse, so readings_only drops the
+        rows without a reading after numbering.
+        """
+        return [(point or str(i + 1)) + (" (cp)" if k == KIND_CP else "")
+                for i, (point, k) in enumerate(zip(self.labels, self.kind.tolist()))
+                if k != KIND_NONE or not readings_only]
+
+    def replace_row(self, row_idx, point, bs, is_, fs, design_rl):
+        """Copy of the traverse with source row row_idx set to the given label and readings.
+
+        Readings are floats (NaN when empty); a row without any reading or
+        Design RL is removed, a new non-empty row is inserted in source order.
+        """
+        pos = int(np.searchsorted(self.source_rows, row_idx))
+        present = pos < len(self) and self.source_rows[pos] == row_idx
+        values = (bs, is_, fs, design_rl)
+        labels = list(self.labels)
+        if all(v != v for v in values):
+            if not present:
+                return self
+            del labels[pos]
+            columns = [np.delete(col, pos) for col in (self.bs, self.is_, self.fs, self.design_rl, self.kind, self.source_rows)]
+            return TraverseData(labels, *columns)
+        kind = self.kinds_from_presence(*(np.array([v == v]) for v in values[:3]))[0]
+        columns = []
+        for col, value in zip((self.bs, self.is_, self.fs, self.design_rl, self.kind, self.source_rows),
+                              values + (kind, row_idx)):
+            if present:
+                col = col.copy()
+                col[pos] = value
+            else:
+                col = np.insert(col, pos, value)
+            columns.append(col)
+        if present:
+            labels[pos] = point
+        else:
+            labels.insert(pos, point)
+        return TraverseData(labels, *columns)
+
+    def station_numbers(self, readings_only=False):
+        """Numbers given to empty points: the 1-based position in the traverse."""
+        numbers = np.arange(1, len(self) + 1, dtype=np.int32)
+        return numbers[self.kind != KIND_NONE] if readings_only else numbers
+
+    def readings(self):
+        """Sub-traverse of the rows that carry a BS, IS or FS reading."""
+        keep = self.kind != KIND_NONE
+        if keep.all():
+            return self
+        labels = [label for label, k in zip(self.labels, keep.tolist()) if k]
+        return TraverseData(labels, self.bs[keep], self.is_[keep], self.fs[keep],
+                            self.design_rl[keep], self.kind[keep], self.source_rows[keep])
+
+
+class LevelingResult:
+    """Array-backed results of a leveling calculation.
+
+    Only the readings, RL, Adjusted RL, Design RL and the HI (or the signed
+    rise/fall) are stored as float64 arrays; labels, adjustments, rises,
+    falls, cut and fill are derived and everything is formatted when read.
+    The object behaves as a sequence of result rows (dicts keyed like the
+    results table) so code written against the list-of-dicts results keeps
+    working, while tables and exporters can read whole columns with
+    column()/rows().
+    """
+    __slots__ = ("method", "precision", "points", "numbers", "kind", "source_rows", "bs", "is_", "fs", "hi",
+                 "change", "rl", "adjusted_rl", "design_rl", "adjustment_step", "stats", "_derived")
+
+    def __init__(self, method, precision, points, numbers, kind, bs, is_, fs, rl, adjusted_rl, design_rl,
+                 adjustment_step=0.0, hi=None, change=None, source_rows=None, stats=None):
+        self.method = method
+        self.precision = precision
+        self.points = points  # labels as entered, "" where auto-numbered
+        self.numbers = numbers  # station numbers for the auto-numbered points
+        self.kind = kind
+        self.source_rows = source_rows
+        self.bs = bs
+        self.is_ = is_
+        self.fs = fs
+        self.hi = hi  # HI method only
+        self.change = change  # RF method only: RL difference to the previous row
+        self.rl = rl
+        self.adjusted_rl = adjusted_rl
+        self.design_rl = design_rl
+        self.adjustment_step = adjustment_step
+        self.stats = stats if stats is not None else {}
+        self._derived = {}
+
+    def __len__(self):
+        return len(self.kind)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("result row out of range")
+        return self.row(index)
+
+    def __repr__(self):
+        return f"LevelingResult({self.method}, {len(self)} rows)"
+
+    @property
+    def headers(self):
+        """Results table columns for the calculation method."""
+        return list(HI_HEADERS if self.method == "HI" else RF_HEADERS)
+
+    @property
+    def labels(self):
+        """Point labels as shown in the results table."""
+        return [self._label(i) for i in range(len(self))]
+
+    @property
+    def elevation(self):
+        return self.adjusted_rl
+
+    def _label(self, i):
+        label = self.points[i] or str(self.numbers[i])
+        return f"{label} (cp)" if self.kind[i] == KIND_CP else label
+
+    def array(self, name):
+        """Float64 array for a LevelingResult attribute name, deriving it on first use.
+
+        Derived columns (adjustment, rise, fall, cut, fill) are cached, the
+        stored ones are returned as they are; None when the column does not
+        apply to the method.
+        """
+        if name not in ("adjustment", "rise", "fall", "cut", "fill"):
+            return getattr(self, name)
+        if name in self._derived:
+            return self._derived[name]
+        n = len(self)
+        if name == "adjustment":
+            values = adjustment_column(self.adjustment_step, n)
+        elif name in ("cut", "fill"):
+            cut, fill = cut_fill(self.adjusted_rl, self.design_rl, self.precision)
+            self._derived["cut"] = cut
+            values = fill if name == "fill" else cut
+        elif self.change is None:
+            return None
+        elif name == "rise":
+            values = np.where(self.change > 0, self.change, np.nan)
+        else:
+            # A zero difference is booked as a fall of 0 and shown blank
+            values = np.where(self.change < 0, -self.change, np.nan)
+        self._derived[name] = values
+        return values
+
+    def row(self, i):
+        """Result row i as a dict with the same keys the row-by-row engine produces."""
+        k = int(self.kind[i])
+        precision = self.precision
+
+        def fmt(name):
+            values = self.array(name)
+            if values is None:
+                return ""
+            v = values[i]
+            return f"{v:.{precision}f}" if v == v else ""
+
+        res = {"Point": self._label(i)}
+        if self.method == "HI":
+            if k == KIND_CP or k == KIND_BS:
+                res["BS"] = fmt("bs")
+            if k == KIND_IS:
+                res["IS"] = fmt("is_")
+            if k == KIND_CP or k == KIND_FS:
+                res["FS"] = fmt("fs")
+            res["HI"] = fmt("hi")
+            res["RL"] = fmt("rl")
+            res["Design RL"] = fmt("design_rl")
+        elif k == KIND_CP:
+            res.update({"BS": fmt("bs"), "FS": fmt("fs"), "RL": fmt("rl"), "Rise": fmt("rise"),
+                        "Fall": fmt("fall"), "Design RL": fmt("design_rl")})
+        else:
+            res.update({"RL": fmt("rl"), "Rise": fmt("rise"), "Fall": fmt("fall"), "Design RL": fmt("design_rl")})
+            if k == KIND_BS:
+                res["BS"] = fmt("bs")
+            elif k == KIND_IS:
+                res["IS"] = fmt("is_")
+            else:
+                res["FS"] = fmt("fs")
+        res["Adjustment"] = fmt("adjustment")
+        res["Adjusted RL"] = fmt("adjusted_rl")
+        res["Elevation"] = float(self.adjusted_rl[i])
+        res["Cut"] = fmt("cut")
+        res["Fill"] = fmt("fill")
+        return res
+
+    def column(self, key):
+        """Whole column as display values: strings, except Elevation which stays float."""
+        if key == "Point":
+            return self.labels
+        if key == "Elevation":
+            return self.adjusted_rl.tolist()
+        values = self.array(_RESULT_ARRAYS[key]) if key in _RESULT_ARRAYS else None
+        if values is None:
+            return [""] * len(self)
+        return format_column(values, self.precision)
+
+    def rows(self, headers=None):
+        """Yields result rows as lists of column() values in header order."""
+        headers = headers or self.headers
+        columns = [self.column(key) for key in headers]
+        for values in zip(*columns):
+            yield list(values)
+
+    def to_dicts(self):
+        """Materializes the results as a list of dicts."""
+        return [self.row(i) for i in range(len(self))]
+
+
+class RowChanges:
+    """The rows of a table changed since it was last saved.
+
+    rows holds the (id, seq, *cells) tuples to insert or update and removed
+    the ids to delete; with replace set the table is cleared first, e.g.
+    for a book that was loaded whole since the last save. The cells follow
+    the table's columns and may stop short of the last ones, which are then
+    left as they are.
+    """
+    __slots__ = ("rows", "removed", "replace")
+
+    def __init__(self, rows=(), removed=(), replace=False):
+        self.rows = list(rows)
+        self.removed = list(removed)
+        self.replace = replace
+
+    def __repr__(self):
+        return f"RowChanges({len(self.rows)} rows, {len(self.removed)} removed{', replace' if self.replace else ''})"
@@ -1,18 +1,25 @@
 from PyQt6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QMenu, QGroupBox, QLabel, QHeaderView, QAbstractItemView, QFileDialog, QMessageBox, QMainWindow, QProgressBar, QCheckBox, QLineEdit, QComboBox, QColorDialog, QSlider, QSizePolicy, QStackedWidget, QStyledItemDelegate
+    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QMenu, QGroupBox, QLabel, QHeaderView, QAbstractItemView, QFileDialog, QMessageBox, QMainWindow, QProgressBar, QCheckBox, QLineEdit, QComboBox, QColorDialog, QSlider, QSizePolicy, QStackedWidget, QStyledItemDelegate, QApplication
 )
-from PyQt6.QtCore import Qt, QEvent, QPropertyAnimation, QEasingCurve, pyqtSlot, QTimer
+from PyQt6.QtCore import Qt, QEvent, QPropertyAnimation, QEasingCurve, pyqtSlot, pyqtSignal, QTimer, QThread, QObject
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt import NavigationToolbar2QT as NavigationToolbar
 import matplotlib.pyplot as plt
 from .settings import settings, save_settings
 import numpy as np
 from .utils_qt import Tooltip
+from .traverse import LevelingResult
+from .profile_renderer import ProfileRenderer
+from .polyline import DesignPolyline
+from .render_service import GraphSnapshot, render_service
+from .csv_import import FLOAT, ImportCancelled, read_columns
+from .earthwork import CutFillProfile, EarthworkVolumes, SectionTemplate, CUT_FILL_HEADERS, VOLUME_HEADERS, VOLUME_METHODS
 import matplotlib.style as mplstyle
 import csv
-from PyQt6.QtWidgets import QFileDialog, QMessageBox
+from PyQt6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
 from leveling_app_modular.utils_qt import ImportDialog
 import re
+import threading
 from PyQt6.QtGui import QIcon, QPalette, QColor
 import os
 ICON_DIR = os.path.join(os.path.dirname(__file__), "icons")
@@ -23,7 +30,7 @@ class DarkTableDelegate(QStyledItemDelegate):
         table = parent.parent()
         row = index.row()
         if table.alternatingRowColors() and row % 2 == 1:
-            bg_color = table.palette().color(table.palette().AlternateBase)
+            bg_color = table.palette().color(QPalette.ColorRole.AlternateBase)
         else:
             bg_color = table.palette().color(table.backgroundRole())
         brightness = (bg_color.red() * 299 + bg_color.green() * 587 + bg_color.blue() * 114) / 1000
@@ -39,7 +46,40 @@ class DarkTableDelegate(QStyledItemDelegate):
         print(f"[DEBUG] Editor bg: {bg_color.name()}, fg: {fg}, brightness: {brightness}")
         return editor
 
+class ComparisonProfileWorker(QObject):
+    progress = pyqtSignal(int)  # Percent of the file parsed
+    result = pyqtSignal(object)  # (N, 2) distance/elevation pairs
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+
+    def __init__(self, file_path, sources, has_header):
+        super().__init__()
+        self.file_path = file_path
+        self.sources = sources  # CSV columns of the distances (or points) and the elevations
+        self.has_header = has_header
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        # Called from the GUI thread; the read stops at its next byte range
+        self._cancelled.set()
+
+    def run(self):
+        try:
+            x, y = read_columns(self.file_path, self.sources, [FLOAT, FLOAT], self.has_header,
+                                progress=self.progress.emit, cancelled=self._cancelled)
+            valid = ~(np.isnan(x) | np.isnan(y))
+            self.result.emit(np.column_stack((x[valid], y[valid])))
+        except ImportCancelled:
+            pass
+        except Exception as e:
+            self.error.emit(str(e))
+        finally:
+            self.finished.emit()
+
 class GraphApp(QWidget):
+    # (file path, error message or "") once a background export has been written
+    graphExported = pyqtSignal(str, str)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.graph_line_color = settings.get('graph_line_color', 'royalblue')
@@ -53,13 +93,17 @@ class GraphApp(QWidget):
         self.interval_mode = False
         self.interval_value = settings.get('interval_value', 10)
         self._last_data = []
-        self._annotations = []  # List of (x0, y0, x1, y1)
+        self._annotations = []  # User text ({'x', 'y', 'text'}) and presentation sketches ((x0, y0, x1, y1))
+        self._point_notes = []  # Text after the numeric part of Point cells, e.g. "(cp)"
+        self._table_dirty = True  # Profile table edited since the last sync_data_from_table
         self._annotation_mode = False
-        self._polyline_vertices = []
+        self.polyline = DesignPolyline()
         self._polyline_add_mode = False
         self._smooth_polyline = 0.0
         self._design_levels = []
         self._comparison_data = []
+        self._load_jobs = {}  # job id -> (QThread, ComparisonProfileWorker) still running
+        self._load_job_id = 0
         self._fullscreen_mode = False
         self._hidden_widgets = []
         self._main_layout = None
@@ -79,7 +123,13 @@ class GraphApp(QWidget):
         self._data_cursor_label.setStyleSheet("background: #222; color: #fff; border-radius: 6px; padding: 6px; font-size: 11pt;")
         self._data_cursor_label.setWindowFlags(self._data_cursor_label.windowFlags() | Qt.WindowType.ToolTip)
         self._data_cursor_label.hide()
-        self.canvas.mpl_connect('motion_notify_event', self._on_graph_hover)
+        self.graphExported.connect(self._on_graph_exported)
+        # Hover lookups run at most once per display frame; the latest motion event wins
+        self._hover_event = None
+        self._hover_timer = QTimer(self)
+        self._hover_timer.setSingleShot(True)
+        self._hover_timer.timeout.connect(self._process_hover)
+        self.canvas.mpl_connect('motion_notify_event', self._queue_hover)
         self.canvas.mpl_connect('button_press_event', self._on_graph_click)
         self.canvas.mpl_connect('button_press_event', self._on_graph_draw_start)
         self.canvas.mpl_connect('button_release_event', self._on_graph_draw_end)
@@ -97,6 +147,9 @@ class GraphApp(QWidget):
         self._dark_mode_btn.show()
         self._apply_graph_theme()
         self._compare_mode = False
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop_loads)
         # Progress Bar for imports/exports
         self.progress_bar = QProgressBar(self)
         self.progress_bar.setVisible(False)
@@ -293,10 +346,44 @@ class GraphApp(QWidget):
         self.fill_volume_label = QLabel("Fill: -")
         analyze_cut_fill_layout.addWidget(self.cut_volume_label)
         analyze_cut_fill_layout.addWidget(self.fill_volume_label)
+        self.export_cut_fill_btn = QPushButton("Export")
+        self.export_cut_fill_btn.setEnabled(False)
+        self.export_cut_fill_btn.clicked.connect(self.export_cut_fill_csv)
+        analyze_cut_fill_layout.addWidget(self.export_cut_fill_btn)
+        Tooltip(self.export_cut_fill_btn, "Export per-segment and cumulative cut/fill of the last analysis to CSV.")
         design_controls_layout.addLayout(analyze_cut_fill_layout)
         
         layout.addLayout(design_controls_layout)
 
+        # --- Third Row: Earthwork section template ---
+        earthwork_layout = QHBoxLayout()
+        earthwork_layout.setSpacing(6)
+        earthwork_layout.setContentsMargins(5, 0, 5, 2)
+        earthwork_layout.addWidget(QLabel("Section width:"))
+        self.section_width_edit = QLineEdit(str(settings.get("section_width", "")))
+        self.section_width_edit.setFixedWidth(90)
+        earthwork_layout.addWidget(self.section_width_edit)
+        Tooltip(self.section_width_edit, "Formation width for earthwork volumes: one value, or one per station. Leave empty for areas only.")
+        earthwork_layout.addWidget(QLabel("Side slopes cut:"))
+        self.cut_slope_edit = QLineEdit(str(settings.get("cut_side_slope", 1.0)))
+        self.cut_slope_edit.setFixedWidth(40)
+        earthwork_layout.addWidget(self.cut_slope_edit)
+        earthwork_layout.addWidget(QLabel("fill:"))
+        self.fill_slope_edit = QLineEdit(str(settings.get("fill_side_slope", 1.5)))
+        self.fill_slope_edit.setFixedWidth(40)
+        earthwork_layout.addWidget(self.fill_slope_edit)
+        self.volume_method_cb = QComboBox()
+        self.volume_method_cb.addItems(VOLUME_METHODS)
+        self.volume_method_cb.setCurrentText(settings.get("volume_method", "Prismoidal"))
+        earthwork_layout.addWidget(self.volume_method_cb)
+        self.mass_haul_cb = QCheckBox("Mass Haul")
+        self.mass_haul_cb.setChecked(settings.get("show_mass_haul", False))
+        self.mass_haul_cb.stateChanged.connect(self.toggle_mass_haul)
+        earthwork_layout.addWidget(self.mass_haul_cb)
+        Tooltip(self.mass_haul_cb, "Show the mass-haul diagram of the last analysis under the profile.")
+        earthwork_layout.addStretch()
+        layout.addLayout(earthwork_layout)
+
         # Polyline vertex label (compact, always visible)
         polyline_vertex_layout = QHBoxLayout()
         polyline_vertex_layout.setSpacing(6)
@@ -314,6 +401,7 @@ class GraphApp(QWidget):
         # Matplotlib Figure and Canvas - Make it much larger and compact
         self.fig, self.ax = plt.subplots(figsize=(12, 8))
         self.canvas = FigureCanvas(self.fig)
+        self.renderer = ProfileRenderer(self.fig, self.ax, self.canvas)
         # --- Graph and Toolbar Row ---
         graph_row_layout = QHBoxLayout()
         graph_row_layout.setSpacing(0)
@@ -397,6 +485,9 @@ class GraphApp(QWidget):
         
         # Live data update: connect cellChanged
         self.table.cellChanged.connect(self._on_table_cell_changed)
+        table_model = self.table.model()
+        for signal in (table_model.dataChanged, table_model.rowsInserted, table_model.rowsRemoved, table_model.modelReset):
+            signal.connect(self._mark_table_dirty)
         self.table.itemSelectionChanged.connect(self._on_table_selection_changed)
         self._highlighted_index = None
         
@@ -561,15 +652,15 @@ class GraphApp(QWidget):
             self._polyline_preview_point = None
         else:
             self._polyline_preview_point = (event.xdata, event.ydata)
-        print(f"[DEBUG] Hover preview: {self._polyline_preview_point}")
-        self._redraw_graph()
+        self._update_polyline_preview()
+        self.renderer.update_overlays()
 
     def _add_polyline_vertex(self, event):
         if not getattr(self, '_polyline_add_mode', False):
             return
         if event.inaxes != self.ax or event.button != 1:
             return
-        self._polyline_vertices.append((event.xdata, event.ydata))
+        self.polyline.add(event.xdata, event.ydata)
         self._update_polyline_vertex_label()
         self._redraw_graph()
 
@@ -578,13 +669,9 @@ class GraphApp(QWidget):
             return
         if event.inaxes != self.ax or event.button != 3:
             return
-        if not self._polyline_vertices:
+        if not self.polyline:
             return
-        import numpy as np
-        verts = np.array(self._polyline_vertices)
-        dists = np.hypot(verts[:,0] - event.xdata, verts[:,1] - event.ydata)
-        idx = np.argmin(dists)
-        self._polyline_vertices.pop(idx)
+        self.polyline.remove_nearest(event.xdata, event.ydata)
         self._update_polyline_vertex_label()
         self._redraw_graph()
 
@@ -593,10 +680,10 @@ class GraphApp(QWidget):
             self._exit_polyline_add_mode()
 
     def _update_polyline_vertex_label(self):
-        if not self._polyline_vertices:
+        if not self.polyline:
             self.polyline_vertex_label.setText("No vertices defined.")
         else:
-            pts = [f"({x:.2f}, {y:.2f})" for x, y in self._polyline_vertices]
+            pts = [f"({x:.2f}, {y:.2f})" for x, y in self.polyline]
             if len(pts) > 2:
                 shown = ', '.join(pts[:2])
                 more = len(pts) - 2
@@ -604,9 +691,13 @@ class GraphApp(QWidget):
             else:
                 self.polyline_vertex_label.setText("Vertices: " + ', '.join(pts))
 
+    def _mark_table_dirty(self, *args):
+        self._table_dirty = True
+
     def sync_data_from_table(self):
+        self._table_dirty = False
         self._last_data = []
-        self._annotations = []  # Clear previous annotations
+        self._point_notes = []
         headers = [self.table.horizontalHeaderItem(i).text().lower() for i in range(self.table.columnCount())]
         try:
             x_col = headers.index("distance")
@@ -632,7 +723,7 @@ class GraphApp(QWidget):
                         # If there is a non-numeric annotation, add it
                         annotation = point_text[match.end():].strip()
                         if annotation:
-                            self._annotations.append({'x': x_val, 'y': y_val, 'text': annotation})
+                            self._point_notes.append({'x': x_val, 'y': y_val, 'text': annotation})
                     else:
                         # If no numeric part, skip plotting but could add annotation if desired
                         continue
@@ -654,37 +745,140 @@ class GraphApp(QWidget):
         x_vals, y_vals = zip(*self._last_data)
         x_vals = np.array(x_vals)
         y_vals = np.array(y_vals)
-        design_levels = None
+        design_levels = self._design_levels_for(mode, x_vals, y_vals)
+        if design_levels is None:
+            return
+        # Earthwork volumes for the section template, if one is set; checked before anything is drawn
+        template = self._section_template(len(x_vals))
+        if template is False:
+            # The previous analysis does not match the inputs any more
+            self._cut_fill = None
+            self._earthwork = None
+            self.export_cut_fill_btn.setEnabled(False)
+            self._show_mass_haul()
+            self._redraw_graph()
+            return
+
+        # --- Redraw Graph ---
+        self._redraw_graph()  # Clear previous analysis
+        ax = self.ax
+        transient = self.renderer.add_transient
+        # Draw design level line(s); the polyline itself is already drawn
+        if mode == "Polyline" and len(self.polyline) >= 2:
+            pass
+        elif np.all(design_levels == design_levels[0]):
+            transient(ax.axhline(y=design_levels[0], color='red', linestyle='--', linewidth=1.5, label=f'Design Level ({design_levels[0]:.2f})'))
+        else:
+            transient(ax.plot(x_vals, design_levels, color='red', linestyle='--', linewidth=1.5, label='Design Level')[0])
+
+        # --- Shade cut and fill areas ---
+        transient(ax.fill_between(x_vals, y_vals, design_levels, where=(y_vals >= design_levels), facecolor='orange', alpha=0.4, interpolate=True, label='Cut'))
+        transient(ax.fill_between(x_vals, y_vals, design_levels, where=(y_vals < design_levels), facecolor='cyan', alpha=0.4, interpolate=True, label='Fill'))
+
+        # --- Calculate cut and fill areas ---
+        self._cut_fill = CutFillProfile(x_vals, y_vals, design_levels)
+        cut_area = self._cut_fill.cut_area
+        fill_area = self._cut_fill.fill_area
+        self._earthwork = None
+        if template is not None:
+            self._earthwork = EarthworkVolumes(x_vals, y_vals, design_levels, template, self.volume_method_cb.currentText())
+            self.cut_volume_label.setText(f"Cut: {self._earthwork.total_cut:.2f}")
+            self.fill_volume_label.setText(f"Fill: {self._earthwork.total_fill:.2f}")
+        else:
+            self.cut_volume_label.setText(f"Cut: {cut_area:.2f}")
+            self.fill_volume_label.setText(f"Fill: {fill_area:.2f}")
+        self.export_cut_fill_btn.setEnabled(True)
+
+        self.renderer.update_legend()
+        self._show_mass_haul()
+        self.renderer.draw()
+
+        # --- Show summary message ---
+        msg = f"Design Level Mode: {mode}\n"
+        if mode == "Fixed":
+            msg += f"Design Elevation: {design_levels[0]:.2f}\n"
+        elif mode == "Gradient":
+            msg += f"Start: {self.gradient_start_edit.text()}, End: {self.gradient_end_edit.text()}\n"
+        elif mode == "From Points":
+            msg += f"Design Levels: {self.from_points_edit.text()}\n"
+        elif mode == "First RL":
+            msg += f"First RL: {design_levels[0]:.2f}\n"
+        elif mode == "Comparison Profile":
+            msg += f"Using loaded comparison profile as design level.\n"
+        elif mode == "Polyline":
+            msg += f"Polyline vertices: {self.polyline_vertex_label.text()}\n"
+        msg += f"\nCut Area: {cut_area:.2f}\nFill Area: {fill_area:.2f}"
+        if self._earthwork is not None:
+            msg += (f"\n\n{self._earthwork.method} volumes:\nCut Volume: {self._earthwork.total_cut:.2f}"
+                    f"\nFill Volume: {self._earthwork.total_fill:.2f}\nFinal Mass Ordinate: {self._earthwork.mass[-1]:.2f}")
+        QMessageBox.information(self, "Cut/Fill Analysis", msg)
+
+    def _section_template(self, n):
+        """SectionTemplate from the earthwork inputs; None without a width, False after reporting bad input."""
+        raw = self.section_width_edit.text().replace(',', ' ').split()
+        if not raw:
+            return None
+        try:
+            widths = [float(val) for val in raw]
+            cut_slope = float(self.cut_slope_edit.text())
+            fill_slope = float(self.fill_slope_edit.text())
+        except ValueError:
+            QMessageBox.critical(self, "Input Error", "Please enter valid numbers for the section width and side slopes.")
+            return False
+        if len(widths) not in (1, n):
+            QMessageBox.critical(self, "Input Error", f"Number of section widths ({len(widths)}) does not match number of points ({n}).")
+            return False
+        if min(widths) < 0 or cut_slope < 0 or fill_slope < 0:
+            QMessageBox.critical(self, "Input Error", "Section widths and side slopes cannot be negative.")
+            return False
+        settings["section_width"] = self.section_width_edit.text()
+        settings["cut_side_slope"] = cut_slope
+        settings["fill_side_slope"] = fill_slope
+        settings["volume_method"] = self.volume_method_cb.currentText()
+        save_settings()
+        return SectionTemplate(widths[0] if len(widths) == 1 else widths, cut_slope, fill_slope)
+
+    def _show_mass_haul(self):
+        earthwork = getattr(self, '_earthwork', None)
+        if self.mass_haul_cb.isChecked() and earthwork is not None:
+            self.renderer.set_mass_haul(earthwork.x, earthwork.mass, self.graph_line_color)
+        else:
+            self.renderer.set_mass_haul()
+
+    def toggle_mass_haul(self, state=None):
+        settings["show_mass_haul"] = self.mass_haul_cb.isChecked()
+        save_settings()
+        self._show_mass_haul()
+        self.renderer.draw()
+
+    def _design_levels_for(self, mode, x_vals, y_vals):
+        """Design level at every station for a design_level_mode_cb mode; None after reporting bad input."""
         # --- Design Level Calculation ---
         if mode == "Fixed":
             try:
                 design_level = float(self.design_level_edit.text())
             except ValueError:
                 QMessageBox.critical(self, "Input Error", "Please enter a valid number for the design level.")
-                return
-            design_levels = np.array([design_level] * len(x_vals))
+                return None
+            design_levels = np.full(len(x_vals), design_level)
         elif mode == "Gradient":
             try:
                 start = float(self.gradient_start_edit.text())
                 end = float(self.gradient_end_edit.text())
             except ValueError:
                 QMessageBox.critical(self, "Input Error", "Please enter valid numbers for start and end design levels.")
-                return
-            n = len(x_vals)
-            if n < 2:
-                QMessageBox.information(self, "Cut/Fill Analysis", "Not enough data to analyze.")
-                return
-            design_levels = np.array([start + (end - start) * i / (n - 1) for i in range(n)])
+                return None
+            design_levels = np.linspace(start, end, len(x_vals))
         elif mode == "From Points":
             raw = self.from_points_edit.text().replace(',', ' ').split()
             try:
                 design_levels = np.array([float(val) for val in raw])
             except ValueError:
                 QMessageBox.critical(self, "Input Error", "Please enter valid numbers for all design levels.")
-                return
+                return None
             if len(design_levels) != len(x_vals):
                 QMessageBox.critical(self, "Input Error", f"Number of design levels ({len(design_levels)}) does not match number of points ({len(x_vals)}).")
-                return
+                return None
         elif mode == "First RL":
             # Try to get from leveling tab if possible
             first_rl = None
@@ -696,116 +890,93 @@ class GraphApp(QWidget):
                     first_rl = y_vals[0]
             except Exception:
                 QMessageBox.critical(self, "Input Error", "Could not get First RL from leveling data.")
-                return
-            design_levels = np.array([first_rl] * len(x_vals))
+                return None
+            design_levels = np.full(len(x_vals), first_rl)
         elif mode == "Comparison Profile":
-            if not hasattr(self, '_comparison_data') or not self._comparison_data:
+            if not hasattr(self, '_comparison_data') or not len(self._comparison_data):
                 QMessageBox.critical(self, "Input Error", "No comparison profile loaded. Please load a comparison profile first.")
-                return
+                return None
             if len(self._comparison_data) != len(x_vals):
                 QMessageBox.critical(self, "Input Error", f"Number of points in comparison profile ({len(self._comparison_data)}) does not match main profile ({len(x_vals)}).")
-                return
-            design_levels = np.array([y for x, y in self._comparison_data])
+                return None
+            design_levels = np.asarray(self._comparison_data)[:, 1]
         elif mode == "Polyline":
-            if not hasattr(self, '_polyline_vertices') or len(self._polyline_vertices) < 2:
+            if len(self.polyline) < 2:
                 QMessageBox.critical(self, "Input Error", "Please define at least 2 polyline vertices.")
-                return
-            poly_x, poly_y = zip(*sorted(self._polyline_vertices))
-            smooth_factor = self.smooth_polyline_slider.value() / 100.0
-            if smooth_factor > 0 and len(self._polyline_vertices) >= 3:
-                try:
-                    from scipy.interpolate import make_interp_spline
-                    n_points = max(100, len(poly_x) * 10)
-                    xnew = np.array(x_vals)
-                    spline = make_interp_spline(poly_x, poly_y, k=2)
-                    y_smooth = spline(xnew)
-                    y_linear = np.interp(xnew, poly_x, poly_y)
-                    design_levels = (1 - smooth_factor) * y_linear + smooth_factor * y_smooth
-                except Exception:
-                    design_levels = np.interp(x_vals, poly_x, poly_y)
-            else:
-                design_levels = np.interp(x_vals, poly_x, poly_y)
+                return None
+            design_levels = self.polyline.levels(x_vals, self.smooth_polyline_slider.value() / 100.0)
         else:
             QMessageBox.critical(self, "Input Error", "Unknown design level mode.")
+            return None
+        return design_levels
+
+    def export_cut_fill_csv(self):
+        if getattr(self, '_cut_fill', None) is None:
             return
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Cut/Fill", "", "CSV Files (*.csv)")
+        if file_path:
+            try:
+                precision = settings.get("precision", 3)
+                headers, rows = CUT_FILL_HEADERS, self._cut_fill.rows(precision)
+                if getattr(self, '_earthwork', None) is not None:
+                    headers = headers + VOLUME_HEADERS[1:]
+                    rows = [row + volumes[1:] for row, volumes in zip(rows, self._earthwork.rows(precision))]
+                with open(file_path, 'w', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(headers)
+                    writer.writerows(rows)
+                QMessageBox.information(self, "Success", "Cut/fill exported to CSV.")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to export cut/fill: {e}")
+
+    def graph_snapshot(self):
+        """GraphSnapshot of what the graph currently shows, for offscreen rendering."""
+        if self._table_dirty:
+            self.sync_data_from_table()
+        renderer = self.renderer
+        x_vals, y_vals = renderer.profile
+        comparison = None
+        if renderer.comparison_line.get_visible():
+            comparison = renderer.comparison_line.get_data()
+        polyline = None
+        if len(self.polyline) >= 2:
+            curve_x, curve_y, _smoothed = self.polyline.curve(self.smooth_polyline_slider.value() / 100.0)
+            polyline = (curve_x, curve_y)
+        cut_fill = None
+        if getattr(self, '_cut_fill', None) is not None:
+            cut_fill = (self._cut_fill.x, self._cut_fill.ground, self._cut_fill.design)
+        return GraphSnapshot(x_vals, y_vals,
+                             line_color=settings.get('graph_line_color', self.graph_line_color),
+                             marker_color=settings.get('graph_marker_color', self.graph_marker_color),
+                             show_markers=self.show_markers,
+                             label_color=self.label_color if self.show_labels else None,
+                             comparison=comparison, comparison_color=self.comparison_line_color,
+                             polyline=polyline, cut_fill=cut_fill, dark=self._graph_dark_mode)
+
+    def _export_graph_file(self, file_path, fmt):
+        """Renders the graph offscreen and writes file_path from the worker; graphExported reports the outcome."""
+        future = render_service.submit(self.graph_snapshot(), fmt)
+
+        def write(done):
+            try:
+                with open(file_path, 'wb') as f:
+                    f.write(done.result())
+            except Exception as e:
+                self.graphExported.emit(file_path, str(e))
+            else:
+                self.graphExported.emit(file_path, "")
+        future.add_done_callback(write)
 
-        # --- Redraw Graph ---
-        self._redraw_graph()  # Clear previous analysis
-        ax = self.ax
-        # Draw design level line(s)
-        if mode == "Polyline" and hasattr(self, '_polyline_vertices') and len(self._polyline_vertices) >= 2:
-            self._draw_polyline()
-        elif np.all(design_levels == design_levels[0]):
-            ax.axhline(y=design_levels[0], color='red', linestyle='--', linewidth=1.5, label=f'Design Level ({design_levels[0]:.2f})')
+    def _on_graph_exported(self, file_path, error):
+        if error:
+            QMessageBox.critical(self, "Error", f"Failed to export graph: {error}")
         else:
-            ax.plot(x_vals, design_levels, color='red', linestyle='--', linewidth=1.5, label='Design Level')
-
-        # --- Shade cut and fill areas ---
-        ax.fill_between(x_vals, y_vals, design_levels, where=(y_vals >= design_levels), facecolor='orange', alpha=0.4, interpolate=True, label='Cut')
-        ax.fill_between(x_vals, y_vals, design_levels, where=(y_vals < design_levels), facecolor='cyan', alpha=0.4, interpolate=True, label='Fill')
-
-        # --- Calculate cut and fill areas ---
-        cut_area = 0.0
-        fill_area = 0.0
-        for i in range(1, len(x_vals)):
-            x0, x1 = x_vals[i-1], x_vals[i]
-            y0, y1 = y_vals[i-1], y_vals[i]
-            d0, d1 = design_levels[i-1], design_levels[i]
-            h0 = y0 - d0
-            h1 = y1 - d1
-            width = abs(x1 - x0)
-            if h0 * h1 >= 0:  # Both points are on the same side
-                area = 0.5 * (h0 + h1) * width
-                if area > 0:
-                    cut_area += area
-                else:
-                    fill_area += abs(area)
-            else:  # Line crosses the design level
-                if (h1 - h0) != 0:
-                    x_intersect = x0 - h0 * (x1 - x0) / (h1 - h0)
-                    d_intersect = d0 + (d1 - d0) * (x_intersect - x0) / (x1 - x0) if (x1 - x0) != 0 else d0
-                else:
-                    x_intersect = x0
-                    d_intersect = d0
-                area1 = 0.5 * h0 * (x_intersect - x0)
-                if area1 > 0:
-                    cut_area += area1
-                else:
-                    fill_area += abs(area1)
-                area2 = 0.5 * h1 * (x1 - x_intersect)
-                if area2 > 0:
-                    cut_area += area2
-                else:
-                    fill_area += abs(area2)
-
-        ax.legend()
-        self.canvas.draw()
-
-        # --- Show summary message ---
-        msg = f"Design Level Mode: {mode}\n"
-        if mode == "Fixed":
-            msg += f"Design Elevation: {design_levels[0]:.2f}\n"
-        elif mode == "Gradient":
-            msg += f"Start: {self.gradient_start_edit.text()}, End: {self.gradient_end_edit.text()}\n"
-        elif mode == "From Points":
-            msg += f"Design Levels: {self.from_points_edit.text()}\n"
-        elif mode == "First RL":
-            msg += f"First RL: {design_levels[0]:.2f}\n"
-        elif mode == "Comparison Profile":
-            msg += f"Using loaded comparison profile as design level.\n"
-        elif mode == "Polyline":
-            msg += f"Polyline vertices: {self.polyline_vertex_label.text()}\n"
-        msg += f"\nCut Area: {cut_area:.2f}\nFill Area: {fill_area:.2f}"
-        QMessageBox.information(self, "Cut/Fill Analysis", msg)
+            QMessageBox.information(self, "Success", f"Graph exported to {os.path.basename(file_path)}.")
 
     def export_pdf(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Export Graph", "", "PDF Files (*.pdf)")
         if file_path:
-            try:
-                self.fig.savefig(file_path, format='pdf', bbox_inches='tight')
-                QMessageBox.information(self, "Success", "Graph exported to PDF.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to export PDF: {e}")
+            self._export_graph_file(file_path, "pdf")
 
     def show_context_menu(self, pos):
         menu = QMenu(self)
@@ -858,8 +1029,21 @@ class GraphApp(QWidget):
             self.table.removeRow(row)
 
     def update_from_leveling(self, results):
+        # One color pass and one redraw for the whole profile instead of one per cell
+        self.table.blockSignals(True)
+        try:
+            self._fill_from_leveling(results)
+        finally:
+            self.table.blockSignals(False)
+        self._update_all_table_cell_colors()
+        self._redraw_graph()
+
+    def _fill_from_leveling(self, results):
         self.table.setRowCount(0)
         self._last_data.clear()
+        if isinstance(results, LevelingResult):
+            # Read point labels and adjusted RLs straight from the result arrays
+            results = zip(results.labels, results.adjusted_rl.tolist())
         for row in results:
             point, elev, dist = None, None, None
             if isinstance(row, dict):
@@ -881,11 +1065,9 @@ class GraphApp(QWidget):
                 self.table.setItem(row_idx, 0, QTableWidgetItem(str(point)))
                 self.table.setItem(row_idx, 1, QTableWidgetItem(f"{y_val:.3f}"))
                 self.table.setItem(row_idx, 2, QTableWidgetItem(f"{x_val:.3f}" if dist is not None else f"{x_val:.3f}"))
-        self._update_all_table_cell_colors()
-        self._redraw_graph()
 
     def toggle_compare_mode(self):
-        if not hasattr(self, '_comparison_data') or not self._comparison_data:
+        if not hasattr(self, '_comparison_data') or not len(self._comparison_data):
             from PyQt6.QtWidgets import QMessageBox
             resp = QMessageBox.question(self, "Comparison Profile", "No comparison profile loaded. Load one now?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if resp == QMessageBox.StandardButton.Yes:
@@ -896,14 +1078,14 @@ class GraphApp(QWidget):
         self._redraw_graph()
 
     def _redraw_graph(self, temp_line=None):
-        import numpy as np
-        self.sync_data_from_table()
-        self.ax.clear()
+        """Updates the retained graph artists from the table and settings and redraws."""
+        if self._table_dirty:
+            self.sync_data_from_table()
+        renderer = self.renderer
+        renderer.clear_transient()
         data = self._last_data
-        print("Redrawing graph with data:", data)
         line_color = settings.get('graph_line_color', self.graph_line_color)
         marker_color = settings.get('graph_marker_color', self.graph_marker_color)
-        highlight_color = settings.get('graph_highlight_color', 'crimson')
         interval_mode = self.interval_mode
         interval = None
         x_vals, y_vals = [], []
@@ -917,12 +1099,10 @@ class GraphApp(QWidget):
                     x_vals = [i * interval for i in range(N)]
                     y_vals = [y for (x, y) in data]
                     # Update table's Distance column if present
-                    for i in range(min(N, self.table.rowCount())):
-                        if self.table.columnCount() > 2:
-                            self.table.setItem(i, 2, QTableWidgetItem(f"{x_vals[i]:.3f}"))
+                    self._write_interval_distances(x_vals)
                     # Resample comparison profile if present
-                    if getattr(self, '_compare_mode', False) and hasattr(self, '_comparison_data') and self._comparison_data:
-                        orig_comp_x, orig_comp_y = zip(*self._comparison_data)
+                    if getattr(self, '_compare_mode', False) and hasattr(self, '_comparison_data') and len(self._comparison_data):
+                        orig_comp_x, orig_comp_y = np.asarray(self._comparison_data).T
                         comp_x = x_vals
                         comp_y = np.interp(x_vals, orig_comp_x, orig_comp_y)
                 else:
@@ -936,202 +1116,161 @@ class GraphApp(QWidget):
             else:
                 x_vals, y_vals = zip(*data)
             # Resample comparison profile to match x_vals if in compare mode
-            if getattr(self, '_compare_mode', False) and hasattr(self, '_comparison_data') and self._comparison_data:
-                orig_comp_x, orig_comp_y = zip(*self._comparison_data)
+            if getattr(self, '_compare_mode', False) and hasattr(self, '_comparison_data') and len(self._comparison_data):
+                orig_comp_x, orig_comp_y = np.asarray(self._comparison_data).T
                 comp_x = x_vals
                 comp_y = np.interp(x_vals, orig_comp_x, orig_comp_y)
-        # Plot main profile
-        if x_vals and y_vals:
-            self.ax.plot(x_vals, y_vals, marker='o' if self.show_markers else None, color=line_color, linewidth=2)
-            if self.show_markers:
-                self.ax.scatter(x_vals, y_vals, s=60, color=marker_color, edgecolor='black', zorder=5)
-            if self._highlighted_index is not None and 0 <= self._highlighted_index < len(y_vals):
-                hx, hy = x_vals[self._highlighted_index], y_vals[self._highlighted_index]
-                self.ax.scatter([hx], [hy], s=180, color=highlight_color, edgecolor='black', zorder=10, marker='o')
-            if self.show_labels:
-                self._draw_labels()
-            if self.show_grade_slopes:
-                self._draw_grade_slopes()
-            self.ax.grid(True, linestyle='--', alpha=0.7)
-            self.ax.minorticks_on()
-            self.ax.grid(which='minor', linestyle=':', linewidth=0.5, alpha=0.4)
-        # Plot comparison profile if in compare mode
-        if getattr(self, '_compare_mode', False) and hasattr(self, '_comparison_data') and self._comparison_data and comp_x and comp_y:
-            self.ax.plot(comp_x, comp_y, color=self.comparison_line_color, linestyle='--', linewidth=2, label='Comparison Profile')
-            self.ax.legend()
+        # Main profile: only new data moves the view
+        x_arr = np.asarray(x_vals, dtype=float)
+        y_arr = np.asarray(y_vals, dtype=float)
+        data_changed = renderer.set_profile(x_arr, y_arr)
+        renderer.profile_line.set_color(line_color)
+        renderer.set_markers(self.show_markers, marker_color)
+        # Comparison profile if in compare mode
+        if getattr(self, '_compare_mode', False) and hasattr(self, '_comparison_data') and len(self._comparison_data) and len(comp_x) and len(comp_y):
+            renderer.set_line(renderer.comparison_line, comp_x, comp_y, color=self.comparison_line_color)
+        else:
+            renderer.set_line(renderer.comparison_line)
         # Always draw the polyline if it's being designed
         self._draw_polyline()
-        self.ax.set_xlabel("Point", fontsize=11)
-        self.ax.set_ylabel("Elevation", fontsize=11)
-        self.ax.set_title("Profile Graph (Elevation vs. Point)", fontsize=12, fontweight='bold')
-        self.fig.tight_layout()
-        self.canvas.draw()
-
-    def _draw_labels(self):
-        if not self._last_data:
-            return
-        x_vals, y_vals = zip(*self._last_data)
-        xlim = self.ax.get_xlim()
-        ylim = self.ax.get_ylim()
-        skip = 1
-        if len(x_vals) > 30:
-            skip = max(1, len(x_vals)//20)
-        for i, (x, y) in enumerate(zip(x_vals, y_vals)):
-            if i % skip != 0:
-                continue
-            if xlim[0] <= x <= xlim[1] and ylim[0] <= y <= ylim[1]:
-                self.ax.annotate(f"{y:.2f}", (x, y), textcoords="offset points", xytext=(0,8), ha='center', fontsize=8, color=self.label_color)
-        # Draw custom annotations for non-numeric parts (e.g., (cp))
-        for ann in getattr(self, '_annotations', []):
-            if xlim[0] <= ann['x'] <= xlim[1] and ylim[0] <= ann['y'] <= ylim[1]:
-                self.ax.annotate(ann['text'], (ann['x'], ann['y']), textcoords="offset points", xytext=(0,18), ha='center', fontsize=8, color='purple', fontweight='bold')
-
-    def _draw_grade_slopes(self):
-        if not self.show_grade_slopes or not self._last_data or len(self._last_data) < 2:
+        renderer.set_sketches([((x0, y0), (x1, y1)) for (x0, y0, x1, y1) in self._sketches()])
+        if temp_line is not None:
+            (x0, y0), (x1, y1) = temp_line
+            renderer.set_line(renderer.sketch_line, [x0, x1], [y0, y1])
+        else:
+            renderer.set_line(renderer.sketch_line)
+        self._update_highlight()
+        if data_changed:
+            # The last analysis no longer describes this profile
+            self._cut_fill = None
+            self._earthwork = None
+            self.export_cut_fill_btn.setEnabled(False)
+            renderer.set_mass_haul()
+            renderer.autoscale()
+        self._draw_labels()
+        self._draw_grade_slopes()
+        renderer.update_legend()
+        renderer.draw()
+
+    def _write_interval_distances(self, x_vals):
+        if self.table.columnCount() <= 2:
             return
-        
-        data = sorted(self._last_data)
-        x_vals, y_vals = zip(*data)
-        
-        # Skipping logic to avoid clutter
-        skip = 1
-        if len(x_vals) > 30:
-            skip = max(1, len(x_vals) // 15)
-
-        for i in range(len(x_vals) - 1):
-            if i % skip != 0:
-                continue
+        self.table.blockSignals(True)
+        try:
+            for i in range(min(len(x_vals), self.table.rowCount())):
+                text = f"{x_vals[i]:.3f}"
+                item = self.table.item(i, 2)
+                if item is None or item.text() != text:
+                    self.table.setItem(i, 2, QTableWidgetItem(text))
+        finally:
+            self.table.blockSignals(False)
+
+    def _sketches(self):
+        return [ann for ann in self._annotations if isinstance(ann, tuple)]
+
+    def _update_highlight(self):
+        """Moves the highlight overlay to the selected table row."""
+        x_vals, y_vals = self.renderer.profile
+        index = self._highlighted_index
+        if index is not None and 0 <= index < len(y_vals):
+            color = settings.get('graph_highlight_color', 'crimson')
+            self.renderer.set_line(self.renderer.highlight, [x_vals[index]], [y_vals[index]], markerfacecolor=color)
+        else:
+            self.renderer.set_line(self.renderer.highlight)
 
+    def _draw_labels(self):
+        items, notes = [], []
+        if self.show_labels and self._last_data:
+            x_vals, y_vals = zip(*self._last_data)
+            xlim = self.ax.get_xlim()
+            ylim = self.ax.get_ylim()
+            skip = 1
+            if len(x_vals) > 30:
+                skip = max(1, len(x_vals)//20)
+            for i in range(0, len(x_vals), skip):
+                x, y = x_vals[i], y_vals[i]
+                if xlim[0] <= x <= xlim[1] and ylim[0] <= y <= ylim[1]:
+                    items.append((x, y, f"{y:.2f}", 0))
+            # Draw custom annotations for non-numeric parts (e.g., (cp))
+            for ann in self._point_notes + [ann for ann in self._annotations if isinstance(ann, dict)]:
+                if xlim[0] <= ann['x'] <= xlim[1] and ylim[0] <= ann['y'] <= ylim[1]:
+                    notes.append((ann['x'], ann['y'], ann['text'], 0))
+        self.renderer.set_texts("values", items, self.label_color, xytext=(0, 8), fontsize=8)
+        self.renderer.set_texts("notes", notes, 'purple', xytext=(0, 18), fontsize=8, fontweight='bold')
+
+    def _grade_slope_items(self, x_vals, y_vals, skip):
+        items = []
+        for i in range(0, len(x_vals) - 1, skip):
             x1, y1 = x_vals[i], y_vals[i]
             x2, y2 = x_vals[i+1], y_vals[i+1]
-            
             if x2 - x1 == 0:
                 slope = float('inf')
             else:
                 slope = (y2 - y1) / (x2 - x1) * 100
-            
-            mid_x = (x1 + x2) / 2
-            mid_y = (y1 + y2) / 2
             angle = np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi
-            
-            self.ax.text(mid_x, mid_y, f'{slope:.2f}%', color=self.grade_slope_label_color,
-                         ha='center', va='bottom', rotation=angle, fontsize=8,
-                         bbox=dict(facecolor='white', alpha=0.5, edgecolor='none', boxstyle='round,pad=0.1'))
+            items.append(((x1 + x2) / 2, (y1 + y2) / 2, f'{slope:.2f}%', angle))
+        return items
 
-    def _draw_polyline(self):
-        if not self._polyline_vertices and not (getattr(self, '_polyline_add_mode', False) and self._polyline_preview_point):
-            return
-
-        import numpy as np
-        
-        # Sort vertices by x-axis to match tkinter app's behavior for spline consistency
-        sorted_vertices = sorted(self._polyline_vertices)
-
-        # Start with existing vertices
-        if sorted_vertices:
-            poly_x, poly_y = zip(*sorted_vertices)
-            poly_x, poly_y = list(poly_x), list(poly_y)
+    def _draw_grade_slopes(self):
+        items = []
+        if self.show_grade_slopes and len(self._last_data) >= 2:
+            data = sorted(self._last_data)
+            x_vals, y_vals = zip(*data)
+            # Skipping logic to avoid clutter
+            skip = 1
+            if len(x_vals) > 30:
+                skip = max(1, len(x_vals) // 15)
+            items = self._grade_slope_items(x_vals, y_vals, skip)
+        self.renderer.set_texts("slopes", items, self.grade_slope_label_color, va='bottom', fontsize=8,
+                                bbox=dict(facecolor='white', alpha=0.5, edgecolor='none', boxstyle='round,pad=0.1'))
+
+    def _update_polyline_preview(self):
+        """Dashed segment from the last vertex to the cursor while adding vertices."""
+        renderer = self.renderer
+        if getattr(self, '_polyline_add_mode', False) and self._polyline_preview_point is not None and self.polyline.last_added:
+            last_x, last_y = self.polyline.last_added
+            preview_x, preview_y = self._polyline_preview_point
+            renderer.set_line(renderer.preview_line, [last_x, preview_x], [last_y, preview_y])
         else:
-            poly_x, poly_y = [], []
-
-        # Add preview point if in add mode and a preview point exists
-        if getattr(self, '_polyline_add_mode', False) and self._polyline_preview_point is not None:
-            # The preview line should only be drawn from the last vertex.
-            # If there are no vertices, there is nothing to preview from.
-            if self._polyline_vertices:
-                last_x, last_y = self._polyline_vertices[-1]
-                preview_x, preview_y = self._polyline_preview_point
-                # Draw a temporary dashed line for the preview segment
-                self.ax.plot([last_x, preview_x], [last_y, preview_y], color='magenta', linestyle='--', linewidth=1.5, zorder=9)
-
-        # If there are committed vertices, draw them
-        if not self._polyline_vertices:
-            return # Nothing more to do if no vertices exist
-
-        smooth_factor = self.smooth_polyline_slider.value() / 100.0
-        
-        # Draw the main polyline (either smoothed or linear)
-        if len(poly_x) < 2: # Can't draw a line with less than 2 points
-            if poly_x: # Draw a single marker if only one point
-                self.ax.scatter(poly_x, poly_y, color='red', s=40, zorder=10)
-            return
+            renderer.set_line(renderer.preview_line)
 
-        if smooth_factor > 0 and len(poly_x) >= 3:
-            try:
-                from scipy.interpolate import make_interp_spline
-                # Sort vertices by x-axis for correct spline interpolation
-                sorted_points = sorted(zip(poly_x, poly_y))
-                sorted_x, sorted_y = zip(*sorted_points)
-                
-                n_points = max(100, len(sorted_x) * 10)
-                xnew = np.linspace(min(sorted_x), max(sorted_x), n_points)
-                
-                spline = make_interp_spline(sorted_x, sorted_y, k=2)
-                y_smooth = spline(xnew)
-                
-                y_linear = np.interp(xnew, sorted_x, sorted_y)
-                y_blend = (1 - smooth_factor) * y_linear + smooth_factor * y_smooth
-                
-                self.ax.plot(xnew, y_blend, color='red', linestyle='-', linewidth=2, marker=None, label='Design Polyline (Smooth)')
-                self.ax.scatter(poly_x, poly_y, color='red', s=40, zorder=10)
-            except Exception:
-                # Fallback to linear plot on error
-                self.ax.plot(poly_x, poly_y, color='red', linestyle='-', linewidth=2, marker='o', label='Design Polyline')
+    def _draw_polyline(self):
+        renderer = self.renderer
+        self._update_polyline_preview()
+        slope_items = []
+        poly_x, poly_y = zip(*self.polyline) if self.polyline else ((), ())
+        curve_x, curve_y, smoothed = self.polyline.curve(self.smooth_polyline_slider.value() / 100.0)
+
+        if len(poly_x) < 2:
+            # Can't draw a line with less than 2 points; show a single vertex as a marker
+            renderer.set_line(renderer.polyline_line)
+            renderer.set_points(renderer.polyline_points, poly_x, poly_y)
+        elif smoothed:
+            renderer.set_line(renderer.polyline_line, curve_x, curve_y, marker='None', label='Design Polyline (Smooth)')
+            renderer.set_points(renderer.polyline_points, poly_x, poly_y)
         else:
             # Draw a simple linear polyline
-            self.ax.plot(poly_x, poly_y, color='red', linestyle='-', linewidth=2, marker='o', label='Design Polyline')
+            renderer.set_line(renderer.polyline_line, curve_x, curve_y, marker='o', label='Design Polyline')
+            renderer.set_points(renderer.polyline_points)
 
         # Add grade slope labels for the polyline
         if self.show_grade_slopes and len(poly_x) > 1:
             skip_poly = 1
             if len(poly_x) > 10:
                 skip_poly = max(1, len(poly_x) // 5)
-
-            for i in range(len(poly_x) - 1):
-                if i % skip_poly != 0:
-                    continue
-
-                x1, y1 = poly_x[i], poly_y[i]
-                x2, y2 = poly_x[i+1], poly_y[i+1]
-                if x2 - x1 == 0:
-                    slope = float('inf')
-                else:
-                    slope = (y2 - y1) / (x2 - x1) * 100
-                mid_x = (x1 + x2) / 2
-                mid_y = (y1 + y2) / 2
-                angle = np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi
-                self.ax.text(mid_x, mid_y, f'{slope:.2f}%', color=self.grade_slope_label_color,
-                             ha='center', va='bottom', rotation=angle, fontsize=8,
-                             bbox=dict(facecolor='white', alpha=0.5, edgecolor='none', boxstyle='round,pad=0.1'))
-        
-        return # The old code below is now replaced by the logic above
-
-        # Use the order the user added the vertices
-        poly_x, poly_y = zip(*self._polyline_vertices)
-        smooth_factor = self.smooth_polyline_slider.value() / 100.0
-        # Add preview point if in add mode and preview exists
-        if getattr(self, '_polyline_add_mode', False) and self._polyline_preview_point is not None:
-            px, py = self._polyline_preview_point
-            poly_x = list(poly_x) + [px]
-            poly_y = list(poly_y) + [py]
-            print(f"[DEBUG] Drawing polyline with preview: {list(zip(poly_x, poly_y))}")
-        else:
-            print(f"[DEBUG] Drawing polyline: {list(zip(poly_x, poly_y))}")
-        if smooth_factor > 0 and len(poly_x) >= 3:
-            try:
-                from scipy.interpolate import make_interp_spline
-                n_points = max(100, len(poly_x) * 10)
-                xnew = np.linspace(min(poly_x), max(poly_x), n_points)
-                spline = make_interp_spline(poly_x, poly_y, k=2)
-                y_smooth = spline(xnew)
-                y_linear = np.interp(xnew, poly_x, poly_y)
-                y_blend = (1 - smooth_factor) * y_linear + smooth_factor * y_smooth
-                self.ax.plot(xnew, y_blend, color='red', linestyle='-', linewidth=2, marker=None, label='Design Polyline (Smooth)')
-                self.ax.scatter(poly_x, poly_y, color='red', s=40, zorder=10)
-            except Exception:
-                self.ax.plot(poly_x, poly_y, color='red', linestyle='-', linewidth=2, marker='o', label='Design Polyline')
-        else:
-            self.ax.plot(poly_x, poly_y, color='red', linestyle='-', linewidth=2, marker='o', label='Design Polyline')
+            slope_items = self._grade_slope_items(poly_x, poly_y, skip_poly)
+        renderer.set_texts("polyline_slopes", slope_items, self.grade_slope_label_color, va='bottom', fontsize=8,
+                           bbox=dict(facecolor='white', alpha=0.5, edgecolor='none', boxstyle='round,pad=0.1'))
+
+    def set_comparison_profile(self, data):
+        """Shows data, an (N, 2) array of distance/elevation pairs, as the comparison profile.
+
+        The array is used as given, so a profile mapped from a project file
+        is not copied.
+        """
+        self._comparison_data = data
+        self._compare_mode = True  # Show comparison profile immediately
+        self._redraw_graph()
 
     def load_comparison_profile(self):
         print("DEBUG: load_comparison_profile called")
@@ -1157,31 +1296,64 @@ class GraphApp(QWidget):
             QMessageBox.warning(self, "Comparison Profile", "Please map at least 'Elevation' and 'Point' or 'Distance' columns before importing.")
             print("DEBUG: Invalid mapping, aborting import.")
             return
-        try:
-            data = []
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                if has_header:
-                    next(reader, None)
-                for row in reader:
-                    try:
-                        x = float(row[mapping.get("Distance", 0)]) if "Distance" in mapping else float(row[mapping.get("Point", 0)])
-                        y = float(row[mapping.get("Elevation", 1)])
-                        data.append((x, y))
-                    except Exception as e:
-                        print(f"DEBUG: Skipping row {row} due to error: {e}")
-                        continue
-            print(f"DEBUG: Loaded {len(data)} points from file")
-            if not data:
-                QMessageBox.warning(self, "Comparison Profile", "No valid data found in the selected file.")
-                return
-            self._comparison_data = data
-            self._compare_mode = True  # Show comparison profile immediately
-            self._redraw_graph()
-            QMessageBox.information(self, "Comparison Profile", f"Loaded {len(data)} points from comparison profile.")
-        except Exception as e:
-            print(f"DEBUG: Exception in load_comparison_profile: {e}")
-            QMessageBox.critical(self, "Comparison Profile Error", f"Failed to load comparison profile:\n{e}")
+        # Parsed into typed columns in a worker thread, by several processes for large files
+        x_source = mapping["Distance"] if "Distance" in mapping else mapping["Point"]
+        self._start_comparison_load(file_path, [x_source, mapping["Elevation"]], has_header)
+
+    def _start_comparison_load(self, file_path, sources, has_header):
+        for _thread, worker in self._load_jobs.values():
+            worker.cancel()  # Only the latest file is shown
+        self._load_job_id += 1
+        job_id = self._load_job_id
+        thread = QThread(self)
+        worker = ComparisonProfileWorker(file_path, sources, has_header)
+        worker.moveToThread(thread)
+        dialog = QProgressDialog(f"Loading {os.path.basename(file_path)}...", "Cancel", 0, 100, self)
+        dialog.setWindowTitle("Comparison Profile")
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.canceled.connect(worker.cancel)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+
+        def on_progress(percent):
+            dialog.setValue(percent)
+            self.progress_bar.setValue(percent)
+
+        def on_finished():
+            dialog.close()
+            if not self._load_jobs.keys() - {job_id}:
+                self.progress_bar.setVisible(False)
+
+        thread.started.connect(worker.run)
+        worker.progress.connect(on_progress)
+        worker.result.connect(lambda data: self._on_comparison_loaded(job_id, data))
+        worker.error.connect(lambda message: QMessageBox.critical(
+            self, "Comparison Profile Error", f"Failed to load comparison profile:\n{message}"))
+        worker.finished.connect(thread.quit)
+        worker.finished.connect(on_finished)
+        thread.finished.connect(lambda: self._load_jobs.pop(job_id, None))
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        self._load_jobs[job_id] = (thread, worker)
+        thread.start()
+
+    def _on_comparison_loaded(self, job_id, data):
+        if job_id != self._load_job_id:
+            return  # Superseded by a later file
+        if not len(data):
+            QMessageBox.warning(self, "Comparison Profile", "No valid data found in the selected file.")
+            return
+        self.set_comparison_profile(data)
+        QMessageBox.information(self, "Comparison Profile", f"Loaded {len(data)} points from comparison profile.")
+
+    def stop_loads(self):
+        """Cancels running comparison profile loads and waits for their threads to exit."""
+        for thread, worker in list(self._load_jobs.values()):
+            worker.cancel()
+            thread.quit()
+            thread.wait()
 
     def _show_overlay_label(self):
         if self._overlay_label is not None:
@@ -1267,38 +1439,35 @@ class GraphApp(QWidget):
                 self._overlay_label.show()
         self._redraw_graph()
 
+    def _queue_hover(self, event):
+        self._hover_event = event
+        if not self._hover_timer.isActive():
+            screen = self.screen()
+            refresh_rate = screen.refreshRate() if screen is not None else 60.0
+            self._hover_timer.start(max(1, int(1000 / (refresh_rate or 60.0))))
+
+    def _process_hover(self):
+        event, self._hover_event = self._hover_event, None
+        if event is not None:
+            self._on_graph_hover(event)
+
     def _on_graph_hover(self, event):
         if not event.inaxes or not self._last_data:
             self._data_cursor_label.hide()
             return
-        # Check if any lines are plotted
-        if not self.ax.lines:
+        if event.xdata is None or event.ydata is None:
             self._data_cursor_label.hide()
             return
-        line = self.ax.lines[0]  # Assuming the main profile is the first line
-        x_data, y_data = line.get_data()
-        if event.xdata is None or event.ydata is None:
+        # Interpolate elevation and grade at the cursor's x-position
+        interpolated_y, slope = self.renderer.index.locate(event.xdata)
+        if interpolated_y is None:
             self._data_cursor_label.hide()
             return
-        import numpy as np
-        # Interpolate elevation at the cursor's x-position
-        interpolated_y = np.interp(event.xdata, x_data, y_data)
         # Check if the cursor is vertically close to the interpolated point
         y_threshold = (self.ax.get_ylim()[1] - self.ax.get_ylim()[0]) * 0.05  # 5% of y-axis range
         if abs(event.ydata - interpolated_y) > y_threshold:
             self._data_cursor_label.hide()
             return
-        # Find the segment the cursor is on
-        segment_index = np.searchsorted(x_data, event.xdata) - 1
-        if segment_index < 0:
-            segment_index = 0
-        if segment_index >= len(x_data) - 1:
-            segment_index = len(x_data) - 2
-        x1, y1 = x_data[segment_index], y_data[segment_index]
-        x2, y2 = x_data[segment_index + 1], y_data[segment_index + 1]
-        slope = 0
-        if (x2 - x1) != 0:
-            slope = (y2 - y1) / (x2 - x1) * 100
         info = (f"Distance: {event.xdata:.2f}<br>"
                 f"Elevation: {interpolated_y:.2f}<br>"
                 f"Grade: {slope:.2f}%")
@@ -1323,21 +1492,8 @@ class GraphApp(QWidget):
                 self._redraw_graph()
                 self._exit_annotation_mode()
         elif self._polyline_add_mode:
-            # Left click adds vertex
-            if event.button == 1:  # Left click
-                self._polyline_vertices.append((event.xdata, event.ydata))
-                self._update_polyline_vertex_label()
-                self._redraw_graph()
-            # Right click removes nearest vertex
-            elif event.button == 3:  # Right click
-                if self._polyline_vertices:
-                    import numpy as np
-                    verts = np.array(self._polyline_vertices)
-                    dists = np.hypot(verts[:,0] - event.xdata, verts[:,1] - event.ydata)
-                    idx = np.argmin(dists)
-                    self._polyline_vertices.pop(idx)
-                    self._update_polyline_vertex_label()
-                    self._redraw_graph()
+            # Vertices are added and removed by _add_polyline_vertex/_remove_polyline_vertex
+            pass
         else:
             # Show persistent tooltip on click (optional, for now just same as hover)
             self._on_graph_hover(event)
@@ -1351,8 +1507,10 @@ class GraphApp(QWidget):
     def _on_graph_draw_move(self, event):
         if not self._fullscreen_mode or not self._presentation_mode or not self._drawing or not event.inaxes:
             return
-        # Draw a temporary line (not persistent)
-        self._redraw_graph(temp_line=(self._draw_start, (event.xdata, event.ydata)))
+        # Draw a temporary line (not persistent) as a blitted overlay
+        (x0, y0), x1, y1 = self._draw_start, event.xdata, event.ydata
+        self.renderer.set_line(self.renderer.sketch_line, [x0, x1], [y0, y1])
+        self.renderer.update_overlays()
 
     def _on_graph_draw_end(self, event):
         if not self._fullscreen_mode or not self._presentation_mode or not self._drawing or not event.inaxes:
@@ -1447,7 +1605,7 @@ class GraphApp(QWidget):
         yhalf = (ylim[1] - ylim[0]) / 2 / factor
         self.ax.set_xlim(xmid - xhalf, xmid + xhalf)
         self.ax.set_ylim(ymid - yhalf, ymid + yhalf)
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
     def _pan_graph(self, dx: float = 0.0, dy: float = 0.0):
         # Pan the matplotlib axes by a fraction of the current range
@@ -1457,7 +1615,7 @@ class GraphApp(QWidget):
         yrange = ylim[1] - ylim[0]
         self.ax.set_xlim(xlim[0] + dx * xrange, xlim[1] + dx * xrange)
         self.ax.set_ylim(ylim[0] + dy * yrange, ylim[1] + dy * yrange)
-        self.canvas.draw()
+        self.canvas.draw_idle()
 
     def _animate_hide(self, widget):
         # Fade out animation (if possible)
@@ -1498,18 +1656,17 @@ class GraphApp(QWidget):
         file_path, file_type = QFileDialog.getSaveFileName(self, "Export Graph", "", "PNG Image (*.png);;PDF File (*.pdf)")
         if not file_path:
             return
-        if file_type.startswith("PNG") or file_path.lower().endswith(".png"):
-            self.fig.savefig(file_path, format="png", bbox_inches="tight")
-        elif file_type.startswith("PDF") or file_path.lower().endswith(".pdf"):
-            self.fig.savefig(file_path, format="pdf", bbox_inches="tight")
+        if file_path.lower().endswith(".pdf") or (file_type.startswith("PDF") and not file_path.lower().endswith(".png")):
+            self._export_graph_file(file_path, "pdf")
         else:
-            self.fig.savefig(file_path, bbox_inches="tight")
+            self._export_graph_file(file_path, "png")
 
     def toggle_graph_dark_mode(self):
         self._graph_dark_mode = not self._graph_dark_mode
         settings['graph_dark_mode'] = self._graph_dark_mode
         save_settings()
         self._apply_graph_theme()
+        self.renderer.reset()
         self._redraw_graph()
 
     def _apply_graph_theme(self):
@@ -1524,7 +1681,7 @@ class GraphApp(QWidget):
         if item is not None:
             # Handle alternating row colors
             if self.table.alternatingRowColors() and row % 2 == 1:
-                bg_color = self.table.palette().color(self.table.palette().AlternateBase)
+                bg_color = self.table.palette().color(QPalette.ColorRole.AlternateBase)
             else:
                 bg_color = self.table.palette().color(self.table.backgroundRole())
             item.setBackground(bg_color)
@@ -1542,25 +1699,31 @@ class GraphApp(QWidget):
             self._highlighted_index = row
         else:
             self._highlighted_index = None
-        self._redraw_graph()
+        self._update_highlight()
+        self.renderer.update_overlays()
 
     def _clear_polyline(self):
-        self._polyline_vertices.clear()
+        self.polyline.clear()
         self._update_polyline_vertex_label()
         self._redraw_graph()
 
     def _update_all_table_cell_colors(self):
-        for row in range(self.table.rowCount()):
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item is not None:
-                    if self.table.alternatingRowColors() and row % 2 == 1:
-                        bg_color = self.table.palette().color(self.table.palette().AlternateBase)
-                    else:
-                        bg_color = self.table.palette().color(self.table.backgroundRole())
-                    item.setBackground(bg_color)
-                    brightness = (bg_color.red() * 299 + bg_color.green() * 587 + bg_color.blue() * 114) / 1000
-                    if brightness < 128:
-                        item.setForeground(Qt.GlobalColor.white)
-                    else:
-                        item.setForeground(Qt.GlobalColor.black)
+        # Recoloring emits cellChanged, whose handler would start over for every item
+        was_blocked = self.table.blockSignals(True)
+        try:
+            for row in range(self.table.rowCount()):
+                for col in range(self.table.columnCount()):
+                    item = self.table.item(row, col)
+                    if item is not None:
+                        if self.table.alternatingRowColors() and row % 2 == 1:
+                            bg_color = self.table.palette().color(QPalette.ColorRole.AlternateBase)
+                        else:
+                            bg_color = self.table.palette().color(self.table.backgroundRole())
+                        item.setBackground(bg_color)
+                        brightness = (bg_color.red() * 299 + bg_color.green() * 587 + bg_color.blue() * 114) / 1000
+                        if brightness < 128:
+                            item.setForeground(Qt.GlobalColor.white)
+                        else:
+                            item.setForeground(Qt.GlobalColor.black)
+        finally:
+            self.table.blockSignals(was_blocked)
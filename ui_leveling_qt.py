@@ -1,17 +1,22 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QProgressBar, QTableWidget, QTableWidgetItem,
-    QMenu, QGroupBox, QRadioButton, QHeaderView, QAbstractItemView, QMessageBox, QApplication, QTableWidgetSelectionRange
+    QMenu, QGroupBox, QRadioButton, QHeaderView, QAbstractItemView, QMessageBox, QApplication, QTableWidgetSelectionRange,
+    QCheckBox
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject, QTimer
 from .settings import settings
-from leveling_app_modular.calculator import LevelingCalculator
+from leveling_app_modular.calculator import LevelingCalculator, LevelingCalculatorError, LevelingCalculationCancelled
+from .traverse import LevelingResult
 from PyQt6.QtGui import QColor, QIcon
 from .utils_qt import Tooltip
+from .table_model_qt import LevelingTableView
+from .undo import UndoHistory
 import time
 import os
 ICON_DIR = os.path.join(os.path.dirname(__file__), "icons")
 
 DEFAULT_ROW_COUNT = 30
+LIVE_UPDATE_DELAY_MS = 100  # Window in which table edits are batched into one refresh
 
 class RestoreWorker(QObject):
     progress = pyqtSignal(int, list)
@@ -30,6 +35,39 @@ class RestoreWorker(QObject):
         except Exception as e:
             self.error.emit(str(e))
 
+class CalculationWorker(QObject):
+    progress = pyqtSignal(int, int)  # job id, percent
+    result = pyqtSignal(int, object, object, object)  # job id, calculator, results, stats
+    finished = pyqtSignal()
+    error = pyqtSignal(int, str)
+
+    def __init__(self, job_id, method, first_rl, last_rl, data):
+        super().__init__()
+        self.job_id = job_id
+        self.method = method
+        self.first_rl = first_rl
+        self.last_rl = last_rl
+        self.data = data
+        self.calculator = LevelingCalculator(settings, progress_callback=self._report_progress)
+
+    def _report_progress(self, percent):
+        self.progress.emit(self.job_id, percent)
+
+    def cancel(self):
+        # Called from the GUI thread; the calculator stops at its next progress check
+        self.calculator.cancel()
+
+    def run(self):
+        try:
+            results, stats = self.calculator.calculate_leveling(self.method, self.first_rl, self.last_rl, self.data)
+            self.result.emit(self.job_id, self.calculator, results, stats)
+        except LevelingCalculationCancelled:
+            pass
+        except Exception as e:
+            self.error.emit(self.job_id, str(e))
+        finally:
+            self.finished.emit()
+
 class LevelingApp(QWidget):
     def __init__(self, parent=None, on_results_ready=None, settings_dialog=None, column_customizer=None):
         super().__init__(parent)
@@ -37,12 +75,26 @@ class LevelingApp(QWidget):
         self.settings_dialog = settings_dialog
         self.column_customizer = column_customizer
         self.COLUMN_NAMES = ["Point", "BS", "IS", "FS"]
-        self.undo_stack = []
-        self.redo_stack = []
+        self.history = UndoHistory(settings.get("undo_limit", 100),
+                                   settings.get("undo_memory_mb", 64) * 1024 * 1024)
         self.dirty = False
         self.context_menu_row = -1
         self.clipboard_row = None
+        self.calculator = None  # Holds the last calculation for incremental updates
+        self.results = None  # LevelingResult shown in the results table, for exports
+        self._calc_job_id = 0
+        self._calc_jobs = {}  # job id -> (QThread, CalculationWorker) still running
+        self._table_generation = 0  # Bumped by every edit or input change
+        self._calc_generation = 0  # _table_generation when the latest job took its snapshot
+        self._dirty_rows = set()  # Rows edited since the last live refresh
+        self._change_timer = QTimer(self)
+        self._change_timer.setSingleShot(True)
+        self._change_timer.setInterval(LIVE_UPDATE_DELAY_MS)
+        self._change_timer.timeout.connect(self.flush_changes)
         self._init_ui()
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop_calculations)
         self.push_undo()  # Initial state
 
     def _init_ui(self):
@@ -88,6 +140,20 @@ class LevelingApp(QWidget):
         Tooltip(self.calculate_button, "Calculate results and update the profile graph.")
         self.calculate_button.clicked.connect(self.calculate_and_update)
         action_layout.addWidget(self.calculate_button)
+        self.cancel_calc_button = QPushButton("Cancel")
+        Tooltip(self.cancel_calc_button, "Stop the running calculation.")
+        self.cancel_calc_button.setVisible(False)
+        self.cancel_calc_button.clicked.connect(self.cancel_calculation)
+        action_layout.addWidget(self.cancel_calc_button)
+        self.auto_calc_checkbox = QCheckBox("Auto")
+        Tooltip(self.auto_calc_checkbox, "Recalculate automatically after each edit once results have been calculated.")
+        self.auto_calc_checkbox.setChecked(settings.get("auto_recalculate", False))
+        self.auto_calc_checkbox.toggled.connect(self.set_auto_recalculate)
+        action_layout.addWidget(self.auto_calc_checkbox)
+        # Changing the method or the RLs needs a full Calculate before auto updates resume
+        self.hi_radio.toggled.connect(self.invalidate_calculation)
+        self.first_rl_entry.textChanged.connect(self.invalidate_calculation)
+        self.last_rl_entry.textChanged.connect(self.invalidate_calculation)
         if self.settings_dialog:
             self.settings_button = QPushButton(QIcon(os.path.join(ICON_DIR, 'settings.svg')), "")
             Tooltip(self.settings_button, "Open settings dialog.")
@@ -107,9 +173,8 @@ class LevelingApp(QWidget):
         main_layout.addWidget(self.progress_bar)
 
         # Data Entry Table
-        self.table = QTableWidget(DEFAULT_ROW_COUNT, len(self.COLUMN_NAMES))
+        self.table = LevelingTableView(DEFAULT_ROW_COUNT, self.COLUMN_NAMES, numeric_columns=(1, 2, 3))
         Tooltip(self.table, "Enter your survey readings here. Double-click to edit cells. Right-click for options.")
-        self.table.setHorizontalHeaderLabels(self.COLUMN_NAMES)
         header = self.table.horizontalHeader()
         if header is not None:
             header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
@@ -119,6 +184,11 @@ class LevelingApp(QWidget):
         self.table.customContextMenuRequested.connect(self.show_context_menu)
         self.table.itemChanged.connect(self.on_item_changed)
         self.table.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.table.table_model().history = self.history
+        # Row moves and reloads shift the rows an incremental update would address
+        self.table.table_model().rowsInserted.connect(self.invalidate_calculation)
+        self.table.table_model().rowsRemoved.connect(self.invalidate_calculation)
+        self.table.table_model().modelReset.connect(self.invalidate_calculation)
         main_layout.addWidget(self.table)
 
         # Add row button
@@ -175,80 +245,106 @@ class LevelingApp(QWidget):
         return super().eventFilter(obj, event)
 
     def push_undo(self):
-        snapshot = self.get_table_data()
-        self.undo_stack.append(snapshot)
-        self.redo_stack.clear()
+        # The table model records each change as a delta; close them into one undo step
+        self.history.checkpoint()
         self.update_undo_redo_buttons()
 
     def undo(self):
-        if len(self.undo_stack) > 1:
-            self.redo_stack.append(self.undo_stack.pop())
-            self.set_table_data(self.undo_stack[-1])
-            self.update_undo_redo_buttons()
+        self._step_history(self.history.undo)
 
     def redo(self):
-        if self.redo_stack:
-            self.undo_stack.append(self.redo_stack.pop())
-            self.set_table_data(self.undo_stack[-1])
-            self.update_undo_redo_buttons()
+        self._step_history(self.history.redo)
+
+    def _step_history(self, step):
+        self.table.blockSignals(True)
+        try:
+            changed = step(self.table.table_model())
+        finally:
+            self.table.blockSignals(False)
+        if changed:
+            self.calculator = None
+            self.update_stats()
+            self.validate_table()
+        self.update_undo_redo_buttons()
 
     def update_undo_redo_buttons(self):
-        self.undo_button.setEnabled(len(self.undo_stack) > 1)
-        self.redo_button.setEnabled(bool(self.redo_stack))
+        self.undo_button.setEnabled(self.history.can_undo())
+        self.redo_button.setEnabled(self.history.can_redo())
 
     def get_table_data(self):
-        data = []
-        for row in range(self.table.rowCount()):
-            row_data = []
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                row_data.append(item.text() if isinstance(item, QTableWidgetItem) else "")
-            data.append(row_data)
-        return data
+        return self.table.rows()
 
     def set_table_data(self, snapshot):
-        self.table.setRowCount(len(snapshot))
-        for row, row_data in enumerate(snapshot):
-            for col, value in enumerate(row_data):
-                self.table.setItem(row, col, QTableWidgetItem(value))
+        self.table.set_rows(snapshot)
+        self.apply_row_striping()
 
     def on_item_changed(self, item):
         if self.table.signalsBlocked():
             return
-        self.table.blockSignals(True)
+        self._table_generation += 1
+        # Coalesce bursts of edits (typing, pastes) into one refresh
+        self._dirty_rows.add(item.row())
+        if not self._change_timer.isActive():
+            self._change_timer.start()
+
+    def flush_changes(self, recalculate=True):
+        """Refreshes undo, stats, validation and results for the edits batched since the last call."""
+        self._change_timer.stop()
+        dirty_rows, self._dirty_rows = self._dirty_rows, set()
+        if not dirty_rows:
+            return
+        self.push_undo()
+        self.update_stats()
+        self.validate_table()
+        if not (recalculate and settings.get("auto_recalculate", False)):
+            # The last calculation no longer matches the table
+            self.invalidate_calculation()
+        elif self._calc_jobs:
+            # Supersede the running job with one over the edited table
+            self.calculate_and_update()
+        elif self.calculator is not None:
+            if len(dirty_rows) == 1:
+                self.recalculate_row(dirty_rows.pop())
+            else:
+                self.calculate_and_update()
+
+    def set_auto_recalculate(self, enabled):
+        settings["auto_recalculate"] = bool(enabled)
+        if enabled:
+            # Edits made while Auto was off are not in the last calculation
+            self.invalidate_calculation()
+
+    def invalidate_calculation(self, *args):
+        self._table_generation += 1
+        self.calculator = None
+
+    def recalculate_row(self, row):
+        """Updates the results after an edit in row, recomputing only from the edited setup on."""
+        row_data = self.table.table_model().row(row)
         try:
-            self.push_undo()
-            self.update_stats()
-            self.validate_table()
-            self.apply_row_striping()
-        finally:
-            self.table.blockSignals(False)
+            results, stats, first_changed = self.calculator.recalculate_row(row, row_data)
+        except LevelingCalculatorError as e:
+            # Leave the last results in place; the next Calculate runs a full pass
+            self.calculator = None
+            if e.errors:
+                self.error_label.setText(e.errors[0]["message"])
+            return
+        self.error_label.setText("")
+        self.show_results(results, first_changed)
+        self.update_stats(stats)
+        if self.on_results_ready:
+            self.on_results_ready(results)
 
     def validate_table(self):
         error_found = False
         error_msg = ""
-        # Columns that require numeric input: BS, IS, FS, RL (columns 1,2,3, and RL fields)
-        numeric_cols = [1, 2, 3]
-        for row in range(self.table.rowCount()):
-            for col in numeric_cols:
-                item = self.table.item(row, col)
-                text = item.text() if item is not None else ""
-                if text.strip() != "" and not self.is_number(text):
-                    if item is not None:
-                        item.setBackground(QColor("#ffcccc"))  # Red highlight
-                    error_found = True
-                    error_msg = f"Invalid number in row {row+1}, column {self.COLUMN_NAMES[col]}"
-                else:
-                    if item is not None:
-                        # Restore normal coloring for this cell only
-                        if settings["theme"] == "Dark":
-                            bg = QColor("#23272e") if row % 2 == 0 else QColor("#1a1c1e")
-                            fg = QColor("#f8f8f2")
-                        else:
-                            bg = QColor("#fff") if row % 2 == 0 else QColor("#f0f0f0")
-                            fg = QColor("#222")
-                        item.setBackground(bg)
-                        item.setForeground(fg)
+        # BS, IS and FS must be numeric; the model keeps the offending cells
+        # up to date per edit and paints them red
+        invalid = self.table.table_model().invalid_cells()
+        if invalid:
+            row, col = invalid[-1]
+            error_found = True
+            error_msg = f"Invalid number in row {row+1}, column {self.COLUMN_NAMES[col]}"
         # Validate RL fields
         for entry, label in [(self.first_rl_entry, "First RL"), (self.last_rl_entry, "Last RL")]:
             text = entry.text() if entry is not None else ""
@@ -369,6 +465,7 @@ class LevelingApp(QWidget):
         self.table.setRowCount(DEFAULT_ROW_COUNT)
         print(f"DEBUG: setRowCount({DEFAULT_ROW_COUNT}) in clear_all_data")
         self.results_table.setRowCount(0)
+        self.results = None
         self.stations_label.setText("Number of Stations (CP): 0")
         self.bs_label.setText("Backsights: 0")
         self.is_label.setText("Intersights: 0")
@@ -379,18 +476,8 @@ class LevelingApp(QWidget):
         self.apply_row_striping()
 
     def apply_row_striping(self):
-        for row in range(self.table.rowCount()):
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item:
-                    if settings["theme"] == "Dark":
-                        bg = QColor("#23272e") if row % 2 == 0 else QColor("#1a1c1e")
-                        fg = QColor("#f8f8f2")
-                    else:
-                        bg = QColor("#fff") if row % 2 == 0 else QColor("#f0f0f0")
-                        fg = QColor("#222")
-                    item.setBackground(bg)
-                    item.setForeground(fg)
+        # Stripe and error colors are resolved by the model for painted cells only
+        self.table.table_model().set_theme(settings["theme"])
 
     def update_stats(self, stats=None, *args, **kwargs):
         if stats:
@@ -417,22 +504,9 @@ class LevelingApp(QWidget):
             if self.arith_label is not None:
                 self.arith_label.setText(check_msg)
         else:
-            # Update from table data (live update)
-            cp = bs = is_ = fs = 0
-            for row in range(self.table.rowCount()):
-                vals = []
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    val = item.text() if item is not None else ""
-                    vals.append(val)
-                if any(vals):
-                    cp += 1
-                if len(vals) > 1 and vals[1]:
-                    bs += 1
-                if len(vals) > 2 and vals[2]:
-                    is_ += 1
-                if len(vals) > 3 and vals[3]:
-                    fs += 1
+            # Update from table data (live update); the model keeps the counts per edit
+            filled, cp = self.table.table_model().filled_counts()
+            bs, is_, fs = filled[1:4]
             if self.stations_label is not None:
                 self.stations_label.setText(f"Number of Stations (CP): {cp}")
             if self.bs_label is not None:
@@ -445,15 +519,12 @@ class LevelingApp(QWidget):
                 self.arith_label.setText("Arithmetic Check: -")
 
     def calculate_and_update(self):
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 0)
-        QApplication.processEvents()
-
+        """Starts the calculation in a worker thread, superseding any job still running."""
+        self.flush_changes(recalculate=False)
         try:
             first_rl = float(self.first_rl_entry.text())
         except ValueError:
             QMessageBox.critical(self, "Input Error", "First RL must be a valid number.")
-            self.progress_bar.setVisible(False)
             return
 
         last_rl_str = self.last_rl_entry.text().strip()
@@ -461,25 +532,69 @@ class LevelingApp(QWidget):
 
         data = self.get_table_data()
         method = "HI" if self.hi_radio.isChecked() else "RF"
+        self._start_calculation(method, first_rl, last_rl, data)
+
+    def _start_calculation(self, method, first_rl, last_rl, data):
+        for _thread, running in self._calc_jobs.values():
+            running.cancel()
+        self.calculator = None
+        self._calc_job_id += 1
+        job_id = self._calc_job_id
+        self._calc_generation = self._table_generation
+
+        thread = QThread(self)
+        worker = CalculationWorker(job_id, method, first_rl, last_rl, data)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.progress.connect(self._on_calculation_progress)
+        worker.result.connect(self._on_calculation_result)
+        worker.error.connect(self._on_calculation_error)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(lambda: self._calc_jobs.pop(job_id, None))
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        self._calc_jobs[job_id] = (thread, worker)
+
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.cancel_calc_button.setVisible(True)
+        thread.start()
+
+    def cancel_calculation(self):
+        for _thread, worker in self._calc_jobs.values():
+            worker.cancel()
+        self._calc_job_id += 1  # Ignore anything the cancelled jobs still report
+        self._finish_calculation()
+
+    def stop_calculations(self):
+        """Cancels running calculations and waits for their threads to exit."""
+        for thread, worker in list(self._calc_jobs.values()):
+            worker.cancel()
+            thread.quit()
+            thread.wait()
+
+    def _finish_calculation(self):
+        self.progress_bar.setVisible(False)
+        self.cancel_calc_button.setVisible(False)
 
+    def _on_calculation_progress(self, job_id, percent):
+        if job_id == self._calc_job_id:
+            self.progress_bar.setValue(percent)
+
+    def _on_calculation_result(self, job_id, calculator, results, stats):
+        if job_id != self._calc_job_id:
+            return  # Superseded by a newer job
+        self._finish_calculation()
         try:
-            calculator = LevelingCalculator(settings)
-            results, stats = calculator.calculate_leveling(method, first_rl, last_rl, data)
-            
+            # Keep the job's calculator for incremental updates only if the
+            # table is still the snapshot it calculated
+            self.calculator = calculator if self._calc_generation == self._table_generation else None
+
             self.results_table.setRowCount(0)
+            self.results = None
             if results:
-                method = "HI" if self.hi_radio.isChecked() else "RF"
-                if method == "HI":
-                    headers = ["Point", "BS", "IS", "FS", "HI", "RL", "Adjustment", "Adjusted RL", "Design RL", "Cut", "Fill", "Elevation"]
-                else: # RF
-                    headers = ["Point", "BS", "IS", "FS", "Rise", "Fall", "RL", "Adjustment", "Adjusted RL", "Design RL", "Cut", "Fill", "Elevation"]
-                
-                self.results_table.setColumnCount(len(headers))
-                self.results_table.setHorizontalHeaderLabels(headers)
-                self.results_table.setRowCount(len(results))
-                for row_idx, row_data in enumerate(results):
-                    for col_idx, key in enumerate(headers):
-                        self.results_table.setItem(row_idx, col_idx, QTableWidgetItem(str(row_data.get(key, ""))))
+                self.show_results(results)
 
             self.error_label.setText("")
             self.update_stats(stats)
@@ -489,8 +604,84 @@ class LevelingApp(QWidget):
 
         except Exception as e:
             QMessageBox.critical(self, "Calculation Error", f"An error occurred during calculation: {e}")
-        finally:
-            self.progress_bar.setVisible(False)
+
+    def _on_calculation_error(self, job_id, message):
+        if job_id != self._calc_job_id:
+            return
+        self._finish_calculation()
+        QMessageBox.critical(self, "Calculation Error", f"An error occurred during calculation: {message}")
+
+    def show_results(self, results, first_row=0):
+        """Fills the results table; rows before first_row are kept when the table already has them.
+
+        The adjustment columns are always refreshed, as a new misclosure
+        changes them on every row.
+        """
+        self.results = results if isinstance(results, LevelingResult) else None
+        if isinstance(results, LevelingResult):
+            method = results.method
+        else:
+            method = "HI" if self.hi_radio.isChecked() else "RF"
+        if method == "HI":
+            headers = ["Point", "BS", "IS", "FS", "HI", "RL", "Adjustment", "Adjusted RL", "Design RL", "Cut", "Fill", "Elevation"]
+        else: # RF
+            headers = ["Point", "BS", "IS", "FS", "Rise", "Fall", "RL", "Adjustment", "Adjusted RL", "Design RL", "Cut", "Fill", "Elevation"]
+
+        if self.results_table.rowCount() != len(results) or self.results_table.columnCount() != len(headers):
+            first_row = 0
+        self.results_table.setColumnCount(len(headers))
+        self.results_table.setHorizontalHeaderLabels(headers)
+        self.results_table.setRowCount(len(results))
+        adjusted_cols = ("Adjustment", "Adjusted RL", "Cut", "Fill", "Elevation")
+        if isinstance(results, LevelingResult):
+            # Format column by column straight from the result arrays
+            for col_idx, key in enumerate(headers):
+                start = 0 if key in adjusted_cols else first_row
+                values = results.column(key)
+                for row_idx in range(start, len(results)):
+                    self._set_result_text(row_idx, col_idx, str(values[row_idx]))
+        else:
+            for row_idx, row_data in enumerate(results):
+                for col_idx, key in enumerate(headers):
+                    self._set_result_text(row_idx, col_idx, str(row_data.get(key, "")))
+
+    def _set_result_text(self, row, col, text):
+        item = self.results_table.item(row, col)
+        if item is None:
+            self.results_table.setItem(row, col, QTableWidgetItem(text))
+        elif item.text() != text:
+            item.setText(text)
+
+    def open_traverse(self, traverse, metadata):
+        """Loads a traverse read from a project file and calculates it straight from its arrays.
+
+        metadata may give "method", "first_rl" and "last_rl"; without a
+        valid first RL the book is only loaded.
+        """
+        self.cancel_calculation()
+        columns = traverse.to_columns()[:len(self.COLUMN_NAMES)]
+        self.table.table_model().swap_columns(columns)
+        self.push_undo()
+        self.results_table.setRowCount(0)
+        self.results = None
+        first_rl_text = str(metadata.get("first_rl", ""))
+        last_rl_text = str(metadata.get("last_rl", ""))
+        self.first_rl_entry.setText(first_rl_text)
+        self.last_rl_entry.setText(last_rl_text)
+        method = metadata.get("method", "HI")
+        (self.rf_radio if method == "RF" else self.hi_radio).setChecked(True)
+        self.apply_row_striping()
+        self.update_stats()
+        self.validate_table()
+        if self.is_number(first_rl_text) and len(traverse):
+            last_rl = float(last_rl_text) if self.is_number(last_rl_text) else None
+            self._start_calculation(method, float(first_rl_text), last_rl, traverse)
+
+    def project_metadata(self):
+        """Method and RL entries saved with a project."""
+        return {"method": "HI" if self.hi_radio.isChecked() else "RF",
+                "first_rl": self.first_rl_entry.text().strip(),
+                "last_rl": self.last_rl_entry.text().strip()}
 
     def get_data_for_session(self):
         return self.get_table_data()
@@ -502,20 +693,12 @@ class LevelingApp(QWidget):
             self.progress_bar.setRange(0, 0)  # Indeterminate for small/fast restores
         else:
             self.progress_bar.setRange(0, max(1, len(data)))
-        self.table.setRowCount(len(data))  # Ensure table can show all rows
-        print(f"DEBUG: setRowCount({len(data)}) in set_data_from_session")
         self.progress_bar.setValue(0)
         self.progress_bar.setToolTip("Restoring session data...")
         QApplication.processEvents()
-        for row, row_data in enumerate(data):
-            print(f"DEBUG: _restore_row row={row}, len(row_data)={len(row_data)}, expected columns={self.table.columnCount()}")
-            for col, value in enumerate(row_data):
-                if value is None:
-                    print(f"ERROR: None value at row {row}, col {col}")
-                self.table.setItem(row, col, QTableWidgetItem(str(value) if value is not None else ""))
-            if len(data) >= 20:
-                self.progress_bar.setValue(row + 1)
-            QApplication.processEvents()
+        self.table.set_rows(data)
+        if len(data) >= 20:
+            self.progress_bar.setValue(len(data))
         print("DEBUG: Final table row count after restore:", self.table.rowCount())
         QTimer.singleShot(1000, lambda: print("DEBUG: Row count after 1s:", self.table.rowCount()))
         self.push_undo()
@@ -0,0 +1,187 @@
+"""Delta-based undo history for the leveling input table.
+
+Changes are recorded by LevelingTableModel as small commands (a cell edit,
+rows inserted or removed, a whole-table reset) and grouped into undo steps
+at each checkpoint, so undo and redo cost O(changed cells) rather than a
+copy of the table per step.
+"""
+
+POINTER_SIZE = 8
+CELL_OVERHEAD = 64  # Rough per-string cost beyond its characters
+
+
+class TableCommand:
+    """One recorded change to a LevelingTableModel."""
+    __slots__ = ()
+
+    def cost(self):
+        """Approximate bytes held by the command."""
+        return CELL_OVERHEAD
+
+    def undo(self, model):
+        raise NotImplementedError
+
+    def redo(self, model):
+        raise NotImplementedError
+
+
+class CellEdit(TableCommand):
+    __slots__ = ("row", "col", "old", "new")
+
+    def __init__(self, row, col, old, new):
+        self.row = row
+        self.col = col
+        self.old = old
+        self.new = new
+
+    def cost(self):
+        return 2 * CELL_OVERHEAD + len(self.old) + len(self.new)
+
+    def undo(self, model):
+        model.set_text(self.row, self.col, self.old)
+
+    def redo(self, model):
+        model.set_text(self.row, self.col, self.new)
+
+
+class RowsInserted(TableCommand):
+    __slots__ = ("row", "count")
+
+    def __init__(self, row, count):
+        self.row = row
+        self.count = count
+
+    def undo(self, model):
+        model.removeRows(self.row, self.count)
+
+    def redo(self, model):
+        model.insertRows(self.row, self.count)
+
+
+class RowsRemoved(TableCommand):
+    __slots__ = ("row", "cells")
+
+    def __init__(self, row, cells):
+        self.row = row
+        self.cells = cells  # One list of removed strings per column
+
+    def cost(self):
+        return sum(POINTER_SIZE * len(column) + sum(map(len, column)) for column in self.cells)
+
+    def undo(self, model):
+        model.insert_cells(self.row, self.cells)
+
+    def redo(self, model):
+        model.removeRows(self.row, len(self.cells[0]) if self.cells else 0)
+
+
+class TableReset(TableCommand):
+    """A bulk load; holds the column lists on the other side of the change."""
+    __slots__ = ("columns", "size")
+
+    def __init__(self, columns, new_rows):
+        self.columns = columns
+        # Both states stay alive across undo/redo; count their cell pointers
+        self.size = POINTER_SIZE * len(columns) * (len(columns[0]) + new_rows) if columns else 0
+
+    def cost(self):
+        return self.size
+
+    def undo(self, model):
+        self.columns = model.swap_columns(self.columns)
+
+    redo = undo
+
+
+class UndoStep:
+    """The commands recorded between two checkpoints."""
+    __slots__ = ("commands", "cost")
+
+    def __init__(self, commands):
+        self.commands = commands
+        self.cost = sum(command.cost() for command in commands)
+
+
+class UndoHistory:
+    """Undo/redo stacks of UndoSteps with a depth cap and a memory budget.
+
+    The oldest steps are dropped once there are more than max_steps of them
+    or they hold more than max_bytes, always keeping the latest step.
+    """
+
+    def __init__(self, max_steps=100, max_bytes=64 * 1024 * 1024):
+        self.max_steps = max_steps
+        self.max_bytes = max_bytes
+        self.undo_stack = []
+        self.redo_stack = []
+        self.applying = False
+        self._pending = []
+        self._bytes = 0
+
+    @property
+    def bytes_used(self):
+        return self._bytes
+
+    def record(self, command):
+        if not self.applying:
+            self._pending.append(command)
+
+    def checkpoint(self):
+        """Closes the commands recorded since the last checkpoint into one undo step."""
+        if not self._pending:
+            return False
+        step = UndoStep(self._pending)
+        self._pending = []
+        for dropped in self.redo_stack:
+            self._bytes -= dropped.cost
+        self.redo_stack.clear()
+        self.undo_stack.append(step)
+        self._bytes += step.cost
+        self._trim()
+        return True
+
+    def _trim(self):
+        excess = 0
+        while (len(self.undo_stack) - excess > self.max_steps
+               or (self._bytes > self.max_bytes and len(self.undo_stack) - excess > 1)):
+            self._bytes -= self.undo_stack[excess].cost
+            excess += 1
+        if excess:
+            del self.undo_stack[:excess]
+
+    def can_undo(self):
+        return bool(self.undo_stack or self._pending)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self, model):
+        self.checkpoint()
+        if not self.undo_stack:
+            return False
+        step = self.undo_stack.pop()
+        self._apply(model, reversed(step.commands), "undo")
+        self.redo_stack.append(step)
+        return True
+
+    def redo(self, model):
+        if not self.redo_stack:
+            return False
+        step = self.redo_stack.pop()
+        self._apply(model, step.commands, "redo")
+        self.undo_stack.append(step)
+        return True
+
+    def _apply(self, model, commands, action):
+        self.applying = True
+        try:
+            for command in commands:
+                getattr(command, action)(model)
+        finally:
+            self.applying = False
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._pending = []
+        self._bytes = 0
@@ -3,9 +3,10 @@ import csv
 from pathlib import Path
 import json
 import datetime
-import tempfile
 import openpyxl
 from fpdf import FPDF
+from .traverse import LevelingResult
+from .render_service import graph_image
 
 # --- CONSTANTS ---
 DEFAULT_ROW_COUNT = 30
@@ -62,6 +63,13 @@ class Tooltip:
             tw.destroy()
 
 
+def _table_rows(results_data):
+    """Header and row iterator for a LevelingResult or a list of result dicts."""
+    if isinstance(results_data, LevelingResult):
+        return results_data.headers, results_data.rows()
+    header = list(results_data[0].keys())
+    return header, ([row.get(key, "") for key in header] for row in results_data)
+
 def generate_pdf_report(results_data, fig, file_path):
     """Generates a comprehensive PDF report of the leveling data and graph."""
     try:
@@ -78,7 +86,7 @@ def generate_pdf_report(results_data, fig, file_path):
             pdf.cell(0, 10, "Calculation Results", new_x="LMARGIN", new_y="NEXT")
             pdf.set_font("Helvetica", "B", 9)
             
-            header = list(results_data[0].keys())
+            header, rows = _table_rows(results_data)
             col_widths = [pdf.w / (len(header) + 1)] * len(header)
 
             for i, header_text in enumerate(header):
@@ -86,28 +94,16 @@ def generate_pdf_report(results_data, fig, file_path):
             pdf.ln()
 
             pdf.set_font("Helvetica", "", 9)
-            for row in results_data:
-                for i, key in enumerate(header):
-                    pdf.cell(col_widths[i], 6, str(row.get(key, "")), 1, new_x="RIGHT", new_y="TOP", align="C")
+            for row in rows:
+                for i, value in enumerate(row):
+                    pdf.cell(col_widths[i], 6, str(value), 1, new_x="RIGHT", new_y="TOP", align="C")
                 pdf.ln()
             pdf.ln(10)
 
         pdf.set_font("Helvetica", "B", 12)
         pdf.cell(0, 10, "Profile Graph", new_x="LMARGIN", new_y="NEXT")
         
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_img:
-            graph_image_path = tmp_img.name
-            fig.savefig(graph_image_path, dpi=300)
-        
-        try:
-            pdf.image(graph_image_path, x=10, y=pdf.get_y(), w=190)
-        finally:
-            import os
-            if os.path.exists(graph_image_path):
-                try:
-                    os.remove(graph_image_path)
-                except Exception as e:
-                    logging.warning(f"Could not remove temp file: {e}")
+        pdf.image(graph_image(fig), x=10, y=pdf.get_y(), w=190)
         
         pdf.output(file_path)
         return True
@@ -124,9 +120,10 @@ def export_to_excel(data, file_path):
             raise ValueError("Could not create worksheet")
         
         if data:
-            ws.append(list(data[0].keys()))
-            for row in data:
-                ws.append(list(row.values()))
+            header, rows = _table_rows(data)
+            ws.append(header)
+            for row in rows:
+                ws.append(row)
         
         wb.save(file_path)
         return True